@@ -1,11 +1,12 @@
 import os
 
+import geopandas as gpd
 import numpy as np
 import pandas as pd
 import pytest
 
 import trackintel as ti
-from trackintel.analysis.labelling import _check_categories
+from trackintel.analysis.labelling import _check_categories, tripleg_movement_features
 
 
 class TestCreate_activity_flag:
@@ -37,6 +38,78 @@ class TestCreate_activity_flag:
             stps_test.as_staypoints.create_activity_flag(method=method)
 
 
+@pytest.fixture
+def example_tripleg_pfs():
+    """Positionfixes of two triplegs in a projected crs.
+
+    Tripleg 0 moves east with 1, 0 and 2 m/s in 10 s steps and turns north with 4 m/s in the last segment.
+    Tripleg 1 has a single positionfix, staypoint positionfixes have tripleg_id -1.
+    """
+    t = pd.Timestamp("2021-01-01 00:00:00", tz="utc")
+    s = pd.Timedelta("10s")
+    list_dict = [
+        {"tracked_at": t, "x": 0, "y": 0, "tripleg_id": 0},
+        {"tracked_at": t + s, "x": 10, "y": 0, "tripleg_id": 0},
+        {"tracked_at": t + 2 * s, "x": 10, "y": 0, "tripleg_id": 0},
+        {"tracked_at": t + 3 * s, "x": 30, "y": 0, "tripleg_id": 0},
+        {"tracked_at": t + 4 * s, "x": 30, "y": 40, "tripleg_id": 0},
+        {"tracked_at": t + 5 * s, "x": 30, "y": 40, "tripleg_id": -1},
+        {"tracked_at": t + 6 * s, "x": 50, "y": 40, "tripleg_id": 1},
+    ]
+    pfs = pd.DataFrame(list_dict)
+    pfs = gpd.GeoDataFrame(pfs, geometry=gpd.points_from_xy(pfs["x"], pfs["y"]), crs="EPSG:2056")
+    pfs["user_id"] = 0
+    pfs = pfs.drop(columns=["x", "y"])
+    # shuffled to test the sorting
+    return pfs.iloc[[3, 0, 6, 2, 5, 4, 1]]
+
+
+class TestTripleg_movement_features:
+    """Tests for tripleg_movement_features() function."""
+
+    def test_features(self, example_tripleg_pfs):
+        """Test the features of a tripleg with known movement."""
+        features = tripleg_movement_features(example_tripleg_pfs, percentiles=[0, 50, 100])
+        assert features.index.tolist() == [0, 1]
+
+        f = features.loc[0]
+        assert f["speed_p0"] == 0
+        assert f["speed_p50"] == 1.5
+        assert f["speed_p100"] == 4
+        # accelerations are 0.1, 0.2 and 0.2 m/s^2
+        assert np.isclose(f["acceleration_p50"], 0.2)
+        # one heading change within 70 m
+        assert np.isclose(f["heading_change_rate"], 1 / 0.07)
+        assert f["stop_ratio"] == 0.25
+        # no segments for tripleg 1
+        assert features.loc[1].isna().all()
+
+    def test_triplegs_index(self, example_tripleg_pfs):
+        """Test if the features are aligned to the tripleg index."""
+        tpls = pd.DataFrame(index=pd.Index([2, 0], name="id"))
+        features = tripleg_movement_features(example_tripleg_pfs, tpls)
+        assert features.index.equals(tpls.index)
+        assert features.loc[2].isna().all()
+        assert features.loc[0].notna().all()
+
+    def test_acceleration_uneven_segments(self):
+        """Test if the acceleration uses the time between the midpoints of segments with uneven durations."""
+        t = pd.Timestamp("2021-01-01 00:00:00", tz="utc")
+        # 1 m/s for 10 s and 3 m/s for 30 s, the midpoints of the segments are 20 s apart
+        pfs = gpd.GeoDataFrame(
+            {"tracked_at": [t, t + pd.Timedelta("10s"), t + pd.Timedelta("40s")], "tripleg_id": 0, "user_id": 0},
+            geometry=gpd.points_from_xy([0, 10, 100], [0, 0, 0]),
+            crs="EPSG:2056",
+        )
+        features = tripleg_movement_features(pfs, percentiles=[50])
+        assert np.isclose(features.loc[0, "acceleration_p50"], 0.1)
+
+    def test_no_tripleg_id(self, example_tripleg_pfs):
+        """Test if a KeyError is raised if the positionfixes have no tripleg_id."""
+        with pytest.raises(KeyError):
+            tripleg_movement_features(example_tripleg_pfs.drop(columns="tripleg_id"))
+
+
 class TestPredict_transport_mode:
     """Tests for predict_transport_mode() method."""
 
@@ -110,6 +183,66 @@ class TestPredict_transport_mode:
         with pytest.warns(UserWarning):
             tpls_4.as_triplegs.predict_transport_mode(method="simple-coarse")
 
+    def test_simple_coarse_categorical(self):
+        """Test if the modes are categorical and follow the speed boundaries."""
+        tpls_file = os.path.join("tests", "data", "triplegs_transport_mode_identification.csv")
+        tpls = ti.read_triplegs_csv(tpls_file, sep=";", index_col="id")
+        tpls = tpls.set_crs(epsg=4326).to_crs(epsg=2056)
+        speed = tpls.length / (tpls["finished_at"] - tpls["started_at"]).dt.total_seconds()
+        # the speed of the second tripleg is exactly on a boundary, the third is above all boundaries
+        categories = {speed.iloc[0] * 2: "slow", speed.iloc[1]: "medium", speed.iloc[1] * 1.5: "fast"}
+        tpls = tpls.as_triplegs.predict_transport_mode(method="simple-coarse", categories=categories)
+
+        assert isinstance(tpls["mode"].dtype, pd.CategoricalDtype)
+        assert tpls["mode"].cat.categories.tolist() == ["slow", "medium", "fast"]
+        assert tpls["mode"].iloc[0] == "slow"
+        assert tpls["mode"].iloc[1] == "fast"
+        assert pd.isna(tpls["mode"].iloc[2])
+
+    def test_classifier(self):
+        """Test the prediction with a classifier on the movement features of triplegs with known speeds."""
+        tpls_file = os.path.join("tests", "data", "triplegs_transport_mode_identification.csv")
+        tpls = ti.read_triplegs_csv(tpls_file, sep=";", index_col="id")
+        # triplegs move east with 1, 20 and 5 m/s in 10 s steps
+        t = pd.Timestamp("2021-01-01 00:00:00", tz="utc")
+        list_dict = [
+            {"tracked_at": t + pd.Timedelta(seconds=10 * i), "x": speed * 10 * i, "tripleg_id": tpl_id}
+            for tpl_id, speed in enumerate([1, 20, 5])
+            for i in range(4)
+        ]
+        pfs = pd.DataFrame(list_dict)
+        pfs = gpd.GeoDataFrame(pfs, geometry=gpd.points_from_xy(pfs["x"], np.zeros(len(pfs))), crs="EPSG:2056")
+        pfs["user_id"] = 1
+
+        def classifier(features):
+            return pd.cut(features["speed_p50"], [0, 2, 10, np.inf], labels=["walk", "bike", "car"]).astype(str)
+
+        tpls = tpls.as_triplegs.predict_transport_mode(method="classifier", positionfixes=pfs, classifier=classifier)
+        assert isinstance(tpls["mode"].dtype, pd.CategoricalDtype)
+        assert tpls["mode"].tolist() == ["walk", "car", "bike"]
+
+    def test_classifier_predict(self):
+        """Test if objects with a predict method are supported and incomplete features get no mode."""
+        tpls_file = os.path.join("tests", "data", "triplegs_transport_mode_identification.csv")
+        tpls = ti.read_triplegs_csv(tpls_file, sep=";", index_col="id")
+        pfs, _ = ti.io.dataset_reader.read_geolife(os.path.join("tests", "data", "geolife_long"))
+        pfs["tripleg_id"] = np.arange(len(pfs)) // (len(pfs) // 2)  # tripleg 2 has no or one positionfix
+
+        class Classifier:
+            def predict(self, X):
+                return ["walk"] * len(X)
+
+        tpls = tpls.as_triplegs.predict_transport_mode(method="classifier", positionfixes=pfs, classifier=Classifier())
+        assert tpls["mode"].tolist()[:2] == ["walk", "walk"]
+        assert pd.isna(tpls["mode"].iloc[2])
+
+    def test_classifier_missing_arguments(self):
+        """Test if an error is raised if positionfixes or classifier are missing."""
+        tpls_file = os.path.join("tests", "data", "triplegs_transport_mode_identification.csv")
+        tpls = ti.read_triplegs_csv(tpls_file, sep=";", index_col="id")
+        with pytest.raises(ValueError):
+            tpls.as_triplegs.predict_transport_mode(method="classifier", classifier=lambda x: x)
+
     def test_check_categories(self):
         """Asserts the correct identification of valid category dictionaries."""
         tpls_file = os.path.join("tests", "data", "triplegs_transport_mode_identification.csv")
@@ -9,11 +9,10 @@ from geopandas.testing import assert_geodataframe_equal
 from pandas.testing import assert_frame_equal, assert_index_equal
 from shapely.geometry import Point
 from trackintel.analysis.location_identification import (
-    _freq_assign,
-    _freq_transform,
     _osna_label_timeframes,
     freq_method,
     location_identifier,
+    location_statistics,
     osna_method,
     pre_filter_locations,
 )
@@ -115,6 +114,53 @@ class TestPre_Filter:
         assert_index_equal(f.index, example_staypoints.index)
 
 
+class TestLocation_statistics:
+    """Tests for the function `location_statistics()`."""
+
+    def test_statistics(self, example_staypoints):
+        """Test the aggregated values per user and location."""
+        stats = location_statistics(example_staypoints)
+        assert stats.index.names == ["user_id", "location_id"]
+        assert stats.index.tolist() == [(0, 0), (0, 1), (1, 0)]
+        assert stats["count"].tolist() == [2, 1, 1]
+        assert stats.loc[(0, 0), "duration"] == pd.Timedelta("7h")
+        assert stats.loc[(0, 0), "started_at"] == example_staypoints["started_at"].iloc[0]
+        assert stats.loc[(0, 0), "finished_at"] == example_staypoints["finished_at"].iloc[1]
+        # 1971-01-01 is a friday, the mean times of the visits at (0, 0) are 2:30 and 6:00
+        assert stats.loc[(0, 0), "duration_rest"] == pd.Timedelta("7h")
+        assert pd.isna(stats.loc[(0, 0), "duration_work"])
+        # 1971-01-02 is a saturday
+        assert stats.loc[(1, 0), "duration_weekend"] == pd.Timedelta("1h")
+
+    def test_missing_location(self, example_staypoints):
+        """Test if staypoints without location are aggregated separately and count for the user."""
+        example_staypoints.loc[example_staypoints.index[2], "location_id"] = np.nan
+        stats = location_statistics(example_staypoints)
+        assert len(stats) == 3
+        assert stats["count"].sum() == len(example_staypoints)
+        f = pre_filter_locations(
+            example_staypoints,
+            agg_level="user",
+            thresh_sp=3,
+            thresh_loc=0,
+            thresh_sp_at_loc=0,
+            thresh_loc_time="0h",
+            thresh_loc_period="0h",
+        )
+        assert f.tolist() == [True, True, False, False]
+
+    def test_reuse(self, example_osna, default_kwargs):
+        """Test if passing the statistics gives the same results as calculating them."""
+        stats = location_statistics(example_osna)
+        default_kwargs["thresh_sp_at_loc"] = 2
+        for method in ["FREQ", "OSNA"]:
+            li = location_identifier(example_osna, method=method, location_stats=stats, **default_kwargs)
+            li_sol = location_identifier(example_osna, method=method, **default_kwargs)
+            assert_geodataframe_equal(li, li_sol)
+        assert_geodataframe_equal(freq_method(example_osna, location_stats=stats), freq_method(example_osna))
+        assert_geodataframe_equal(osna_method(example_osna, location_stats=stats), osna_method(example_osna))
+
+
 @pytest.fixture
 def example_freq():
     """Example staypoints with 4 location for 2 users with [3, 2, 1, 1] staypoint per location."""
@@ -182,40 +228,23 @@ class TestFreq_method:
         assert freq["activity_label"].count() == example_freq["activity_label"].count()
         assert_geodataframe_equal(example_freq, freq)
 
+    def test_more_labels_than_locations(self, example_freq):
+        """Test if surplus labels are ignored."""
+        labels = ("label0", "label1", "label2", "label3", "label4", "label5")
+        freq = freq_method(example_freq, *labels)
+        example_freq["activity_label"] = example_freq["location_id"].map(dict(enumerate(labels)))
+        assert_geodataframe_equal(example_freq, freq)
 
-class Test_Freq_Transform:
-    """Test help function _freq_transform."""
-
-    def test_function(self):
-        """Test if groupby assign works."""
-        list_dict = [
-            {"location_id": 0, "duration": 1},
-            {"location_id": 0, "duration": 1},
-            {"location_id": 1, "duration": 1},
-        ]
-        df = pd.DataFrame(list_dict)
-        freq = _freq_transform(df, "work")
-        sol = pd.Series(["work", "work", None])
-        assert freq.equals(sol)
-
-
-class Test_Freq_Assign:
-    """Test help function _freq_assign."""
-
-    def test_function(self):
-        """Test function with simple input."""
-        dur = pd.Series([9, 0, 8, 1, 7, 6, 5])
-        labels = ("label1", "label2", "label3")
-        freq_sol = np.array([labels[0], None, labels[1], None, labels[2], None, None])
-        freq = _freq_assign(dur, *labels)
-        assert all(freq == freq_sol)
-
-    def test_more_labels_than_entries(self):
-        dur = pd.Series([9, 0])
-        labels = ("label1", "label2", "label3")
-        freq_sol = np.array([labels[0], labels[1]])
-        freq = _freq_assign(dur, *labels)
-        assert all(freq == freq_sol)
+    def test_ties(self, example_freq):
+        """Test if equal durations are resolved by the location_id for every user."""
+        example_freq["location_id"] = example_freq["location_id"].replace({0: 1, 1: 0})
+        example_freq["user_id"] = example_freq["user_id"] * 100
+        freq = freq_method(example_freq, "label0", "label1", "label2", "label3")
+        # locations 2 and 3 have the same duration
+        example_freq["activity_label"] = example_freq["location_id"].map({1: "label0", 0: "label1"})
+        example_freq.loc[example_freq["location_id"] == 2, "activity_label"] = "label2"
+        example_freq.loc[example_freq["location_id"] == 3, "activity_label"] = "label3"
+        assert_geodataframe_equal(example_freq, freq)
 
 
 class TestLocation_Identifier:
@@ -445,10 +474,8 @@ class Test_osna_label_timeframes:
         t2 = pd.Timestamp("2021-05-22 07:00:00")
         t3 = pd.Timestamp("2021-05-22 08:00:00")
         t4 = pd.Timestamp("2021-05-22 20:00:00")
-        assert _osna_label_timeframes(t1) == "weekend"
-        assert _osna_label_timeframes(t2) == "weekend"
-        assert _osna_label_timeframes(t3) == "weekend"
-        assert _osna_label_timeframes(t4) == "weekend"
+        labels = _osna_label_timeframes(pd.Series([t1, t2, t3, t4]))
+        assert all(labels == "weekend")
 
     def test_weekday(self):
         """Test the different labels on a weekday."""
@@ -457,8 +484,16 @@ class Test_osna_label_timeframes:
         t3 = pd.Timestamp("2021-05-20 08:00:00")
         t4 = pd.Timestamp("2021-05-20 19:00:00")
         t5 = pd.Timestamp("2021-05-20 18:59:59")
-        assert _osna_label_timeframes(t1) == "leisure"
-        assert _osna_label_timeframes(t2) == "rest"
-        assert _osna_label_timeframes(t3) == "work"
-        assert _osna_label_timeframes(t4) == "leisure"
-        assert _osna_label_timeframes(t5) == "work"
+        labels = _osna_label_timeframes(pd.Series([t1, t2, t3, t4, t5]))
+        assert all(labels == np.array(["leisure", "rest", "work", "leisure", "work"]))
+
+    def test_custom_boundaries(self):
+        """Test if the weekend and the start of the timeframes can be changed."""
+        t1 = pd.Timestamp("2021-05-21 01:00:00")  # friday
+        t2 = pd.Timestamp("2021-05-22 01:00:00")  # saturday
+        t3 = pd.Timestamp("2021-05-22 09:00:00")
+        t4 = pd.Timestamp("2021-05-22 17:00:00")
+        labels = _osna_label_timeframes(
+            pd.Series([t1, t2, t3, t4]), weekend=[4], start_rest=0, start_work=9, start_leisure=17
+        )
+        assert all(labels == np.array(["weekend", "rest", "work", "leisure"]))
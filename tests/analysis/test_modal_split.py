@@ -5,6 +5,7 @@ import geopandas as gpd
 import numpy as np
 import pandas as pd
 import pytest
+from pandas.testing import assert_frame_equal
 from shapely.geometry import LineString
 
 from trackintel.analysis.modal_split import calculate_modal_split
@@ -177,6 +178,15 @@ class TestModalSplit:
         assert np.isclose(modal_split.loc[0, "walk"], datetime.timedelta(hours=2).total_seconds())
         assert np.isclose(modal_split.loc[1, "walk"], datetime.timedelta(hours=2).total_seconds())
 
+    def test_modal_split_missing_duration(self, test_triplegs_modal_split):
+        """Check if missing durations are skipped in the sum"""
+        tpls = test_triplegs_modal_split.copy()
+        tpls.loc[tpls["id"] == 3, "finished_at"] = pd.NaT
+        modal_split = calculate_modal_split(tpls, metric="duration", per_user=True)
+
+        assert np.isclose(modal_split.loc[0, "walk"], datetime.timedelta(hours=1).total_seconds())
+        assert np.isclose(modal_split.loc[1, "walk"], datetime.timedelta(hours=2).total_seconds())
+
     def test_modal_split_daily_count(self, test_triplegs_modal_split):
         """Check counts per user and mode binned by day"""
         tpls = test_triplegs_modal_split
@@ -205,3 +215,23 @@ class TestModalSplit:
         assert modal_split.loc[[(0, w_1)], "walk"][0] == 1
         assert modal_split.loc[[(0, w_2)], "walk"][0] == 1
         assert modal_split.loc[[(1, w_1)], "walk"][0] == 2
+
+    def test_modal_split_multiple(self, test_triplegs_modal_split):
+        """Check if several frequencies and metrics give the same results as separate calls"""
+        tpls = test_triplegs_modal_split
+        freqs = [None, "D", "W-MON"]
+        metrics = ["count", "distance", "duration"]
+        modal_splits = calculate_modal_split(tpls, freq=freqs, metric=metrics, per_user=True)
+
+        assert set(modal_splits.keys()) == {(f, m) for f in freqs for m in metrics}
+        for (freq, metric), modal_split in modal_splits.items():
+            assert_frame_equal(modal_split, calculate_modal_split(tpls, freq=freq, metric=metric, per_user=True))
+
+        # a list with a single entry also returns a dictionary
+        modal_splits = calculate_modal_split(tpls, freq="D", metric=["duration"])
+        assert list(modal_splits.keys()) == [("D", "duration")]
+
+    def test_modal_split_unknown_metric(self, test_triplegs_modal_split):
+        """Check if an error is raised for unknown metrics"""
+        with pytest.raises(AttributeError):
+            calculate_modal_split(test_triplegs_modal_split, metric="speed")
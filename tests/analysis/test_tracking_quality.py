@@ -1,5 +1,6 @@
 import os
 
+import numpy as np
 import pytest
 import pandas as pd
 import trackintel as ti
@@ -138,6 +139,30 @@ class TestTemporal_tracking_quality:
         assert quality_manual == quality.loc[(quality["user_id"] == 0) & (quality["hour"] == 2), "quality"].values[0]
         assert (quality["quality"] <= 1).all()
 
+    def test_tracking_quality_multiple_granularities(self, testdata_stps_tpls_geolife_long):
+        """Test if passing a list of granularities returns the same result as the individual calls."""
+        stps_tpls = testdata_stps_tpls_geolife_long
+        granularities = ["hour", "all", "weekday", "day", "week"]
+
+        quality = ti.analysis.tracking_quality.temporal_tracking_quality(stps_tpls, granularity=granularities)
+
+        assert list(quality.keys()) == granularities
+        for granularity in granularities:
+            quality_single = ti.analysis.tracking_quality.temporal_tracking_quality(stps_tpls, granularity=granularity)
+            pd.testing.assert_frame_equal(quality[granularity], quality_single)
+
+    def test_tracking_quality_overlapping_records(self, testdata_stps_tpls_geolife_long):
+        """Test if overlapping records are not counted twice."""
+        stps_tpls = testdata_stps_tpls_geolife_long
+        duplicated = pd.concat([stps_tpls, stps_tpls], ignore_index=True)
+
+        for granularity in ["all", "day", "week", "weekday", "hour"]:
+            quality = ti.analysis.tracking_quality.temporal_tracking_quality(stps_tpls, granularity=granularity)
+            quality_duplicated = ti.analysis.tracking_quality.temporal_tracking_quality(
+                duplicated, granularity=granularity
+            )
+            pd.testing.assert_frame_equal(quality, quality_duplicated)
+
     def test_tracking_quality_error(self, testdata_stps_tpls_geolife_long):
         """Test if the an error is raised when passing unknown 'granularity' to temporal_tracking_quality()."""
         stps_tpls = testdata_stps_tpls_geolife_long
@@ -146,6 +171,8 @@ class TestTemporal_tracking_quality:
             ti.analysis.tracking_quality.temporal_tracking_quality(stps_tpls, granularity=12345)
         with pytest.raises(AttributeError):
             ti.analysis.tracking_quality.temporal_tracking_quality(stps_tpls, granularity="random")
+        with pytest.raises(AttributeError):
+            ti.analysis.tracking_quality.temporal_tracking_quality(stps_tpls, granularity=["day", "random"])
 
     def test_tracking_quality_wrong_datamodel(self, testdata_stps_tpls_geolife_long):
         """Test if the a keyerror is raised when passing incorrect datamodels."""
@@ -163,15 +190,21 @@ class TestTemporal_tracking_quality:
         with pytest.raises(KeyError):
             ti.analysis.tracking_quality.temporal_tracking_quality(locs)
 
-    def test_tracking_quality_user_error(self, testdata_stps_tpls_geolife_long):
-        """Test if the an error is raised when passing unknown 'granularity' to _get_tracking_quality_user()."""
-        stps_tpls = testdata_stps_tpls_geolife_long
-        user_0 = stps_tpls.loc[stps_tpls["user_id"] == 0]
-
-        with pytest.raises(AttributeError):
-            ti.analysis.tracking_quality._get_tracking_quality_user(user_0, granularity=12345)
-        with pytest.raises(AttributeError):
-            ti.analysis.tracking_quality._get_tracking_quality_user(user_0, granularity="random")
+    def test_tracking_quality_dst(self):
+        """Test if records crossing a DST switch are counted with their elapsed time."""
+        tz = "Europe/Zurich"
+        # spring forward: 01:00 - 04:00 local time are 2 hours, fall back: 01:00 - 04:00 local time are 4 hours
+        for day, hours in [("2021-03-28", 2), ("2021-10-31", 4)]:
+            records = pd.DataFrame(
+                {
+                    "user_id": [0],
+                    "started_at": [pd.Timestamp(f"{day} 01:00", tz=tz)],
+                    "finished_at": [pd.Timestamp(f"{day} 04:00", tz=tz)],
+                }
+            )
+            quality = ti.analysis.tracking_quality.temporal_tracking_quality(records, granularity=["day", "hour"])
+            assert quality["day"]["quality"].tolist() == pytest.approx([hours / 24])
+            assert quality["hour"]["quality"].sum() == pytest.approx(hours)
 
     def test_staypoints_accessors(self, testdata_all_geolife_long):
         """Test tracking_quality calculation from staypoints accessor."""
@@ -201,6 +234,72 @@ class TestTemporal_tracking_quality:
         pd.testing.assert_frame_equal(trips_quality_accessor, trips_quality_method)
 
 
+class TestTrackingQualityAggregator:
+    """Tests for the TrackingQualityAggregator class."""
+
+    def test_aggregator_equals_batch(self, testdata_stps_tpls_geolife_long):
+        """Test if updating with chunks of (overlapping) records equals the batch calculation."""
+        stps_tpls = testdata_stps_tpls_geolife_long
+        # shuffled records with overlaps between the chunks
+        source = pd.concat([stps_tpls, stps_tpls.iloc[::3]]).sample(frac=1, random_state=0)
+        chunks = np.array_split(source, 5)
+        granularities = ["all", "day", "week", "weekday", "hour"]
+
+        aggregator = ti.analysis.TrackingQualityAggregator()
+        for chunk in chunks:
+            aggregator.update(chunk)
+        quality = aggregator.quality(granularity=granularities)
+
+        quality_batch = ti.analysis.tracking_quality.temporal_tracking_quality(pd.concat(chunks), granularities)
+        for granularity in granularities:
+            pd.testing.assert_frame_equal(quality[granularity], quality_batch[granularity])
+
+    def test_aggregator_dst(self):
+        """Test if the aggregator equals the batch calculation for records crossing DST switches."""
+        tz = "Europe/Zurich"
+        started_at = pd.to_datetime(["2021-03-28 00:30", "2021-03-28 01:45", "2021-10-31 01:00", "2021-10-31 02:30"])
+        finished_at = pd.to_datetime(["2021-03-28 02:00", "2021-03-28 04:00", "2021-10-31 03:00", "2021-10-31 05:00"])
+        records = pd.DataFrame(
+            {
+                "user_id": [0, 0, 0, 1],
+                "started_at": started_at.tz_localize(tz, ambiguous=True, nonexistent="shift_forward"),
+                "finished_at": finished_at.tz_localize(tz, ambiguous=True, nonexistent="shift_forward"),
+            }
+        )
+        granularities = ["all", "day", "hour"]
+
+        aggregator = ti.analysis.TrackingQualityAggregator()
+        for i in range(len(records)):
+            aggregator.update(records.iloc[[i]])
+        quality = aggregator.quality(granularity=granularities)
+
+        quality_batch = ti.analysis.tracking_quality.temporal_tracking_quality(records, granularities)
+        for granularity in granularities:
+            pd.testing.assert_frame_equal(quality[granularity], quality_batch[granularity])
+        # 01:00 - 03:00 local time on 2021-10-31 are 3 hours elapsed
+        day = quality["day"]
+        assert day.loc[day["user_id"] == 0, "quality"].max() == pytest.approx(3 / 24)
+
+    def test_aggregator_single_granularity(self, testdata_stps_tpls_geolife_long):
+        """Test if a single granularity returns a DataFrame."""
+        stps_tpls = testdata_stps_tpls_geolife_long
+        aggregator = ti.analysis.TrackingQualityAggregator().update(stps_tpls)
+
+        quality = aggregator.quality(granularity="day")
+        quality_batch = ti.analysis.tracking_quality.temporal_tracking_quality(stps_tpls, granularity="day")
+        pd.testing.assert_frame_equal(quality, quality_batch)
+
+    def test_aggregator_error(self, testdata_stps_tpls_geolife_long):
+        """Test if errors are raised for unknown granularities and missing columns."""
+        stps_tpls = testdata_stps_tpls_geolife_long
+        aggregator = ti.analysis.TrackingQualityAggregator().update(stps_tpls)
+
+        with pytest.raises(AttributeError):
+            aggregator.quality(granularity="random")
+        with pytest.raises(KeyError):
+            aggregator.update(stps_tpls.drop(columns="finished_at"))
+
+
 class TestSplit_overlaps:
     """Tests for the _split_overlaps() function."""
 
@@ -276,3 +375,71 @@ class TestSplit_overlaps:
         # test "duration" is recalculated after the split
         assert splitted_day["duration"].sum() == stps_tpls["duration"].sum()
         assert splitted_hour["duration"].sum() == stps_tpls["duration"].sum()
+
+    def test_split_overlaps_multiple_weeks(self):
+        """Test if a record spanning several weeks is split into one record per day and hour."""
+        t_start = pd.Timestamp("2021-01-01 12:30:00", tz="utc")
+        t_end = pd.Timestamp("2021-01-22 06:15:00", tz="utc")
+        df = pd.DataFrame({"user_id": [0], "started_at": [t_start], "finished_at": [t_end]})
+
+        splitted_day = ti.analysis.tracking_quality._split_overlaps(df, granularity="day")
+        splitted_hour = ti.analysis.tracking_quality._split_overlaps(df, granularity="hour")
+
+        assert len(splitted_day) == 22
+        assert len(splitted_hour) == (t_end - t_start.floor("h")) // pd.Timedelta("1h") + 1
+        for splitted in [splitted_day, splitted_hour]:
+            # parts are contiguous and cover the original record
+            assert splitted["started_at"].iloc[0] == t_start
+            assert splitted["finished_at"].iloc[-1] == t_end
+            assert (splitted["started_at"].iloc[1:].values == splitted["finished_at"].iloc[:-1].values).all()
+        assert (splitted_day["started_at"].iloc[1:].dt.hour == 0).all()
+        assert (splitted_hour["started_at"].iloc[1:].dt.minute == 0).all()
+
+    def test_split_overlaps_error(self, testdata_stps_tpls_geolife_long):
+        """Test if an error is raised when passing unknown 'granularity' to _split_overlaps()."""
+        stps_tpls = testdata_stps_tpls_geolife_long
+
+        with pytest.raises(AttributeError):
+            ti.analysis.tracking_quality._split_overlaps(stps_tpls, granularity="week")
+
+
+class TestGet_covered_intervals:
+    """Tests for the _get_covered_intervals() function."""
+
+    def test_covered_intervals(self):
+        """Test if overlapping and nested records are merged per user."""
+        t = pd.Timestamp("2021-01-01 00:00:00", tz="Europe/Zurich")
+        h = pd.Timedelta("1h")
+        df = pd.DataFrame(
+            {
+                "user_id": [1, 0, 0, 0, 1, 0],
+                "started_at": [t, t + 5 * h, t, t + h, t + h, t + 8 * h],
+                "finished_at": [t + 2 * h, t + 6 * h, t + 2 * h, t + 3 * h, t + 4 * h, t + 9 * h],
+            }
+        )
+        covered = ti.analysis.tracking_quality._get_covered_intervals(df)
+
+        expected = pd.DataFrame(
+            {
+                "user_id": [1, 0, 0, 0],
+                "started_at": [t, t, t + 5 * h, t + 8 * h],
+                "finished_at": [t + 4 * h, t + 3 * h, t + 6 * h, t + 9 * h],
+            }
+        )
+        pd.testing.assert_frame_equal(covered, expected)
+
+    def test_covered_intervals_nested(self):
+        """Test if a long record covering later records determines the end of the interval."""
+        t = pd.Timestamp("2021-01-01 00:00:00", tz="utc")
+        h = pd.Timedelta("1h")
+        df = pd.DataFrame(
+            {
+                "user_id": [0, 0, 0],
+                "started_at": [t, t + h, t + 2 * h],
+                "finished_at": [t + 10 * h, t + 2 * h, t + 3 * h],
+            }
+        )
+        covered = ti.analysis.tracking_quality._get_covered_intervals(df)
+
+        assert len(covered) == 1
+        assert covered.loc[0, "finished_at"] == t + 10 * h
@@ -1,3 +1,4 @@
+import gc
 import os
 from math import radians
 
@@ -5,17 +6,22 @@ import geopandas as gpd
 import numpy as np
 import pytest
 from shapely import wkt
-from shapely.geometry import LineString, MultiLineString
+from shapely.geometry import LineString, MultiLineString, Point
 from sklearn.metrics import pairwise_distances
-from geopandas.testing import assert_geodataframe_equal
+from geopandas.testing import assert_geodataframe_equal, assert_geoseries_equal
 
 import trackintel as ti
 from trackintel.geogr.distances import (
     check_gdf_crs,
+    clear_reprojection_cache,
+    set_reprojection_cache,
     meters_to_decimal_degrees,
     calculate_distance_matrix,
     calculate_haversine_length,
     _calculate_haversine_length_single,
+    get_metric_crs,
+    to_metric_crs,
+    split_to_metric_crs,
 )
 
 
@@ -192,6 +198,106 @@ class TestCheck_gdf_crs:
             check_gdf_crs(pfs)
 
 
+class TestReprojection_cache:
+    """Tests for the caching of reprojections in check_gdf_crs()."""
+
+    @pytest.fixture(autouse=True)
+    def reset_cache(self):
+        """Start every test with an empty cache and the default settings."""
+        clear_reprojection_cache()
+        yield
+        set_reprojection_cache()
+        clear_reprojection_cache()
+
+    @pytest.fixture
+    def pfs_2056(self):
+        file = os.path.join("tests", "data", "positionfixes.csv")
+        pfs = ti.read_positionfixes_csv(file, sep=";", crs="EPSG:4326", index_col=None)
+        return pfs.to_crs("EPSG:2056")
+
+    def test_cache_hit(self, pfs_2056, monkeypatch):
+        """Check if a repeated reprojection is served from the cache."""
+        _, pfs_first = check_gdf_crs(pfs_2056, transform=True)
+        # any further reprojection would fail
+        monkeypatch.setattr(gpd.GeoDataFrame, "to_crs", None)
+        monkeypatch.setattr(gpd.GeoSeries, "to_crs", None)
+        _, pfs_second = check_gdf_crs(pfs_2056, transform=True)
+
+        assert_geodataframe_equal(pfs_first, pfs_second)
+        # a copy is returned
+        assert pfs_first is not pfs_second
+
+    def test_geometry_change(self, pfs_2056):
+        """Check if geometries that change the fingerprint (number and total bounds) are reprojected again."""
+        _, pfs_first = check_gdf_crs(pfs_2056, transform=True)
+        x, y = pfs_2056.total_bounds[2:] + 1000
+        pfs_2056.loc[pfs_2056.index[0], pfs_2056.geometry.name] = Point(x, y)
+        _, pfs_second = check_gdf_crs(pfs_2056, transform=True)
+
+        assert not pfs_first.geometry.iloc[0].equals(pfs_second.geometry.iloc[0])
+        assert_geodataframe_equal(pfs_second, pfs_2056.to_crs("EPSG:4326"))
+
+    def test_clear_cache(self, pfs_2056):
+        """Check if geometry changes within the total bounds are reprojected after clearing the cache."""
+        check_gdf_crs(pfs_2056, transform=True)
+        pfs_2056.loc[pfs_2056.index[0], pfs_2056.geometry.name] = pfs_2056.geometry.iloc[1]
+        clear_reprojection_cache()
+        _, pfs_second = check_gdf_crs(pfs_2056, transform=True)
+        assert pfs_second.geometry.iloc[0].equals(pfs_second.geometry.iloc[1])
+
+    def test_attribute_change(self, pfs_2056):
+        """Check if changed attribute columns are returned with the cached geometries."""
+        _, pfs_first = check_gdf_crs(pfs_2056, transform=True)
+        pfs_2056["user_id"] = pfs_2056["user_id"] + 1
+        pfs_2056["new"] = 1
+        _, pfs_second = check_gdf_crs(pfs_2056, transform=True)
+
+        assert (pfs_second["user_id"] == pfs_first["user_id"] + 1).all()
+        assert (pfs_second["new"] == 1).all()
+        assert_geoseries_equal(pfs_first.geometry, pfs_second.geometry)
+        assert pfs_second.crs == "EPSG:4326"
+
+    def test_lru_eviction(self, pfs_2056):
+        """Check if the least recently used reprojection is evicted."""
+        from trackintel.geogr.distances import _reprojection_cache
+
+        set_reprojection_cache(max_entries=2)
+        frames = [pfs_2056.copy() for _ in range(3)]
+        for frame in frames:
+            check_gdf_crs(frame, transform=True)
+
+        assert len(_reprojection_cache) == 2
+        assert [entry[0]() for entry in _reprojection_cache.values()] == frames[1:]
+
+    def test_memory_cap(self, pfs_2056):
+        """Check if results larger than the memory cap are not cached."""
+        from trackintel.geogr.distances import _reprojection_cache
+
+        set_reprojection_cache(max_memory=1)
+        check_gdf_crs(pfs_2056, transform=True)
+
+        assert len(_reprojection_cache) == 0
+
+    def test_memory_coordinates(self, pfs_2056):
+        """Check if the memory estimate grows with the number of coordinates."""
+        from trackintel.geogr.distances import _geometry_memory
+
+        line_short = gpd.GeoSeries([LineString([(0, 0), (1, 1)])]).values
+        line_long = gpd.GeoSeries([LineString([(i, i) for i in range(1000)])]).values
+        assert _geometry_memory(line_long) - _geometry_memory(line_short) >= 998 * 16
+
+    def test_garbage_collected_frame(self, pfs_2056):
+        """Check if the entry is removed when the input frame is deleted."""
+        from trackintel.geogr.distances import _reprojection_cache
+
+        pfs = pfs_2056.copy()
+        check_gdf_crs(pfs, transform=True)
+        assert len(_reprojection_cache) == 1
+        del pfs
+        gc.collect()
+        assert len(_reprojection_cache) == 0
+
+
 class TestMetersToDecimalDegrees:
     """Tests for the meters_to_decimal_degrees() function."""
 
@@ -219,6 +325,103 @@ class Testcalc_haversine_length:
         assert length[0] < length[1]
 
 
+class TestGet_metric_crs:
+    """Tests for the get_metric_crs() function."""
+
+    def test_utm_zone(self, gdf_lineStrings):
+        """Check if the UTM zone containing the center of the data is chosen."""
+        assert get_metric_crs(gdf_lineStrings) == "EPSG:32632"
+
+    def test_southern_hemisphere(self):
+        """Check if the southern UTM zone is chosen for data south of the equator."""
+        gdf = gpd.GeoDataFrame(geometry=[LineString([(151.2, -33.8), (151.3, -33.9)])], crs="EPSG:4326")
+        assert get_metric_crs(gdf) == "EPSG:32756"
+
+    def test_projected_input(self, gdf_lineStrings):
+        """Check if the crs is independent of the crs of the input."""
+        crs = get_metric_crs(gdf_lineStrings)
+        assert get_metric_crs(gdf_lineStrings.to_crs("EPSG:3857")) is crs
+
+    def test_laea(self, gdf_lineStrings):
+        """Check if the azimuthal projection is centered on the data."""
+        crs = get_metric_crs(gdf_lineStrings, method="laea")
+        assert crs.is_projected
+        assert get_metric_crs(gdf_lineStrings, method="laea") is crs
+
+    def test_large_extent_warning(self):
+        """Check if a warning is raised for data spanning several UTM zones."""
+        gdf = gpd.GeoDataFrame(geometry=[LineString([(0, 47), (30, 47)])], crs="EPSG:4326")
+        with pytest.warns(UserWarning):
+            get_metric_crs(gdf)
+
+    def test_method_error(self, gdf_lineStrings):
+        """Check if an error is raised for unknown methods."""
+        with pytest.raises(AttributeError):
+            get_metric_crs(gdf_lineStrings, method="random")
+
+
+class TestTo_metric_crs:
+    """Tests for the to_metric_crs() function."""
+
+    def test_length(self, geolife_tpls):
+        """Check if planar lengths in the metric crs agree with the haversine length."""
+        tpls = geolife_tpls.set_crs("EPSG:4326")
+        tpls_metric = to_metric_crs(tpls)
+
+        assert tpls_metric.crs == "EPSG:32650"
+        assert np.allclose(tpls_metric.length, calculate_haversine_length(tpls), rtol=0.005)
+
+    def test_input_unchanged(self, geolife_tpls):
+        """Check if the input is not changed."""
+        tpls = geolife_tpls.set_crs("EPSG:4326")
+        tpls_copy = tpls.copy()
+        to_metric_crs(tpls)
+        assert_geodataframe_equal(tpls, tpls_copy)
+
+    def test_crs_warning(self, geolife_tpls):
+        """Check if a single warning is raised for data without crs."""
+        with pytest.warns(UserWarning, match="WGS84 is assumed") as record:
+            to_metric_crs(geolife_tpls)
+        assert len([w for w in record if "WGS84 is assumed" in str(w.message)]) == 1
+
+    def test_cache(self, geolife_tpls, monkeypatch):
+        """Check if a repeated projection of the same frame is served from the cache."""
+        clear_reprojection_cache()
+        tpls = geolife_tpls.set_crs("EPSG:4326")
+        tpls_first = to_metric_crs(tpls)
+        monkeypatch.setattr(gpd.GeoSeries, "to_crs", None)
+        tpls_second = to_metric_crs(tpls)
+        assert_geodataframe_equal(tpls_first, tpls_second)
+        clear_reprojection_cache()
+
+
+class TestSplit_to_metric_crs:
+    """Tests for the split_to_metric_crs() function."""
+
+    def test_users_in_different_zones(self, gdf_lineStrings):
+        """Check if users in different UTM zones are projected separately."""
+        ls_sydney = LineString([(151.2, -33.8), (151.3, -33.9)])
+        geoms = list(gdf_lineStrings.geometry) + [ls_sydney]
+        gdf = gpd.GeoDataFrame({"user_id": [0, 0, 1]}, geometry=geoms, crs="EPSG:4326")
+
+        parts = split_to_metric_crs(gdf, by="user_id")
+
+        assert len(parts) == 2
+        assert parts[get_metric_crs(gdf.loc[[0, 1]])].index.tolist() == [0, 1]
+        assert parts[get_metric_crs(gdf.loc[[2]])].index.tolist() == [2]
+
+    def test_users_in_same_zone(self, gdf_lineStrings):
+        """Check if users in the same UTM zone are projected together."""
+        ls_1 = LineString([(13.476808430, 48.573711823), (13.4664690, 48.5706414)])
+        ls_2 = LineString([(13.4664690, 48.5706414), (13.506804, 48.939008)])
+        gdf = gpd.GeoDataFrame({"user_id": [0, 1]}, geometry=[ls_1, ls_2], crs="EPSG:4326")
+
+        parts = split_to_metric_crs(gdf, by="user_id")
+
+        assert list(parts.keys()) == [get_metric_crs(gdf)]
+        assert_geodataframe_equal(parts[get_metric_crs(gdf)], to_metric_crs(gdf))
+
+
 class Test_calculate_haversine_length_single:
     """Tests for the _calculate_haversine_length_single() function."""
 
@@ -6,6 +6,7 @@ from sklearn.metrics.pairwise import haversine_distances
 
 import trackintel as ti
 from trackintel.geogr.distances import haversine_dist
+from trackintel.geogr.point_distances import haversine_dist_prepared, prepare_haversine_coords
 
 
 class TestHaversineDist:
@@ -71,3 +72,60 @@ class TestHaversineDist:
         d_ours = haversine_dist(bsas[1], bsas[0], paris[1], paris[0])
 
         assert np.abs(d_theirs[1][0] - d_ours) < 0.01
+
+    def test_short_distances(self):
+        """Test the numerical stability of the haversine distance for distances below 10 m."""
+        # 1e-6 degree latitude is ~0.11 m
+        lat_2 = 47.3 + np.arange(1, 90) * 1e-6
+        d = haversine_dist(8.5, 47.3, 8.5, lat_2)
+
+        expected = np.radians(lat_2 - 47.3) * 6371000
+        assert np.allclose(d, expected, rtol=1e-6)
+
+    def test_identical_points(self):
+        """Test that the distance between identical points is exactly zero."""
+        d = haversine_dist([8.5, -120.1], [47.3, -21.4], [8.5, -120.1], [47.3, -21.4])
+        assert (d == 0).all()
+
+    def test_out(self):
+        """Test that the result is written to the 'out' array."""
+        out = np.empty(3)
+        d = haversine_dist([8.5, 8.5, 8.5], [47.3, 47.3, 47.3], 8.7, 47.2, out=out)
+
+        assert d is out
+        assert np.allclose(out, 18749.056, atol=0.1)
+
+    def test_float32(self):
+        """Test that the calculation can be done in float32."""
+        d = haversine_dist(np.array([8.5, 0.0]), np.array([47.3, 4.0]), np.array([8.7, 0.0]), np.array([47.2, 38.0]))
+        d_32 = haversine_dist(
+            np.array([8.5, 0.0]), np.array([47.3, 4.0]), np.array([8.7, 0.0]), np.array([47.2, 38.0]), dtype=np.float32
+        )
+
+        assert d_32.dtype == np.float32
+        assert np.allclose(d, d_32, rtol=1e-5)
+
+
+class TestHaversineDistPrepared:
+    def test_prepared_equals_haversine_dist(self):
+        """Test that distances from prepared coordinates agree with haversine_dist."""
+        stps_file = os.path.join("tests", "data", "geolife", "geolife_staypoints.csv")
+        stps = ti.read_staypoints_csv(stps_file, tz="utc", index_col="id")
+        x = stps.geometry.x.values
+        y = stps.geometry.y.values
+
+        anchor = prepare_haversine_coords(x[0], y[0])
+        others = prepare_haversine_coords(x, y)
+        d_prepared = haversine_dist_prepared(anchor, others)
+        d = haversine_dist(x[0], y[0], x, y)
+
+        assert np.allclose(d_prepared, d)
+
+    def test_prepare_haversine_coords(self):
+        """Test the precomputed radians and cosine of the latitude."""
+        lon_rad, lat_rad, cos_lat = prepare_haversine_coords([180, 90], [60, 0], dtype=np.float32)
+
+        assert np.allclose(lon_rad, [np.pi, np.pi / 2])
+        assert np.allclose(lat_rad, [np.pi / 3, 0])
+        assert np.allclose(cos_lat, [0.5, 1])
+        assert cos_lat.dtype == np.float32
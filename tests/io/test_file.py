@@ -2,8 +2,10 @@ import filecmp
 import os
 import pytest
 import pandas as pd
+import pytz
 
 import trackintel as ti
+from trackintel.io.file import _localize_timestamp
 
 
 class TestPositionfixes:
@@ -59,6 +61,49 @@ class TestPositionfixes:
 
         os.remove(tmp_file)
 
+    def test_set_dst_policy(self, tmp_path):
+        """Test if the policy for ambiguous and nonexistent wall times is passed to the localization."""
+        tmp_file = os.path.join(tmp_path, "positionfixes.csv")
+        df = pd.DataFrame(
+            {
+                "user_id": [0, 0],
+                "tracked_at": ["2021-03-28 02:30:00", "2021-10-31 02:30:00"],
+                "longitude": [8.5, 8.6],
+                "latitude": [47.3, 47.4],
+            }
+        )
+        df.to_csv(tmp_file, sep=";", index_label="id")
+
+        pfs = ti.read_positionfixes_csv(tmp_file, sep=";", index_col="id", tz="Europe/Zurich")
+        assert pfs["tracked_at"].astype(str).tolist() == ["2021-03-28 03:30:00+02:00", "2021-10-31 02:30:00+02:00"]
+
+        pfs = ti.read_positionfixes_csv(
+            tmp_file, sep=";", index_col="id", tz="Europe/Zurich", ambiguous=False, nonexistent="shift_backward"
+        )
+        assert pfs["tracked_at"].astype(str).tolist() == [
+            "2021-03-28 01:59:59.999999999+01:00",
+            "2021-10-31 02:30:00+01:00",
+        ]
+
+        with pytest.raises(pytz.NonExistentTimeError, match="2021-03-28 02:30:00"):
+            ti.read_positionfixes_csv(tmp_file, sep=";", index_col="id", tz="Europe/Zurich", nonexistent="raise")
+
+    def test_set_format(self):
+        """Test if an explicit datetime format gives the same result as the inferred one."""
+        file = os.path.join("tests", "data", "positionfixes.csv")
+        pfs = ti.read_positionfixes_csv(file, sep=";", index_col="id")
+        pfs_format = ti.read_positionfixes_csv(file, sep=";", index_col="id", format="%Y-%m-%dT%H:%M:%S%z")
+        assert pfs_format.equals(pfs)
+
+        # non-iso format
+        tmp_file = os.path.join("tests", "data", "positionfixes_test.csv")
+        df = pd.read_csv(file, sep=";", index_col="id")
+        df["tracked_at"] = pd.to_datetime(df["tracked_at"]).dt.strftime("%d.%m.%Y %H:%M:%S")
+        df.to_csv(tmp_file, sep=";")
+        pfs_format = ti.read_positionfixes_csv(tmp_file, sep=";", index_col="id", tz="utc", format="%d.%m.%Y %H:%M:%S")
+        os.remove(tmp_file)
+        assert pfs_format.equals(pfs)
+
     def test_set_index_warning(self):
         """Test if a warning is raised when not parsing the index_col argument."""
         file = os.path.join("tests", "data", "positionfixes.csv")
@@ -75,6 +120,52 @@ class TestPositionfixes:
         assert pfs.index.name is None
 
 
+class TestIter_positionfixes_csv:
+    """Test for 'iter_positionfixes_csv' function."""
+
+    @pytest.fixture
+    def geolife_csv(self, tmp_path):
+        """Positionfixes of two users stored sorted by user in a csv file."""
+        pfs, _ = ti.io.dataset_reader.read_geolife(os.path.join("tests", "data", "geolife_long"))
+        file = os.path.join(tmp_path, "positionfixes.csv")
+        pfs.as_positionfixes.to_csv(file, sep=";")
+        return file
+
+    def test_chunks(self, geolife_csv):
+        """Test if the chunks together equal the whole file."""
+        pfs = ti.read_positionfixes_csv(geolife_csv, sep=";", index_col="id")
+        chunks = list(ti.io.iter_positionfixes_csv(geolife_csv, sep=";", index_col="id", chunksize=1000))
+        assert [len(c) for c in chunks] == [1000, 1000, 1000, 1000, len(pfs) - 4000]
+        assert pd.concat(chunks).equals(pfs)
+
+    def test_complete_users(self, geolife_csv):
+        """Test if every chunk contains all positionfixes of its users."""
+        pfs = ti.read_positionfixes_csv(geolife_csv, sep=";", index_col="id")
+        chunks = list(
+            ti.io.iter_positionfixes_csv(geolife_csv, sep=";", index_col="id", chunksize=1000, complete_users=True)
+        )
+        assert len(chunks) == pfs["user_id"].nunique()
+        for chunk in chunks:
+            assert chunk["user_id"].nunique() == 1
+            assert chunk.equals(pfs[pfs["user_id"] == chunk["user_id"].iloc[0]])
+
+    def test_regroup(self):
+        """Test the regrouping for chunks with several users and chunks with a single user."""
+        users = [[0, 0], [0, 1, 2], [2, 2], [2], [3, 4]]
+        chunks = [pd.DataFrame({"user_id": u}) for u in users]
+        regrouped = ti.io.util._complete_user_chunks(iter(chunks))
+        assert [c["user_id"].tolist() for c in regrouped] == [[0, 0, 0, 1], [2, 2, 2, 2, 3], [4]]
+
+    def test_not_sorted(self, geolife_csv, tmp_path):
+        """Test if an error is raised if the users are not stored contiguously."""
+        df = pd.read_csv(geolife_csv, sep=";", index_col="id")
+        df = pd.concat([df.iloc[:100], df.iloc[-100:], df.iloc[100:-100]])
+        file = os.path.join(tmp_path, "unsorted.csv")
+        df.to_csv(file, sep=";")
+        with pytest.raises(ValueError):
+            list(ti.io.iter_positionfixes_csv(file, sep=";", index_col="id", chunksize=150, complete_users=True))
+
+
 class TestTriplegs:
     """Test for 'read_triplegs_csv' and 'write_triplegs_csv' functions."""
 
@@ -97,6 +188,22 @@ class TestTriplegs:
         assert filecmp.cmp(orig_file, tmp_file, shallow=False)
         os.remove(tmp_file)
 
+    def test_wkb(self):
+        """Test if triplegs are written and read without loss as hex encoded WKB."""
+        file = os.path.join("tests", "data", "triplegs.csv")
+        tmp_file = os.path.join("tests", "data", "triplegs_test.csv")
+        tpls = ti.read_triplegs_csv(file, sep=";", tz="utc", index_col="id")
+        tpls.as_triplegs.to_csv(tmp_file, sep=";", geom_format="wkb")
+        tpls_wkb = ti.read_triplegs_csv(tmp_file, sep=";", tz="utc", index_col="id", geom_format="wkb")
+        os.remove(tmp_file)
+        assert tpls_wkb.equals(tpls)
+
+    def test_unknown_geom_format(self):
+        """Test if an error is raised for an unknown geometry format."""
+        file = os.path.join("tests", "data", "triplegs.csv")
+        with pytest.raises(AttributeError):
+            ti.read_triplegs_csv(file, sep=";", tz="utc", index_col="id", geom_format="geojson")
+
     def test_set_crs(self):
         """Test setting the crs when reading."""
         file = os.path.join("tests", "data", "triplegs.csv")
@@ -227,6 +334,16 @@ class TestLocations:
         assert filecmp.cmp(orig_file, tmp_file, shallow=False)
         os.remove(tmp_file)
 
+    def test_wkb(self):
+        """Test if center and extent are written and read without loss as hex encoded WKB."""
+        file = os.path.join("tests", "data", "locations.csv")
+        tmp_file = os.path.join("tests", "data", "locations_test.csv")
+        locs = ti.read_locations_csv(file, sep=";", index_col="id")
+        locs.as_locations.to_csv(tmp_file, sep=";", geom_format="wkb")
+        locs_wkb = ti.read_locations_csv(tmp_file, sep=";", index_col="id", geom_format="wkb")
+        os.remove(tmp_file)
+        assert locs_wkb.equals(locs)
+
     def test_set_crs(self):
         """Test setting the crs when reading."""
         file = os.path.join("tests", "data", "locations.csv")
@@ -316,3 +433,40 @@ class TestTours:
     """Test for 'read_tours_csv' and 'write_tours_csv' functions."""
 
     pass
+
+
+class TestLocalize_timestamp:
+    """Test for '_localize_timestamp' function."""
+
+    def test_localize(self):
+        """Test if naive timestamps are localized to the given timezone."""
+        dt = pd.Series(pd.to_datetime(["2021-01-01 10:00", "2021-06-01 10:00"]))
+        localized = _localize_timestamp(dt, "Europe/Zurich", "tracked_at")
+        assert str(localized.dt.tz) == "Europe/Zurich"
+        assert (localized.dt.tz_localize(None) == dt).all()
+        assert localized.dt.tz_convert("utc").dt.hour.tolist() == [9, 8]
+
+    def test_utc_offset(self):
+        """Test if strings with utc offsets are converted instead of localized."""
+        dt = pd.Series(["2021-01-01T10:00:00Z", "2021-01-01T10:00:00+05:00"])
+        localized = _localize_timestamp(dt, "Europe/Zurich", "tracked_at")
+        assert localized.astype(str).tolist() == ["2021-01-01 11:00:00+01:00", "2021-01-01 06:00:00+01:00"]
+
+    def test_default_utc(self):
+        """Test if UTC is assumed with a warning if no timezone is given."""
+        dt = pd.Series(["2021-01-01 10:00"])
+        with pytest.warns(UserWarning):
+            localized = _localize_timestamp(dt, None, "tracked_at")
+        assert localized.iloc[0] == pd.Timestamp("2021-01-01 10:00", tz="utc")
+
+    def test_dst(self):
+        """Test the policy for ambiguous and nonexistent times around daylight saving time switches."""
+        dt = pd.Series(pd.to_datetime(["2021-10-31 02:30", "2021-03-28 02:30"]))
+        localized = _localize_timestamp(dt, "Europe/Zurich", "tracked_at")
+        # ambiguous times are interpreted as daylight saving time, nonexistent times shifted by one hour
+        assert localized.astype(str).tolist() == ["2021-10-31 02:30:00+02:00", "2021-03-28 03:30:00+02:00"]
+
+        localized = _localize_timestamp(dt, "Europe/Zurich", "tracked_at", ambiguous="NaT", nonexistent="NaT")
+        assert localized.isna().all()
+        with pytest.raises(pytz.AmbiguousTimeError, match="Cannot infer dst time from 2021-10-31 02:30:00"):
+            _localize_timestamp(dt, "Europe/Zurich", "tracked_at", ambiguous="raise")
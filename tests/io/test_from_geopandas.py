@@ -21,6 +21,18 @@ class TestFromGeopandas:
 
         pd.testing.assert_frame_equal(pfs_from_gpd, pfs_from_csv, check_exact=False)
 
+    def test_read_positionfixes_gpd_dst(self):
+        """Test if the policy for ambiguous wall times is passed to the localization."""
+        gdf = gpd.GeoDataFrame(
+            {"user_id": [0], "tracked_at": pd.to_datetime(["2021-10-31 02:30:00"])},
+            geometry=gpd.points_from_xy([8.5], [47.3]),
+            crs="EPSG:4326",
+        )
+        pfs = ti.io.from_geopandas.read_positionfixes_gpd(gdf, geom_col="geometry", tz="Europe/Zurich")
+        assert str(pfs["tracked_at"].iloc[0]) == "2021-10-31 02:30:00+02:00"
+        pfs = ti.io.from_geopandas.read_positionfixes_gpd(gdf, geom_col="geometry", tz="Europe/Zurich", ambiguous=False)
+        assert str(pfs["tracked_at"].iloc[0]) == "2021-10-31 02:30:00+01:00"
+
     def test_read_triplegs_gpd(self):
         """Test if the results of reading from gpd and csv agrees."""
         gdf = gpd.read_file(os.path.join("tests", "data", "triplegs.geojson"))
@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import pytz
+from geopandas.testing import assert_geodataframe_equal
+
+import trackintel as ti
+from trackintel.io.memmap import PositionfixesStore, write_positionfixes_store
+
+
+@pytest.fixture
+def geolife_pfs():
+    """Shuffled positionfixes of two users with a local timezone and crs."""
+    pfs, _ = ti.io.dataset_reader.read_geolife(os.path.join("tests", "data", "geolife_long"))
+    pfs = pfs.sample(frac=1, random_state=0)
+    pfs["tracked_at"] = pfs["tracked_at"].dt.tz_convert("Asia/Shanghai")
+    return pfs
+
+
+class TestPositionfixesStore:
+    """Test for 'write_positionfixes_store' and 'PositionfixesStore'."""
+
+    def test_to_positionfixes(self, geolife_pfs, tmp_path):
+        """Test if the materialized positionfixes equal the sorted input."""
+        path = os.path.join(tmp_path, "store")
+        write_positionfixes_store(geolife_pfs, path)
+        store = PositionfixesStore(path)
+
+        expected = geolife_pfs.sort_values(["user_id", "tracked_at"], kind="stable")[["user_id", "tracked_at", "geom"]]
+        assert len(store) == len(geolife_pfs)
+        assert store.users.tolist() == [0, 1]
+        assert_geodataframe_equal(store.to_positionfixes(), expected)
+        assert_geodataframe_equal(store.to_positionfixes(user_ids=[1]), expected[expected["user_id"] == 1])
+
+    def test_get_user(self, geolife_pfs, tmp_path):
+        """Test if the positionfixes of a user are memory mapped views sorted by time."""
+        path = os.path.join(tmp_path, "store")
+        write_positionfixes_store(geolife_pfs, path)
+        store = PositionfixesStore(path)
+
+        tracked_at, x, y = store.get_user(1)
+        assert isinstance(x, np.memmap)
+        assert np.shares_memory(x, store.x)
+
+        expected = geolife_pfs[geolife_pfs["user_id"] == 1].sort_values("tracked_at")
+        assert np.array_equal(x, expected.geometry.x)
+        assert np.array_equal(y, expected.geometry.y)
+        assert np.array_equal(tracked_at, expected["tracked_at"].dt.tz_convert(None).values)
+
+        with pytest.raises(KeyError):
+            store.get_user(5)
+
+    def test_string_ids(self, geolife_pfs, tmp_path):
+        """Test if string user ids and ids are supported."""
+        path = os.path.join(tmp_path, "store")
+        pfs = geolife_pfs.copy()
+        pfs["user_id"] = pfs["user_id"].map({0: "a", 1: "b"})
+        pfs.index = pd.Index("pfs_" + pfs.index.astype(str), name="id")
+        write_positionfixes_store(pfs, path)
+        store = PositionfixesStore(path)
+        result = store.to_positionfixes(["b"])
+        assert (result["user_id"] == "b").all()
+        assert result.index.isin(pfs.index).all()
+
+    def test_fixed_offset(self, geolife_pfs, tmp_path):
+        """Test if fixed offset timezones (e.g., from timestamps with '+01:00') round-trip."""
+        path = os.path.join(tmp_path, "store")
+        pfs = geolife_pfs.copy()
+        pfs["tracked_at"] = pfs["tracked_at"].dt.tz_convert(pytz.FixedOffset(60))
+        write_positionfixes_store(pfs, path)
+        result = PositionfixesStore(path).to_positionfixes()
+
+        assert result["tracked_at"].dt.tz == pytz.FixedOffset(60)
+        expected = pfs.sort_values(["user_id", "tracked_at"], kind="stable")[["user_id", "tracked_at", "geom"]]
+        assert_geodataframe_equal(result, expected)
+
+    def test_fixed_offset_csv(self, tmp_path):
+        """Test if positionfixes read from a csv with offsets in the timestamps round-trip."""
+        pfs_file = os.path.join("tests", "data", "positionfixes.csv")
+        pfs = ti.read_positionfixes_csv(pfs_file, sep=";", index_col="id")
+        pfs["tracked_at"] = pfs["tracked_at"].dt.tz_convert(pytz.FixedOffset(-150))
+        csv_file = os.path.join(tmp_path, "pfs.csv")
+        pfs.as_positionfixes.to_csv(csv_file, sep=";")
+        pfs = ti.read_positionfixes_csv(csv_file, sep=";", index_col="id")
+        assert pfs["tracked_at"].dt.tz == pytz.FixedOffset(-150)
+
+        path = os.path.join(tmp_path, "store")
+        write_positionfixes_store(pfs, path)
+        result = PositionfixesStore(path).to_positionfixes()
+        expected = pfs.sort_values(["user_id", "tracked_at"], kind="stable")
+        assert result.index.equals(expected.index)
+        pd.testing.assert_series_equal(result["tracked_at"], expected["tracked_at"])
+
+    def test_naive_timestamps(self, geolife_pfs, tmp_path):
+        """Test if naive timestamps are rejected with a ValueError before anything is written."""
+        path = os.path.join(tmp_path, "store")
+        pfs = geolife_pfs.copy()
+        pfs["tracked_at"] = pfs["tracked_at"].dt.tz_localize(None)
+        with pytest.raises(ValueError, match="timezone aware"):
+            write_positionfixes_store(pfs, path)
+        assert not os.path.exists(path)
+
+    def test_existing_store(self, geolife_pfs, tmp_path):
+        """Test if an existing store is not overwritten."""
+        path = os.path.join(tmp_path, "store")
+        write_positionfixes_store(geolife_pfs, path)
+        with pytest.raises(FileExistsError):
+            write_positionfixes_store(geolife_pfs, path)
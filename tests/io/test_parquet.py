@@ -0,0 +1,258 @@
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from geopandas.testing import assert_geodataframe_equal
+from shapely.geometry import MultiPoint
+
+import trackintel as ti
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def tmp_file(tmp_path):
+    """Path to a temporary parquet file."""
+    return os.path.join(tmp_path, "test.parquet")
+
+
+@pytest.fixture
+def example_positionfixes():
+    """Positionfixes with crs, a named index and nullable/categorical columns."""
+    file = os.path.join("tests", "data", "positionfixes.csv")
+    pfs = ti.read_positionfixes_csv(file, sep=";", index_col="id", crs="EPSG:4326")
+    pfs["tracked_at"] = pfs["tracked_at"].dt.tz_convert("Europe/Zurich")
+    pfs["staypoint_id"] = pd.array([pd.NA] + [1] * (len(pfs) - 1), dtype="Int64")
+    pfs["tracking_tech"] = pd.Categorical(["gps"] * len(pfs))
+    return pfs
+
+
+class TestPositionfixes:
+    """Test for 'read_positionfixes_parquet' and 'write_positionfixes_parquet' functions."""
+
+    def test_from_to_parquet(self, example_positionfixes, tmp_file):
+        """Test if crs, index, timezones and dtypes survive a round trip."""
+        pfs = example_positionfixes
+        pfs.as_positionfixes.to_parquet(tmp_file)
+        pfs_read = ti.read_positionfixes_parquet(tmp_file)
+        assert_geodataframe_equal(pfs_read, pfs)
+        assert pfs_read.crs == pfs.crs
+        assert pfs_read.index.name == "id"
+        assert str(pfs_read["tracked_at"].dt.tz) == "Europe/Zurich"
+
+    def test_columns(self, example_positionfixes, tmp_file):
+        """Test if only the selected and the required columns are read."""
+        pfs = example_positionfixes
+        ti.io.write_positionfixes_parquet(pfs, tmp_file)
+        pfs_read = ti.read_positionfixes_parquet(tmp_file, columns=["accuracy"])
+        assert set(pfs_read.columns) == {"accuracy", "user_id", "tracked_at", "geom"}
+        assert_geodataframe_equal(pfs_read, pfs[pfs_read.columns])
+
+
+class TestTriplegs:
+    """Test for 'read_triplegs_parquet' and 'write_triplegs_parquet' functions."""
+
+    def test_from_to_parquet(self, tmp_file):
+        """Test basic reading and writing functions."""
+        file = os.path.join("tests", "data", "triplegs.csv")
+        tpls = ti.read_triplegs_csv(file, sep=";", tz="utc", index_col="id", crs="EPSG:4326")
+        tpls["mode"] = pd.Categorical(["car", "walk"] * (len(tpls) // 2) + ["car"] * (len(tpls) % 2))
+        tpls.as_triplegs.to_parquet(tmp_file)
+        assert_geodataframe_equal(ti.read_triplegs_parquet(tmp_file), tpls)
+
+
+class TestStaypoints:
+    """Test for 'read_staypoints_parquet' and 'write_staypoints_parquet' functions."""
+
+    def test_from_to_parquet(self, tmp_file):
+        """Test basic reading and writing functions."""
+        file = os.path.join("tests", "data", "staypoints.csv")
+        stps = ti.read_staypoints_csv(file, sep=";", tz="utc", index_col="id", crs="EPSG:4326")
+        stps.as_staypoints.to_parquet(tmp_file)
+        assert_geodataframe_equal(ti.read_staypoints_parquet(tmp_file), stps)
+
+
+class TestLocations:
+    """Test for 'read_locations_parquet' and 'write_locations_parquet' functions."""
+
+    def test_from_to_parquet(self, tmp_file):
+        """Test if center and extent are both restored as geometries."""
+        file = os.path.join("tests", "data", "locations.csv")
+        locs = ti.read_locations_csv(file, sep=";", index_col="id", crs="EPSG:4326")
+        locs["extent"] = gpd.GeoSeries(locs["extent"], crs="EPSG:4326")
+        locs.as_locations.to_parquet(tmp_file)
+        locs_read = ti.read_locations_parquet(tmp_file)
+        assert_geodataframe_equal(locs_read, locs)
+        assert isinstance(locs_read["extent"], gpd.GeoSeries)
+
+
+class TestTrips:
+    """Test for 'read_trips_parquet' and 'write_trips_parquet' functions."""
+
+    def test_from_to_parquet(self, tmp_file):
+        """Test trips without geometry."""
+        file = os.path.join("tests", "data", "trips.csv")
+        trips = ti.read_trips_csv(file, sep=";", tz="utc", index_col="id")
+        trips.as_trips.to_parquet(tmp_file)
+        trips_read = ti.read_trips_parquet(tmp_file)
+        assert not isinstance(trips_read, gpd.GeoDataFrame)
+        pd.testing.assert_frame_equal(trips_read, trips)
+
+    def test_geometry(self, tmp_file):
+        """Test trips with geometry."""
+        file = os.path.join("tests", "data", "trips.csv")
+        trips = ti.read_trips_csv(file, sep=";", tz="utc", index_col="id")
+        geom = [MultiPoint([(0, 0), (1, 1)])] * len(trips)
+        trips = gpd.GeoDataFrame(trips, geometry=gpd.GeoSeries(geom, index=trips.index), crs="EPSG:2056")
+        trips.as_trips.to_parquet(tmp_file)
+        trips_read = ti.read_trips_parquet(tmp_file, columns=[])
+        assert isinstance(trips_read, gpd.GeoDataFrame)
+        assert isinstance(trips_read.geometry.iloc[0], MultiPoint)
+        assert_geodataframe_equal(trips_read, trips[trips_read.columns])
+
+
+class TestTours:
+    """Test for 'read_tours_parquet' and 'write_tours_parquet' functions."""
+
+    def test_from_to_parquet(self, tmp_file):
+        """Test basic reading and writing functions."""
+        tours = pd.DataFrame(
+            {
+                "user_id": [0, 1],
+                "started_at": pd.to_datetime(["2021-01-01 08:00", "2021-01-02 08:00"], utc=True),
+                "finished_at": pd.to_datetime(["2021-01-01 18:00", "2021-01-02 18:00"], utc=True),
+                "origin_destination_location_id": pd.array([1, pd.NA], dtype="Int64"),
+                "journey": [True, False],
+            },
+            index=pd.Index([5, 6], name="tour_id"),
+        )
+        tours.as_tours.to_parquet(tmp_file)
+        pd.testing.assert_frame_equal(ti.read_tours_parquet(tmp_file), tours)
+
+
+@pytest.fixture
+def geolife_pfs():
+    """Positionfixes of two users over two days."""
+    pfs, _ = ti.io.dataset_reader.read_geolife(os.path.join("tests", "data", "geolife_long"))
+    return pfs
+
+
+class TestParquet_dataset:
+    """Test for 'write_parquet_dataset', 'read_parquet_dataset' and 'iter_parquet_dataset' functions."""
+
+    def test_from_to_dataset(self, geolife_pfs, tmp_path):
+        """Test if the dataset is partitioned by user and date and can be read completely."""
+        path = os.path.join(tmp_path, "pfs")
+        ti.io.write_parquet_dataset(geolife_pfs, path, "positionfixes", n_buckets=4)
+
+        manifest = ti.io.parquet._read_dataset_manifest(path)
+        assert sum(p["n_rows"] for p in manifest["partitions"]) == len(geolife_pfs)
+        for p in manifest["partitions"]:
+            part = ti.read_positionfixes_parquet(os.path.join(path, *p["path"].split("/")))
+            assert p["path"].endswith(f"date={part['tracked_at'].iloc[0]:%Y-%m-%d}/part.parquet")
+            assert (ti.io.parquet._user_bucket(part["user_id"], 4) == p["bucket"]).all()
+            assert pd.Timestamp(p["time_min"]) == part["tracked_at"].min()
+            assert p["bbox"] == part.total_bounds.tolist()
+
+        assert_geodataframe_equal(ti.read_parquet_dataset(path), geolife_pfs)
+
+    def test_filter(self, geolife_pfs, tmp_path):
+        """Test if filtering by user, time and bbox returns the same as filtering in memory."""
+        path = os.path.join(tmp_path, "pfs")
+        ti.io.write_parquet_dataset(geolife_pfs, path, "positionfixes", n_buckets=4)
+        pfs = geolife_pfs
+
+        result = ti.read_parquet_dataset(path, user_ids=[1])
+        assert_geodataframe_equal(result, pfs[pfs["user_id"] == 1])
+
+        start, end = "2008-10-23 05:00", pd.Timestamp("2008-10-23 10:00", tz="utc")
+        result = ti.read_parquet_dataset(path, start=start, end=end)
+        assert_geodataframe_equal(result, pfs[pfs["tracked_at"].between(pd.Timestamp(start, tz="utc"), end)])
+
+        bbox = (116.30, 39.97, 116.32, 40.00)
+        result = ti.read_parquet_dataset(path, bbox=bbox, columns=["elevation"])
+        expected = pfs.cx[bbox[0] : bbox[2], bbox[1] : bbox[3]]
+        assert_geodataframe_equal(result, expected[result.columns])
+
+        # nothing matches
+        result = ti.read_parquet_dataset(path, start="2020-01-01")
+        assert result.empty
+        assert list(result.columns) == list(pfs.columns)
+
+    def test_iter(self, geolife_pfs, tmp_path):
+        """Test if every chunk contains complete users."""
+        path = os.path.join(tmp_path, "pfs")
+        ti.io.write_parquet_dataset(geolife_pfs, path, "positionfixes", n_buckets=2)
+        chunks = list(ti.iter_parquet_dataset(path))
+        assert sum(len(c) for c in chunks) == len(geolife_pfs)
+        for chunk in chunks:
+            for user_id in chunk["user_id"].unique():
+                assert (chunk["user_id"] == user_id).sum() == (geolife_pfs["user_id"] == user_id).sum()
+
+    def test_interval_models(self, geolife_pfs, tmp_path):
+        """Test if records with a duration are found by overlap with the time window."""
+        pfs, sp = geolife_pfs.as_positionfixes.generate_staypoints(
+            method="sliding", dist_threshold=25, time_threshold=5
+        )
+        path = os.path.join(tmp_path, "sp")
+        ti.io.write_parquet_dataset(sp, path, "staypoints")
+        t = sp["started_at"].iloc[1] + (sp["finished_at"].iloc[1] - sp["started_at"].iloc[1]) / 2
+        result = ti.read_parquet_dataset(path, start=t, end=t)
+        assert_geodataframe_equal(result, sp[(sp["started_at"] <= t) & (sp["finished_at"] >= t)])
+
+    def test_user_id_dtypes(self, geolife_pfs, tmp_path):
+        """Test if users are found independent of the dtype of the ids in the dataset and in the query."""
+        pfs = geolife_pfs.copy()
+        pfs["user_id"] = pfs["user_id"].astype(float)
+        path = os.path.join(tmp_path, "pfs")
+        ti.io.write_parquet_dataset(pfs, path, "positionfixes", n_buckets=16)
+        for user_id in [0, 1]:
+            for query in [[user_id], [float(user_id)], np.array([user_id], dtype="int32")]:
+                result = ti.read_parquet_dataset(path, user_ids=query)
+                assert len(result) == (pfs["user_id"] == user_id).sum()
+
+    def test_naive_timestamps(self, tmp_path):
+        """Test if naive timestamps are partitioned as UTC."""
+        tours = pd.DataFrame(
+            {
+                "user_id": [0, 1],
+                "started_at": pd.to_datetime(["2021-01-01 08:00", "2021-01-02 08:00"]),
+                "finished_at": pd.to_datetime(["2021-01-01 18:00", "2021-01-02 18:00"]),
+                "origin_destination_location_id": [1, 2],
+                "journey": [True, False],
+            }
+        )
+        path = os.path.join(tmp_path, "tours")
+        ti.io.write_parquet_dataset(tours, path, "tours")
+        partitions = ti.io.parquet._read_dataset_manifest(path)["partitions"]
+        assert [p["path"].split("/")[1] for p in partitions] == ["date=2021-01-01", "date=2021-01-02"]
+        assert [p["time_min"] for p in partitions] == ["2021-01-01T08:00:00+00:00", "2021-01-02T08:00:00+00:00"]
+
+    def test_missing_start(self, geolife_pfs, tmp_path):
+        """Test if records without start time raise a ValueError instead of being dropped."""
+        pfs = geolife_pfs.copy()
+        pfs.loc[pfs.index[3], "tracked_at"] = pd.NaT
+        path = os.path.join(tmp_path, "pfs")
+        with pytest.raises(ValueError, match="1 records have a missing 'tracked_at'"):
+            ti.io.write_parquet_dataset(pfs, path, "positionfixes")
+        assert not os.path.exists(path)
+
+    def test_empty_dataset(self, geolife_pfs, tmp_path):
+        """Test if an empty dataset returns an empty frame."""
+        path = os.path.join(tmp_path, "pfs")
+        ti.io.write_parquet_dataset(geolife_pfs.iloc[:0], path, "positionfixes")
+        result = ti.read_parquet_dataset(path)
+        assert result.empty
+        assert list(result.columns) == ["user_id", "tracked_at"]
+        assert list(ti.iter_parquet_dataset(path)) == []
+
+    def test_errors(self, geolife_pfs, tmp_path):
+        """Test if unknown models and existing datasets raise an error."""
+        path = os.path.join(tmp_path, "pfs")
+        with pytest.raises(AttributeError):
+            ti.io.write_parquet_dataset(geolife_pfs, path, "tracks")
+        ti.io.write_parquet_dataset(geolife_pfs, path, "positionfixes")
+        with pytest.raises(FileExistsError):
+            ti.io.write_parquet_dataset(geolife_pfs, path, "positionfixes")
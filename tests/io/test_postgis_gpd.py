@@ -1,12 +1,15 @@
 """A copy of the geopandas postgis test to verify the continuous integration"""
 import datetime
 import os
+import re
+from unittest import mock
 
 import geopandas as gpd
 import pandas as pd
 import pytest
 from geopandas.testing import assert_geodataframe_equal
 from pandas.testing import assert_frame_equal
+from shapely import wkb
 from shapely.geometry import LineString, Point, Polygon
 import sqlalchemy
 import trackintel as ti
@@ -160,6 +163,17 @@ def example_trips():
     return trips
 
 
+@pytest.fixture
+def sqlite_engine(example_positionfixes):
+    """In-memory database with unordered positionfixes and hex-WKB geometries (readable without PostGIS)."""
+    df = pd.DataFrame(example_positionfixes.drop(columns="geom"))
+    df["geom"] = [g.wkb_hex for g in example_positionfixes.geometry]
+    df["tracked_at"] = df["tracked_at"].dt.strftime("%Y-%m-%d %H:%M:%S+00:00")
+    engine = sqlalchemy.create_engine("sqlite://")
+    df.iloc[::-1].to_sql("positionfixes", engine)
+    return engine
+
+
 def del_table(con, table):
     """Delete table in con."""
     try:
@@ -275,6 +289,141 @@ class TestPositionfixes:
         finally:
             del_table(conn, table)
 
+    def test_read_filter(self, example_positionfixes, sqlite_engine):
+        """Test if the user, time and column filters return the same as filtering in memory."""
+        pfs = example_positionfixes
+        sql = "SELECT * FROM positionfixes;"
+        pfs_db = ti.io.read_positionfixes_postgis(sql, sqlite_engine, user_ids=[0], index_col="id")
+        assert pfs_db.index.sort_values().tolist() == pfs[pfs["user_id"] == 0].index.tolist()
+
+        start, end = "1971-01-01 00:30", pd.Timestamp("1971-01-02 06:00", tz="utc")
+        pfs_db = ti.io.read_positionfixes_postgis(sql, sqlite_engine, start=start, end=end, index_col="id")
+        expected = pfs[pfs["tracked_at"].between(pd.Timestamp(start, tz="utc"), end)]
+        assert pfs_db.index.sort_values().tolist() == expected.index.tolist()
+
+        pfs_db = ti.io.read_positionfixes_postgis(sql, sqlite_engine, columns=[], index_col="id")
+        assert set(pfs_db.columns) == {"user_id", "tracked_at", "geom"}
+        assert pfs_db.index.name == "id"
+
+    def test_bbox_query(self, sqlite_engine):
+        """Test if the bbox filter intersects with an envelope in the srid of the crs without running the query."""
+        kwargs = {"crs": "EPSG:2056"}
+        query = ti.io.postgis._filter_query(
+            "SELECT * FROM positionfixes", sqlite_engine, kwargs, ["user_id"], geom_col="geom", bbox=(0, 1, 2, 3)
+        )
+        assert str(query).count("positionfixes") == 1
+        assert "ST_Intersects(geom, ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, :srid))" in str(query)
+        assert kwargs["params"] == {"srid": 2056, "minx": 0, "miny": 1, "maxx": 2, "maxy": 3}
+
+        with pytest.raises(ValueError, match="requires the crs"):
+            ti.io.postgis._filter_query(
+                "SELECT * FROM pfs", sqlite_engine, {}, ["user_id"], geom_col="geom", bbox=(0, 1, 2, 3)
+            )
+
+    def test_read_bbox(self, example_positionfixes, conn_postgis):
+        """Test if only the positionfixes within the bounding box are read."""
+        pfs = example_positionfixes.copy()
+        conn_string, conn = conn_postgis
+        table = "positionfixes"
+        sql = f"SELECT * FROM {table}"
+        try:
+            pfs.as_positionfixes.to_postgis(table, conn_string)
+            pfs_db = ti.io.read_positionfixes_postgis(
+                sql, conn_string, bbox=(8, 47.45, 9, 47.7), crs="EPSG:4326", index_col="id"
+            )
+            assert_geodataframe_equal(pfs_db, pfs.cx[8:9, 47.45:47.7])
+        finally:
+            del_table(conn, table)
+
+    def test_write_copy(self, example_positionfixes, conn_postgis):
+        """Test if positionfixes bulk loaded with COPY are the same when read back."""
+        pfs = example_positionfixes.copy()
+        conn_string, conn = conn_postgis
+        table = "positionfixes"
+        sql = f"SELECT * FROM {table}"
+        geom_col = pfs.geometry.name
+        try:
+            pfs.as_positionfixes.to_postgis(table, conn_string, method="copy", chunksize=2, deferred_index=True)
+            pfs_db = ti.io.read_positionfixes_postgis(sql, conn_string, geom_col)
+            pfs_db = pfs_db.set_index("id")
+            assert_geodataframe_equal(pfs, pfs_db)
+
+            cur = conn.cursor()
+            cur.execute(f"SELECT indexname FROM pg_indexes WHERE tablename = '{table}'")
+            assert {i[0] for i in cur.fetchall()} == {f"ix_{table}_id", f"idx_{table}_geom"}
+        finally:
+            del_table(conn, table)
+
+    def test_write_copy_append(self, example_positionfixes, conn_postgis):
+        """Test if COPY appends to an existing table."""
+        pfs = example_positionfixes.copy()
+        conn_string, conn = conn_postgis
+        table = "positionfixes"
+        sql = f"SELECT * FROM {table}"
+        try:
+            pfs.iloc[:1].as_positionfixes.to_postgis(table, conn_string, method="copy")
+            pfs.iloc[1:].as_positionfixes.to_postgis(table, conn_string, method="copy", if_exists="append")
+            pfs_db = ti.io.read_positionfixes_postgis(sql, conn_string, pfs.geometry.name)
+            assert_geodataframe_equal(pfs, pfs_db.set_index("id"))
+        finally:
+            del_table(conn, table)
+
+    def test_write_upsert(self, example_positionfixes, conn_postgis):
+        """Test if upserting updates the selected columns of existing rows and inserts new rows."""
+        pfs = example_positionfixes.copy()
+        pfs["staypoint_id"] = [1, 1, None]
+        conn_string, conn = conn_postgis
+        table = "positionfixes"
+        sql = f"SELECT * FROM {table}"
+        try:
+            pfs.iloc[:2].as_positionfixes.to_postgis(table, conn_string, if_exists="upsert")
+            changed = pfs.copy()
+            changed["staypoint_id"] = [2, 2, 3]
+            changed["user_id"] = [5, 5, 1]
+            changed.iloc[1:].as_positionfixes.to_postgis(
+                table, conn_string, if_exists="upsert", update_columns=["staypoint_id"]
+            )
+            pfs_db = ti.io.read_positionfixes_postgis(sql, conn_string, pfs.geometry.name, index_col="id").sort_index()
+
+            expected = pfs.copy()
+            expected["staypoint_id"] = [1.0, 2.0, 3.0]
+            assert_geodataframe_equal(expected, pfs_db)
+        finally:
+            del_table(conn, table)
+
+
+class TestIter_positionfixes_postgis:
+    def test_chunks(self, example_positionfixes, sqlite_engine):
+        """Test if the chunks are ordered by user and time and together equal the table."""
+        pfs = example_positionfixes
+        chunks = list(
+            ti.io.iter_positionfixes_postgis("SELECT * FROM positionfixes;", sqlite_engine, chunksize=2, index_col="id")
+        )
+        assert [len(c) for c in chunks] == [2, 1]
+        pfs_db = pd.concat(chunks)
+        assert pfs_db.index.tolist() == pfs.sort_values(["user_id", "tracked_at"]).index.tolist()
+        assert pfs_db.geometry.geom_equals(pfs.loc[pfs_db.index].geometry).all()
+
+    def test_complete_users(self, example_positionfixes, sqlite_engine):
+        """Test if every chunk contains all positionfixes of its users."""
+        chunks = ti.io.iter_positionfixes_postgis(
+            "SELECT * FROM positionfixes", sqlite_engine, chunksize=1, complete_users=True, index_col="id"
+        )
+        assert [c["user_id"].tolist() for c in chunks] == [[0, 0], [1]]
+
+    def test_postgis(self, example_positionfixes, conn_postgis):
+        """Test streaming from PostGIS."""
+        pfs = example_positionfixes.copy()
+        conn_string, conn = conn_postgis
+        table = "positionfixes"
+        try:
+            pfs.as_positionfixes.to_postgis(table, conn_string)
+            chunks = ti.io.iter_positionfixes_postgis(f"SELECT * FROM {table}", conn_string, chunksize=2)
+            pfs_db = pd.concat(list(chunks)).set_index("id")
+            assert_geodataframe_equal(pfs, pfs_db)
+        finally:
+            del_table(conn, table)
+
 
 class TestTriplegs:
     def test_write(self, example_triplegs, conn_postgis):
@@ -445,6 +594,21 @@ class TestLocations:
         finally:
             del_table(conn, table)
 
+    def test_write_copy_extent(self, example_locations, conn_postgis):
+        """Test if center and extent are both written as geometries with COPY."""
+        conn_string, conn = conn_postgis
+        table = "locations"
+        coords = [[8.45, 47.6], [8.45, 47.4], [8.55, 47.4], [8.55, 47.6], [8.45, 47.6]]
+        example_locations["extent"] = gpd.GeoSeries([Polygon(coords)] * len(example_locations))
+        try:
+            example_locations.as_locations.to_postgis(table, conn_string, method="copy")
+            _, dtypes = get_table_schema(conn, table)
+            srid = _get_srid(example_locations)
+            assert f"geometry(Point,{srid})" in dtypes
+            assert f"geometry(Polygon,{srid})" in dtypes
+        finally:
+            del_table(conn, table)
+
 
 class TestTrips:
     def test_write(self, example_trips, conn_postgis):
@@ -476,6 +640,116 @@ class TestTrips:
             del_table(conn, table)
 
 
+class TestWrite_postgis_copy:
+    @pytest.fixture
+    def mock_con(self, monkeypatch):
+        """Connection mock for a database without tables, the statements and COPY payloads are recorded."""
+        inspector = mock.Mock()
+        inspector.has_table.return_value = False
+        monkeypatch.setattr(ti.io.postgis, "inspect", mock.Mock(return_value=inspector))
+        monkeypatch.setattr(pd.DataFrame, "to_sql", mock.Mock())
+        return mock.MagicMock()
+
+    def test_copy_payload(self, example_positionfixes, mock_con):
+        """Test the COPY statement and the CSV rows with EWKB geometries, NULL for NaT and empty strings."""
+        pfs = example_positionfixes.copy()
+        pfs["duration"] = pd.to_timedelta([1, None, 3], unit="s")
+        pfs["name"] = ["", None, "a"]
+        pfs.as_positionfixes.to_postgis("positionfixes", mock_con, method="copy", chunksize=2)
+
+        cursor = mock_con.connection.cursor.return_value.__enter__.return_value
+        calls = cursor.copy_expert.call_args_list
+        columns = '"id", "user_id", "tracked_at", "geom", "duration", "name"'
+        copy_sql = f'COPY "public"."positionfixes" ({columns}) FROM STDIN WITH (FORMAT csv, NULL \'\\N\')'
+        assert [c.args[0] for c in calls] == [copy_sql] * 2
+        rows = [row.split(",") for c in calls for row in c.args[1].getvalue().splitlines()]
+        assert [row[:3] for row in rows] == [
+            ["0", "0", "1971-01-01 00:00:00+00:00"],
+            ["1", "0", "1971-01-01 05:00:00+00:00"],
+            ["2", "1", "1971-01-02 07:00:00+00:00"],
+        ]
+        assert [row[4] for row in rows] == ["1000000000", "\\N", "3000000000"]
+        # empty strings stay distinguishable from NULL
+        assert [row[5] for row in rows] == ["", "\\N", "a"]
+        for row, geom in zip(rows, pfs.geometry):
+            ewkb = bytes.fromhex(row[3])
+            # point type with SRID flag, followed by the SRID
+            assert int.from_bytes(ewkb[1:5], "little") == 0x20000001
+            assert int.from_bytes(ewkb[5:9], "little") == 4326
+            assert wkb.loads(ewkb).equals(geom)
+
+    def test_copy_no_epsg(self, example_positionfixes, mock_con):
+        """Test if geometries in a crs without EPSG code are written without SRID."""
+        pfs = ti.geogr.distances.to_metric_crs(example_positionfixes, method="laea")
+        assert pfs.crs.to_epsg() is None
+        with pytest.warns(UserWarning):
+            pfs.as_positionfixes.to_postgis("positionfixes", mock_con, method="copy")
+
+        assert pd.DataFrame.to_sql.call_args.kwargs["dtype"]["geom"].srid == -1
+        cursor = mock_con.connection.cursor.return_value.__enter__.return_value
+        rows = [row.split(",") for row in cursor.copy_expert.call_args.args[1].getvalue().splitlines()]
+        ewkb = bytes.fromhex(rows[0][3])
+        assert int.from_bytes(ewkb[1:5], "little") == 1
+        assert wkb.loads(ewkb).equals(pfs.geometry.iloc[0])
+
+    def test_unknown_method(self, example_positionfixes):
+        """Test if an unknown write method raises an error before touching the connection."""
+        with pytest.raises(AttributeError):
+            example_positionfixes.as_positionfixes.to_postgis("positionfixes", None, method="multi")
+
+    def test_upsert_statements(self, example_positionfixes, mock_con):
+        """Test the statements that load the rows into a temporary table and merge them into a new table."""
+        pfs = ti.geogr.distances.to_metric_crs(example_positionfixes, method="laea")
+        with pytest.warns(UserWarning):
+            pfs.as_positionfixes.to_postgis(
+                "positionfixes", mock_con, if_exists="upsert", update_columns=["user_id"], deferred_index=True
+            )
+
+        assert pd.DataFrame.to_sql.call_args.kwargs["if_exists"] == "append"
+        columns = '"id", "user_id", "tracked_at", "geom"'
+        statements = [c.args[0] for c in mock_con.exec_driver_sql.call_args_list]
+        temp_table = re.search(r'"_trackintel_upsert_[0-9a-f]{32}"', statements[1]).group()
+        assert statements == [
+            'CREATE UNIQUE INDEX "ux_positionfixes" ON "public"."positionfixes" ("id")',
+            f'CREATE TEMPORARY TABLE {temp_table} (LIKE "public"."positionfixes") ON COMMIT DROP',
+            f'INSERT INTO "public"."positionfixes" ({columns}) SELECT {columns} FROM {temp_table} '
+            'ON CONFLICT ("id") DO UPDATE SET "user_id" = EXCLUDED."user_id"',
+            f"DROP TABLE {temp_table}",
+            'CREATE INDEX "idx_positionfixes_geom" ON "public"."positionfixes" USING GIST ("geom")',
+        ]
+        cursor = mock_con.connection.cursor.return_value.__enter__.return_value
+        copy_sql, buffer = cursor.copy_expert.call_args.args
+        assert copy_sql == f"COPY {temp_table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        assert len(buffer.getvalue().splitlines()) == len(pfs)
+
+    def test_upsert_insert_only(self, example_positionfixes, mock_con):
+        """Test if an empty update_columns list only inserts new rows."""
+        example_positionfixes.as_positionfixes.to_postgis(
+            "positionfixes", mock_con, if_exists="upsert", update_columns=[]
+        )
+        statements = [c.args[0] for c in mock_con.exec_driver_sql.call_args_list]
+        assert statements[2].endswith('ON CONFLICT ("id") DO NOTHING')
+
+    def test_upsert_unique_temp_table(self, example_positionfixes, mock_con):
+        """Test if every upsert uses its own temporary table."""
+        for _ in range(2):
+            example_positionfixes.as_positionfixes.to_postgis("positionfixes", mock_con, if_exists="upsert")
+        statements = [c.args[0] for c in mock_con.exec_driver_sql.call_args_list]
+        temp_tables = [s.split()[3] for s in statements if s.startswith("CREATE TEMPORARY TABLE")]
+        assert len(temp_tables) == 2
+        assert temp_tables[0] != temp_tables[1]
+
+    def test_upsert_errors(self, example_positionfixes):
+        """Test if upserting without index or with unknown update columns raises an error before connecting."""
+        pfs = example_positionfixes
+        with pytest.raises(ValueError):
+            pfs.as_positionfixes.to_postgis("positionfixes", None, if_exists="upsert", index=False)
+        with pytest.raises(KeyError):
+            pfs.as_positionfixes.to_postgis("positionfixes", None, if_exists="upsert", update_columns=["id"])
+        with pytest.raises(KeyError):
+            pfs.as_positionfixes.to_postgis("positionfixes", None, if_exists="upsert", update_columns=["mode"])
+
+
 class TestGetSrid:
     def test_srid(self, example_positionfixes):
         """Test if `_get_srid` returns the correct srid."""
@@ -509,3 +783,47 @@ class Test_Handle_Con_String:
             assert con is conn
 
         wrapped(conn)
+
+    def test_engine_reuse(self, tmp_path):
+        """Test if the engine of a connection string is reused and the connection returned to the pool."""
+        conn_string = f"sqlite:///{os.path.join(tmp_path, 'test.db')}"
+        engines = []
+
+        @ti.io.postgis._handle_con_string
+        def wrapped(con):
+            engines.append(con.engine)
+
+        wrapped(conn_string)
+        wrapped(conn_string)
+        assert engines[0] is engines[1]
+        assert ti.io.postgis._ENGINES[conn_string] is engines[0]
+
+        ti.io.dispose_engines()
+        assert conn_string not in ti.io.postgis._ENGINES
+        wrapped(conn_string)
+        assert engines[2] is not engines[0]
+        ti.io.dispose_engines()
+
+
+class TestSet_engine_pool:
+    def test_pool_size(self, conn_postgis):
+        """Test if the pool settings are applied to the cached engine."""
+        conn_string, _ = conn_postgis
+        try:
+            ti.io.set_engine_pool(pool_size=2, max_overflow=1)
+            engine = ti.io.postgis._get_engine(conn_string)
+            assert engine.pool.size() == 2
+            assert engine.pool._max_overflow == 1
+        finally:
+            ti.io.set_engine_pool()
+
+    def test_no_queue_pool(self, tmp_path):
+        """Test if pool settings are ignored for databases without connection pool."""
+        conn_string = f"sqlite:///{os.path.join(tmp_path, 'test.db')}"
+        try:
+            ti.io.set_engine_pool(pool_size=2, max_overflow=1)
+            engine = ti.io.postgis._get_engine(conn_string)
+            with engine.connect() as con:
+                assert con.exec_driver_sql("SELECT 1").scalar() == 1
+        finally:
+            ti.io.set_engine_pool()
@@ -8,6 +8,14 @@ from trackintel.io.file import read_triplegs_csv
 from trackintel.io.file import read_staypoints_csv
 from trackintel.io.file import read_locations_csv
 from trackintel.io.file import read_trips_csv
+from trackintel.io.parquet import read_positionfixes_parquet
+from trackintel.io.parquet import read_triplegs_parquet
+from trackintel.io.parquet import read_staypoints_parquet
+from trackintel.io.parquet import read_locations_parquet
+from trackintel.io.parquet import read_trips_parquet
+from trackintel.io.parquet import read_tours_parquet
+from trackintel.io.parquet import read_parquet_dataset
+from trackintel.io.parquet import iter_parquet_dataset
 
 #
 from .core import print_version
@@ -1,23 +1,29 @@
 from .tracking_quality import temporal_tracking_quality
+from .tracking_quality import TrackingQualityAggregator
 from .tracking_quality import _split_overlaps as split_overlaps
 
 from .labelling import create_activity_flag
 from .labelling import predict_transport_mode
+from .labelling import tripleg_movement_features
 
 from .modal_split import calculate_modal_split
 
 from .location_identification import location_identifier
 from .location_identification import pre_filter_locations
+from .location_identification import location_statistics
 from .location_identification import freq_method, osna_method
 
 __all__ = [
     "temporal_tracking_quality",
+    "TrackingQualityAggregator",
     "split_overlaps",
     "create_activity_flag",
     "predict_transport_mode",
+    "tripleg_movement_features",
     "calculate_modal_split",
     "location_identifier",
     "pre_filter_locations",
+    "location_statistics",
     "freq_method",
     "osna_method",
 ]
@@ -1,8 +1,10 @@
 import datetime
 
 import numpy as np
+import pandas as pd
 
 from trackintel.geogr.distances import check_gdf_crs, calculate_haversine_length
+from trackintel.geogr.point_distances import haversine_dist
 
 
 def create_activity_flag(staypoints, method="time_threshold", time_threshold=15.0, activity_column_name="activity"):
@@ -56,15 +58,20 @@ def predict_transport_mode(triplegs, method="simple-coarse", **kwargs):
     triplegs: GeoDataFrame (as trackintel triplegs)
         The original input triplegs.
 
-    method: {'simple-coarse'}
+    method: {'simple-coarse', 'classifier'}
         The following methods are available for transport mode inference/prediction:
 
         - 'simple-coarse' : Uses simple heuristics to predict coarse transport classes.
+        - 'classifier' : Uses a (trained) classifier on the movement features of the triplegs, see
+          :func:`trackintel.analysis.labelling.tripleg_movement_features`. Requires the keyword arguments
+          ``positionfixes`` (with column 'tripleg_id') and ``classifier``, an object with a ``predict`` method
+          (e.g., a scikit-learn estimator) or a function that maps the feature matrix to the modes. Further
+          keyword arguments are passed to `tripleg_movement_features`.
 
     Returns
     -------
     triplegs : GeoDataFrame (as trackintel triplegs)
-        The triplegs with added column mode, containing the predicted transport modes.
+        The triplegs with added column mode, containing the predicted transport modes as categorical.
 
     Notes
     -----
@@ -74,10 +81,15 @@ def predict_transport_mode(triplegs, method="simple-coarse", **kwargs):
     ``fast_mobility`` (>100 km/h) modes such as high-speed rail or airplanes.
     These categories are default values and can be overwritten using the keyword argument categories.
 
+    ``classifier`` predicts the mode of all triplegs with complete features, the remaining triplegs
+    (e.g., with less than three positionfixes) get no mode.
+
     Examples
     --------
     >>> tpls  = tpls.as_triplegs.predict_transport_mode()
     >>> print(tpls["mode"])
+    >>> # with a trained scikit-learn classifier
+    >>> tpls = tpls.as_triplegs.predict_transport_mode(method="classifier", positionfixes=pfs, classifier=clf)
     """
     if method == "simple-coarse":
         # implemented as keyword argument if later other methods that don't use categories are added
@@ -86,10 +98,132 @@ def predict_transport_mode(triplegs, method="simple-coarse", **kwargs):
         )
 
         return _predict_transport_mode_simple_coarse(triplegs, categories)
+    elif method == "classifier":
+        positionfixes = kwargs.pop("positionfixes", None)
+        classifier = kwargs.pop("classifier", None)
+        if positionfixes is None or classifier is None:
+            raise ValueError("Method 'classifier' requires the keyword arguments 'positionfixes' and 'classifier'.")
+        return _predict_transport_mode_classifier(triplegs, positionfixes, classifier, **kwargs)
     else:
         raise AttributeError(f"Method {method} not known for predicting tripleg transport modes.")
 
 
+def tripleg_movement_features(
+    positionfixes, triplegs=None, percentiles=[10, 50, 90], stop_speed=0.5, heading_threshold=19
+):
+    """
+    Calculate movement features per tripleg from its positionfixes.
+
+    The positionfixes are sorted once and all features are computed with grouped reductions over the
+    consecutive positionfixes of each tripleg (segments), without a Python loop over the triplegs.
+
+    Parameters
+    ----------
+    positionfixes : GeoDataFrame (as trackintel positionfixes)
+        Positionfixes with column 'tripleg_id', e.g., from `generate_triplegs`.
+
+    triplegs : GeoDataFrame (as trackintel triplegs), optional
+        If given, the features are aligned to the index of the triplegs (triplegs without positionfixes have
+        NaN features). Otherwise the index are all tripleg ids of the positionfixes.
+
+    percentiles : list of float, default [10, 50, 90]
+        Percentiles of the speed and the acceleration.
+
+    stop_speed : float, default 0.5
+        Segments with a speed below stop_speed (m/s) count as stopped.
+
+    heading_threshold : float, default 19
+        Changes of the heading between two segments above heading_threshold (degree) count as heading change.
+
+    Returns
+    -------
+    features : pd.DataFrame
+        Indexed by the tripleg id with the columns:
+
+        - "speed_p{q}": percentiles of the segment speeds (m/s).
+        - "acceleration_p{q}": percentiles of the absolute acceleration between segments (m/s^2), i.e., the change
+          in speed over the time between the midpoints of two consecutive segments.
+        - "heading_change_rate": number of heading changes per km.
+        - "stop_ratio": share of the tripleg duration with a speed below stop_speed.
+
+    Notes
+    -----
+    The features are adapted from [1]. Distances are calculated with the haversine formula for
+    positionfixes in WGS84 and as euclidean distances for projected positionfixes.
+
+    References
+    ----------
+    [1] Zheng, Yu, Quannan Li, Yukun Chen, Xing Xie, and Wei-Ying Ma. 2008.
+    'Understanding Mobility Based on GPS Data'. In Proceedings of the 10th International Conference on
+    Ubiquitous Computing, 312–21. https://doi.org/10.1145/1409635.1409677.
+
+    Examples
+    --------
+    >>> from trackintel.analysis.labelling import tripleg_movement_features
+    >>> features = tripleg_movement_features(pfs, tpls)
+    """
+    if "tripleg_id" not in positionfixes.columns:
+        raise KeyError(
+            "To calculate tripleg features the positionfixes must have a column 'tripleg_id', "
+            + f"but it has [{', '.join(positionfixes.columns)}]."
+        )
+    if_planer_crs = check_gdf_crs(positionfixes)
+
+    # positionfixes of triplegs (staypoint positionfixes have tripleg_id -1), sorted by tripleg and time
+    tripleg_id = positionfixes["tripleg_id"]
+    pfs = positionfixes[tripleg_id.notna() & (tripleg_id.fillna(-1) >= 0)]
+    tripleg_codes, tripleg_ids = pd.factorize(pfs["tripleg_id"], sort=True)
+    tracked_at = pfs["tracked_at"].values.astype("datetime64[ns]").astype("int64")
+    order = np.lexsort((tracked_at, tripleg_codes))
+    tripleg_codes, tracked_at = tripleg_codes[order], tracked_at[order]
+    x, y = pfs.geometry.x.values[order], pfs.geometry.y.values[order]
+    n = len(tripleg_ids)
+
+    # segments between consecutive positionfixes of the same tripleg
+    seg = tripleg_codes[:-1] == tripleg_codes[1:]
+    seg_tripleg = tripleg_codes[:-1][seg]
+    seg_duration = (tracked_at[1:] - tracked_at[:-1])[seg] / 10**9
+    if if_planer_crs:
+        seg_distance = np.hypot(x[1:] - x[:-1], y[1:] - y[:-1])[seg]
+        seg_heading = np.degrees(np.arctan2(x[1:] - x[:-1], y[1:] - y[:-1]))[seg]
+    else:
+        seg_distance = haversine_dist(x[:-1], y[:-1], x[1:], y[1:])[seg]
+        seg_heading = _initial_bearing(x[:-1], y[:-1], x[1:], y[1:])[seg]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        seg_speed = np.where(seg_duration > 0, seg_distance / seg_duration, np.nan)
+
+    # pairs of consecutive segments of the same tripleg
+    pair = seg_tripleg[:-1] == seg_tripleg[1:]
+    pair_tripleg = seg_tripleg[:-1][pair]
+    # the speed of a segment is located at its temporal midpoint
+    midpoint_duration = (seg_duration[:-1] + seg_duration[1:]) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        acceleration = np.where(midpoint_duration > 0, np.abs(np.diff(seg_speed)) / midpoint_duration, np.nan)[pair]
+    heading_change = np.abs((np.diff(seg_heading) + 180) % 360 - 180)
+    # the heading is only defined for segments with movement
+    is_heading_change = (heading_change > heading_threshold) & (seg_distance[:-1] > 0) & (seg_distance[1:] > 0)
+    is_heading_change = is_heading_change[pair]
+
+    features = {}
+    features.update(_grouped_percentiles(seg_tripleg, seg_speed, n, percentiles, "speed"))
+    features.update(_grouped_percentiles(pair_tripleg, acceleration, n, percentiles, "acceleration"))
+    distance = np.bincount(seg_tripleg, weights=seg_distance, minlength=n)
+    duration = np.bincount(seg_tripleg, weights=seg_duration, minlength=n)
+    stopped = np.bincount(seg_tripleg, weights=seg_duration * (seg_speed < stop_speed), minlength=n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        features["heading_change_rate"] = np.bincount(pair_tripleg, weights=is_heading_change, minlength=n) / (
+            distance / 1000
+        )
+        features["stop_ratio"] = stopped / duration
+    features = pd.DataFrame(features, index=pd.Index(tripleg_ids, name="id"))
+    # undefined features (e.g., no movement) are NaN
+    features = features.replace([np.inf, -np.inf], np.nan)
+
+    if triplegs is not None:
+        features = features.reindex(triplegs.index)
+    return features
+
+
 def _predict_transport_mode_simple_coarse(triplegs_in, categories):
     """
     Predict a transport mode out of three coarse classes.
@@ -132,36 +266,108 @@ def _predict_transport_mode_simple_coarse(triplegs_in, categories):
     else:
         triplegs["distance"] = triplegs.length
 
-    def identify_mode(tripleg, categories):
-        """
-        Identify the mode based on the (overall) tripleg speed.
-
-        Parameters
-        ----------
-        tripleg : trackintel triplegs GeoDataFrame
-            the tripleg to analyse
-        wgs : bool
-            whether the tripleg is in WGS84 or not.
-        categories : dict
-            the upper boundaries (as keys) and the names of the categories as values.
-
-        Returns
-        -------
-        str
-            the identified mode.
-        """
-
-        duration = (tripleg["finished_at"] - tripleg["started_at"]).total_seconds()
-        speed = tripleg["distance"] / duration  # The unit of the speed is m/s
-
-        for bound in categories:
-            if speed < bound:
-                return categories[bound]
-
-    triplegs["mode"] = triplegs.apply(identify_mode, args=((categories,)), axis=1)
+    # speed over the whole tripleg in m/s, the first upper boundary above the speed determines the category
+    duration = (triplegs["finished_at"] - triplegs["started_at"]).dt.total_seconds().values
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed = triplegs["distance"].values / duration
+    bounds = np.fromiter(categories.keys(), dtype=float, count=len(categories))
+    category_idx = np.searchsorted(bounds, speed, side="right")
+
+    codes, names = pd.factorize(list(categories.values()))
+    # speeds above the last boundary (or undefined speeds) get no category (code -1)
+    codes = np.append(codes, -1)[category_idx]
+    triplegs["mode"] = pd.Categorical.from_codes(codes, categories=names)
     return triplegs
 
 
+def _predict_transport_mode_classifier(triplegs_in, positionfixes, classifier, **kwargs):
+    """
+    Predict the transport mode with a classifier on the movement features of the triplegs.
+
+    Parameters
+    ----------
+    triplegs_in : GeoDataFrame (as trackintel triplegs)
+        The triplegs for the transport mode prediction.
+
+    positionfixes : GeoDataFrame (as trackintel positionfixes)
+        The positionfixes of the triplegs with column 'tripleg_id'.
+
+    classifier : object with predict method or callable
+        Maps the feature matrix (pd.DataFrame) to the transport modes.
+
+    **kwargs
+        Passed to :func:`trackintel.analysis.labelling.tripleg_movement_features`.
+
+    Returns
+    -------
+    triplegs : GeoDataFrame (as trackintel triplegs)
+        The triplegs with added column mode, containing the predicted transport modes as categorical.
+    """
+    triplegs = triplegs_in.copy()
+    features = tripleg_movement_features(positionfixes, triplegs, **kwargs)
+    complete = features.notna().all(axis=1).values
+
+    predict = classifier.predict if hasattr(classifier, "predict") else classifier
+    mode = np.full(len(triplegs), fill_value=None, dtype=object)
+    if complete.any():
+        mode[complete] = np.asarray(predict(features[complete]))
+    triplegs["mode"] = pd.Categorical(mode)
+    return triplegs
+
+
+def _grouped_percentiles(group, values, n_groups, percentiles, name):
+    """
+    Percentiles (linear interpolation) of values per group, ignoring NaN.
+
+    Parameters
+    ----------
+    group : np.array
+        Group code of each value.
+
+    values : np.array
+
+    n_groups : int
+
+    percentiles : list of float
+
+    name : str
+        Prefix of the returned keys.
+
+    Returns
+    -------
+    dict
+        {f"{name}_p{q}": np.array of length n_groups}, NaN for groups without values.
+    """
+    valid = ~np.isnan(values)
+    group, values = group[valid], values[valid]
+    order = np.lexsort((values, group))
+    group, values = group[order], values[order]
+    count = np.bincount(group, minlength=n_groups)
+    start = np.cumsum(count) - count
+    has_values = count > 0
+
+    result = {}
+    for q in percentiles:
+        position = q / 100 * (count[has_values] - 1)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        lower_value = values[start[has_values] + lower]
+        upper_value = values[start[has_values] + upper]
+        percentile = np.full(n_groups, np.nan)
+        percentile[has_values] = lower_value + (upper_value - lower_value) * (position - lower)
+        result[f"{name}_p{q:g}"] = percentile
+    return result
+
+
+def _initial_bearing(lon_1, lat_1, lon_2, lat_2):
+    """Initial bearing (degree, clockwise from north) from the first to the second WGS84 coordinates."""
+    lon_1, lat_1, lon_2, lat_2 = map(np.radians, [lon_1, lat_1, lon_2, lat_2])
+    dlon = lon_2 - lon_1
+    x = np.sin(dlon) * np.cos(lat_2)
+    y = np.cos(lat_1) * np.sin(lat_2) - np.sin(lat_1) * np.cos(lat_2) * np.cos(dlon)
+    return np.degrees(np.arctan2(x, y))
+
+
 def _check_categories(cat):
     """
     Check if the keys of a dictionary are in ascending order.
@@ -4,7 +4,7 @@ import pandas as pd
 import trackintel as ti
 
 
-def location_identifier(spts, method="FREQ", pre_filter=True, **pre_filter_kwargs):
+def location_identifier(spts, method="FREQ", pre_filter=True, location_stats=None, **pre_filter_kwargs):
     """Assign "home" and "work" activity label for each user with different methods.
 
     Parameters
@@ -22,6 +22,10 @@ def location_identifier(spts, method="FREQ", pre_filter=True, **pre_filter_kwarg
         Prefiltering the staypoints to exclude locations with not enough data.
         The filter function can also be accessed via `pre_filter_locations`.
 
+    location_stats : pd.DataFrame, optional
+        Location statistics of spts as returned by `location_statistics`. Pass them to skip the aggregation of
+        the staypoints, e.g., when running several methods on the same staypoints.
+
     pre_filter_kwargs : dict
         Kwargs to hand to `pre_filter_locations` if used. See function for more informations.
 
@@ -47,6 +51,10 @@ def location_identifier(spts, method="FREQ", pre_filter=True, **pre_filter_kwarg
     --------
     >>> from ti.analysis.location_identification import location_identifier
     >>> location_identifier(spts, pre_filter=True, method="FREQ")
+    >>> # reuse the aggregation of the staypoints
+    >>> location_stats = location_statistics(spts)
+    >>> location_identifier(spts, method="FREQ", location_stats=location_stats)
+    >>> location_identifier(spts, method="OSNA", location_stats=location_stats)
     """
     # assert validity of staypoints
     spts.as_staypoints
@@ -59,17 +67,23 @@ def location_identifier(spts, method="FREQ", pre_filter=True, **pre_filter_kwarg
                 f"named 'location_id' but it has [{', '.join(spts.columns)}]"
             )
         )
+    if method not in ["FREQ", "OSNA"]:
+        raise ValueError(f"Method {method} does not exist.")
+
+    # the staypoints are aggregated once and the filter and the methods work on the aggregation
+    if location_stats is None:
+        location_stats = location_statistics(spts)
     if pre_filter:
-        f = pre_filter_locations(spts, **pre_filter_kwargs)
+        location_filter = _pre_filter_location_stats(location_stats, **pre_filter_kwargs)
+        f = _map_location_stats(spts, location_filter, fill_value=False).astype(bool)
+        location_stats = location_stats[location_filter]
     else:
-        f = pd.Series(np.full(len(spts.index), True))
+        f = pd.Series(np.full(len(spts.index), True), index=spts.index)
 
     if method == "FREQ":
-        method_val = freq_method(spts[f], "home", "work")
-    elif method == "OSNA":
-        method_val = osna_method(spts[f])
+        method_val = freq_method(spts[f], "home", "work", location_stats=location_stats)
     else:
-        raise ValueError(f"Method {method} does not exist.")
+        method_val = osna_method(spts[f], location_stats=location_stats)
 
     spts.loc[f, "activity_label"] = method_val["activity_label"]
     return spts
@@ -83,6 +97,7 @@ def pre_filter_locations(
     thresh_sp_at_loc=10,
     thresh_loc_time="1h",
     thresh_loc_period="5h",
+    location_stats=None,
 ):
     """Filter locations and user out that have not enough data to do a proper analysis.
 
@@ -114,6 +129,9 @@ def pre_filter_locations(
         Minimum timespan of first to last visit at a location to be included.
         If str must be parsable by pd.to_timedelta.
 
+    location_stats : pd.DataFrame, optional
+        Location statistics of spts as returned by `location_statistics`. If None, they are calculated.
+
     Returns
     -------
     total_filter: pd.Series
@@ -128,48 +146,86 @@ def pre_filter_locations(
     # assert validity of staypoints
     spts.as_staypoints
 
-    spts = spts.copy()
-    if isinstance(thresh_loc_time, str):
-        thresh_loc_time = pd.to_timedelta(thresh_loc_time)
-    if isinstance(thresh_loc_period, str):
-        thresh_loc_period = pd.to_timedelta(thresh_loc_period)
+    if location_stats is None:
+        location_stats = location_statistics(spts)
+    location_filter = _pre_filter_location_stats(
+        location_stats,
+        agg_level=agg_level,
+        thresh_sp=thresh_sp,
+        thresh_loc=thresh_loc,
+        thresh_sp_at_loc=thresh_sp_at_loc,
+        thresh_loc_time=thresh_loc_time,
+        thresh_loc_period=thresh_loc_period,
+    )
+    return _map_location_stats(spts, location_filter, fill_value=False).astype(bool)
 
-    # filtering users
-    user = spts.groupby("user_id").nunique()
-    user_sp = user["started_at"] >= thresh_sp  # every staypoint should have a started_at -> count
-    user_loc = user["location_id"] >= thresh_loc
-    user_filter_agg = user_sp & user_loc
-    user_filter_agg.rename("user_filter", inplace=True)  # rename for merging
-    user_filter = pd.merge(spts["user_id"], user_filter_agg, left_on="user_id", right_index=True)["user_filter"]
 
-    # filtering locations
-    spts["duration"] = spts["finished_at"] - spts["started_at"]
-    if agg_level == "user":
-        groupby_loc = ["user_id", "location_id"]
-    elif agg_level == "dataset":
-        groupby_loc = ["location_id"]
-    else:
-        raise ValueError(f"Unknown agg_level '{agg_level}' use instead {{'user', 'dataset'}}.")
-    loc = spts.groupby(groupby_loc).agg({"started_at": [min, "count"], "finished_at": max, "duration": sum})
-    loc.columns = loc.columns.droplevel(0)  # remove possible multi-index
-    loc.rename(columns={"min": "started_at", "max": "finished_at", "sum": "duration"}, inplace=True)
-    # period for maximal time span first visit - last visit.
-    # duration for effective time spent at location summed up.
-    loc["period"] = loc["finished_at"] - loc["started_at"]
-    loc_sp = loc["count"] >= thresh_sp_at_loc
-    loc_time = loc["duration"] >= thresh_loc_time
-    loc_period = loc["period"] >= thresh_loc_period
-    loc_filter_agg = loc_sp & loc_time & loc_period
-    loc_filter_agg.rename("loc_filter", inplace=True)  # rename for merging
-    loc_filter = pd.merge(spts[groupby_loc], loc_filter_agg, how="left", left_on=groupby_loc, right_index=True)
-    loc_filter = loc_filter["loc_filter"]
+def location_statistics(spts):
+    """Aggregate the staypoints per user and location in a single pass.
 
-    total_filter = user_filter & loc_filter
+    The statistics contain everything `pre_filter_locations`, `freq_method` and `osna_method` need, such that
+    the staypoints don't have to be aggregated again for each of them.
 
-    return total_filter
+    Parameters
+    ----------
+    spts : GeoDataFrame (as trackintel staypoints)
+        Staypoints with the column "location_id".
+
+    Returns
+    -------
+    location_stats : pd.DataFrame
+        Indexed by ["user_id", "location_id"] (sorted, staypoints without location are aggregated with
+        location_id NaN) with columns:
 
+        - "count": number of staypoints.
+        - "duration": sum of the durations.
+        - "started_at", "finished_at": start of the first and end of the last visit.
+        - "duration_rest", "duration_work", "duration_leisure", "duration_weekend": sum of the durations per
+          OSNA timeframe, NaT if the location wasn't visited in the timeframe.
 
-def freq_method(spts, *labels):
+    Examples
+    --------
+    >>> from ti.analysis.location_identification import location_statistics
+    >>> location_stats = location_statistics(spts)
+    >>> mask = pre_filter_locations(spts, location_stats=location_stats)
+    >>> home_work = freq_method(spts, location_stats=location_stats)
+    """
+    duration = spts["finished_at"] - spts["started_at"]
+    timeframe = _osna_label_timeframes(spts["started_at"] + duration / 2)
+    df = pd.DataFrame(
+        {
+            "user_id": spts["user_id"].values,
+            "location_id": spts["location_id"].values,
+            "started_at": spts["started_at"].values,
+            "finished_at": spts["finished_at"].values,
+            "duration": duration.values,
+        }
+    )
+    aggregation = {
+        "count": ("duration", "size"),
+        "duration": ("duration", "sum"),
+        "started_at": ("started_at", "min"),
+        "finished_at": ("finished_at", "max"),
+    }
+    timeframes = ["rest", "work", "leisure", "weekend"]
+    for tf in timeframes:
+        # NaT outside of the timeframe, count is used to detect timeframes without visit
+        df[f"duration_{tf}"] = duration.where(timeframe == tf).values
+        aggregation[f"duration_{tf}"] = (f"duration_{tf}", "sum")
+        aggregation[f"count_{tf}"] = (f"duration_{tf}", "count")
+    location_stats = df.groupby(["user_id", "location_id"], dropna=False).agg(**aggregation)
+    for tf in timeframes:
+        location_stats.loc[location_stats[f"count_{tf}"] == 0, f"duration_{tf}"] = pd.NaT
+    location_stats = location_stats.drop(columns=[f"count_{tf}" for tf in timeframes])
+
+    # restore the timezone
+    for col in ["started_at", "finished_at"]:
+        if spts[col].dt.tz is not None:
+            location_stats[col] = location_stats[col].dt.tz_localize("UTC").dt.tz_convert(spts[col].dt.tz)
+    return location_stats
+
+
+def freq_method(spts, *labels, location_stats=None):
     """Generate an activity label per user.
 
     Assigning the most visited location the label "home" and the second most visited location the label "work".
@@ -185,6 +241,10 @@ def freq_method(spts, *labels):
     labels : collection of str, default ("home", "work")
         Labels in decreasing time of activity.
 
+    location_stats : pd.DataFrame, optional
+        Location statistics of spts as returned by `location_statistics`. If None, the durations are aggregated
+        from spts.
+
     Returns
     -------
     GeoDataFrame (as trackintel staypoints)
@@ -198,55 +258,33 @@ def freq_method(spts, *labels):
     spts = spts.copy()
     if not labels:
         labels = ("home", "work")
-    for name, group in spts.groupby("user_id"):
-        if "duration" not in group.columns:
-            group["duration"] = group["finished_at"] - group["started_at"]
-        # pandas keeps inner order of groups
-        spts.loc[spts["user_id"] == name, "activity_label"] = _freq_transform(group, *labels)
+    if location_stats is not None:
+        location_duration = location_stats["duration"].dropna()
+        location_duration = location_duration[location_duration.index.get_level_values("location_id").notna()]
+    else:
+        if "duration" in spts.columns:
+            duration = spts["duration"]
+        else:
+            duration = spts["finished_at"] - spts["started_at"]
+        location_duration = duration.groupby([spts["user_id"], spts["location_id"]]).sum()
+
+    # total duration per user and location, ranked within the user (ties are resolved by the location_id)
+    user_codes = pd.factorize(location_duration.index.get_level_values("user_id"))[0]
+    order = np.lexsort((-location_duration.values.astype("int64"), user_codes))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - np.searchsorted(user_codes[order], user_codes[order], side="left")
+
+    location_label = np.full(len(location_duration), fill_value=None)
+    for i, label in enumerate(labels):
+        location_label[rank == i] = label
+
+    # map the labels back to the staypoints in one go
+    location_label = pd.Series(location_label, index=location_duration.index, dtype=object)
+    spts["activity_label"] = _map_location_stats(spts, location_label, fill_value=None)
     return spts
 
 
-def _freq_transform(group, *labels):
-    """Transform function that assigns the longest (duration) visited locations the labels in order.
-
-    Parameters
-    ----------
-    group : pd.DataFrame
-        Should have columns "location_id" and "duration".
-
-    Returns
-    -------
-    pd.Series
-        dtype : object
-    """
-    group_agg = group.groupby("location_id").agg({"duration": sum})
-    group_agg["activity_label"] = _freq_assign(group_agg["duration"], *labels)
-    group_merge = pd.merge(
-        group["location_id"], group_agg["activity_label"], how="left", left_on="location_id", right_index=True
-    )
-    return group_merge["activity_label"]
-
-
-def _freq_assign(duration, *labels):
-    """Assign k labels to k longest durations the rest is `None`.
-
-    Parameters
-    ----------
-    duration : pd.Series
-
-    Returns
-    -------
-    np.array
-        dtype : object
-    """
-    kth = (-duration).argsort()[: len(labels)]  # if inefficient use partial sort.
-    label_array = np.full(len(duration), fill_value=None)
-    labels = labels[: len(kth)]  # if provided with more labels than entries.
-    label_array[kth] = labels
-    return label_array
-
-
-def osna_method(spts):
+def osna_method(spts, location_stats=None):
     """Find "home" location for timeframes "rest" and "leisure" and "work" location for "work" timeframe.
 
     Use weekdays data divided in three time frames ["rest", "work", "leisure"] to generate location labels.
@@ -258,6 +296,9 @@ def osna_method(spts):
     spts : GeoDataFrame (as trackintel staypoints)
         Staypoints with the column "location_id".
 
+    location_stats : pd.DataFrame, optional
+        Location statistics of spts as returned by `location_statistics`. If None, they are calculated.
+
     Returns
     -------
     GeoDataFrame (as trackintel staypoints)
@@ -281,63 +322,167 @@ def osna_method(spts):
     >>> from ti.analysis.location_identification import osna_method
     >>> staypoints = osna_method(staypoints)
     """
-    spts_in = spts  # no copy --> used to join back later.
-    spts = spts_in.copy()
-    spts["duration"] = spts["finished_at"] - spts["started_at"]
-    spts["mean_time"] = spts["started_at"] + spts["duration"] / 2
-
-    spts["label"] = spts["mean_time"].apply(_osna_label_timeframes)
-    spts.loc[spts["label"] == "rest", "duration"] *= 0.739  # weight given in paper
-    spts.loc[spts["label"] == "leisure", "duration"] *= 0.358  # weight given in paper
-
-    groups_map = {
-        "rest": "home",
-        "leisure": "home",
-        "work": "work",
-    }  # weekends aren't included in analysis!
-    # groupby user, location and label.
-    groups = ["user_id", "location_id", spts["label"].map(groups_map)]
-
-    spts_agg = spts.groupby(groups)["duration"].sum()
-    if spts_agg.empty:
+    if location_stats is None:
+        location_stats = location_statistics(spts)
+    # weekends aren't included in analysis!
+    location_stats = location_stats[location_stats.index.get_level_values("location_id").notna()]
+    rest = location_stats["duration_rest"]
+    leisure = location_stats["duration_leisure"]
+    work = location_stats["duration_work"]
+    has_home = (rest.notna() | leisure.notna()).values
+    has_work = work.notna().values
+    if not (has_home | has_work).any():
         warnings.warn("Got empty table in the osna method, check if the dates lie in weekends.")
-        spts_in["activity_label"] = pd.NA
-        return spts_in
-
-    # create a pivot table -> labels "home" and "work" as columns. ("user_id", "location_id" still in index.)
-    spts_pivot = spts_agg.unstack()
-    # get index of maximum for columns "work" and "home"
-    spts_idxmax = spts_pivot.groupby(["user_id"]).idxmax()
-    # first assign labels
-    for col in spts_idxmax.columns:
-        spts_pivot.loc[spts_idxmax[col].dropna(), "activity_label"] = col
-
-    # The "home" label could overlap with the "work" label
-    # we set the rows where "home" is maximum to zero (pd.NaT) and recalculate index of work maximum.
-    if all(col in spts_idxmax.columns for col in ["work", "home"]):
-        redo_work = spts_idxmax[spts_idxmax["home"] == spts_idxmax["work"]]
-        spts_pivot.loc[redo_work["work"], "activity_label"] = "home"
-        spts_pivot.loc[redo_work["work"], "work"] = pd.NaT
-        spts_idxmax_work = spts_pivot.groupby(["user_id"])["work"].idxmax()
-        spts_pivot.loc[spts_idxmax_work.dropna(), "activity_label"] = "work"
-
-    # now join it back together
-    sel = spts_in.columns != "activity_label"  # no overlap with older "activity_label"
-    return pd.merge(
-        spts_in.loc[:, sel],
-        spts_pivot["activity_label"],
-        how="left",
-        left_on=["user_id", "location_id"],
-        right_index=True,
-    )
+        spts = spts.copy()
+        spts["activity_label"] = pd.NA
+        return spts
+
+    # "rest" + "leisure" are weighted together for "home", weights given in paper
+    home_score = 0.739 * _to_ns(rest) + 0.358 * _to_ns(leisure)
+    work_score = _to_ns(work)
+
+    # the statistics are sorted by user and location_id -> ties are resolved by the smaller location_id
+    user_codes, users = pd.factorize(location_stats.index.get_level_values("user_id"))
+    home = _osna_top_locations(user_codes, len(users), home_score, has_home, k=1)[0]
+    work, work_second = _osna_top_locations(user_codes, len(users), work_score, has_work, k=2)
+    # The "home" label could overlap with the "work" label, then the second best "work" location is used.
+    overlap = (home == work) & (home != -1)
+    work[overlap] = work_second[overlap]
+
+    location_label = np.full(len(location_stats), fill_value=np.nan, dtype=object)
+    location_label[home[home != -1]] = "home"
+    location_label[work[work != -1]] = "work"
+    location_label = pd.Series(location_label, index=location_stats.index, dtype=object)
+
+    spts = spts.drop(columns="activity_label", errors="ignore")  # no overlap with older "activity_label"
+    spts["activity_label"] = _map_location_stats(spts, location_label, fill_value=np.nan)
+    return spts
 
 
 def _osna_label_timeframes(dt, weekend=[5, 6], start_rest=2, start_work=8, start_leisure=19):
-    """Help function to assign "weekend", "rest", "work", "leisure"."""
-    if dt.weekday() in weekend:
-        return "weekend"
-    if start_rest <= dt.hour < start_work:
-        return "rest"
-    if start_work <= dt.hour < start_leisure:
-        return "work"
-    return "leisure"
+    """Help function to assign "weekend", "rest", "work", "leisure".
+
+    Parameters
+    ----------
+    dt : pd.Series
+        Datetimes to label.
+
+    Returns
+    -------
+    np.array
+        dtype : object
+    """
+    hour = dt.dt.hour.values
+    return np.select(
+        [
+            np.isin(dt.dt.weekday.values, weekend),
+            (start_rest <= hour) & (hour < start_work),
+            (start_work <= hour) & (hour < start_leisure),
+        ],
+        ["weekend", "rest", "work"],
+        default="leisure",
+    ).astype(object)
+
+
+def _osna_top_locations(user_codes, n_users, score, valid, k):
+    """Find the k locations with the highest score per user.
+
+    Parameters
+    ----------
+    user_codes : np.array
+        User code of each location, sorted.
+
+    n_users : int
+
+    score : np.array
+        Score of each location.
+
+    valid : np.array
+        Boolean mask of the locations that can be selected.
+
+    k : int
+
+    Returns
+    -------
+    np.array of shape (k, n_users)
+        The positions of the best k locations of each user, -1 if the user has less locations.
+    """
+    candidates = np.flatnonzero(valid)
+    # sort by user, decreasing score and position (= location_id) and rank within the user
+    order = candidates[np.lexsort((candidates, -score[candidates], user_codes[candidates]))]
+    order_user = user_codes[order]
+    rank = np.arange(len(order)) - np.searchsorted(order_user, order_user, side="left")
+    top = np.full((k, n_users), -1, dtype=np.int64)
+    top[rank[rank < k], order_user[rank < k]] = order[rank < k]
+    return top
+
+
+def _pre_filter_location_stats(
+    location_stats,
+    agg_level="user",
+    thresh_sp=10,
+    thresh_loc=10,
+    thresh_sp_at_loc=10,
+    thresh_loc_time="1h",
+    thresh_loc_period="5h",
+):
+    """Filter of `pre_filter_locations` evaluated on the location statistics.
+
+    Returns
+    -------
+    pd.Series
+        Boolean series with the index of location_stats.
+    """
+    if isinstance(thresh_loc_time, str):
+        thresh_loc_time = pd.to_timedelta(thresh_loc_time)
+    if isinstance(thresh_loc_period, str):
+        thresh_loc_period = pd.to_timedelta(thresh_loc_period)
+    if agg_level not in ["user", "dataset"]:
+        raise ValueError(f"Unknown agg_level '{agg_level}' use instead {{'user', 'dataset'}}.")
+
+    user_id = location_stats.index.get_level_values("user_id")
+    location_id = location_stats.index.get_level_values("location_id")
+    has_location = location_id.notna()
+
+    # filtering users
+    user_sp = location_stats["count"].groupby(user_id).transform("sum") >= thresh_sp
+    user_loc = pd.Series(has_location, index=location_stats.index).groupby(user_id).transform("sum") >= thresh_loc
+
+    # filtering locations
+    if agg_level == "user":
+        loc = location_stats
+    else:
+        loc = (
+            location_stats[has_location]
+            .groupby(level="location_id")
+            .agg({"count": "sum", "duration": "sum", "started_at": "min", "finished_at": "max"})
+        )
+    # period for maximal time span first visit - last visit.
+    # duration for effective time spent at location summed up.
+    loc_sp = loc["count"] >= thresh_sp_at_loc
+    loc_time = loc["duration"] >= thresh_loc_time
+    loc_period = (loc["finished_at"] - loc["started_at"]) >= thresh_loc_period
+    loc_filter = loc_sp & loc_time & loc_period
+    if agg_level == "dataset":
+        loc_filter = pd.Series(loc_filter.reindex(location_id).values, index=location_stats.index)
+    loc_filter = loc_filter.fillna(False).astype(bool) & has_location
+
+    return user_sp & user_loc & loc_filter
+
+
+def _map_location_stats(spts, values, fill_value):
+    """Map values indexed by ["user_id", "location_id"] to the staypoints.
+
+    Returns
+    -------
+    pd.Series
+        With the index of spts, staypoints without entry in values get fill_value.
+    """
+    idx = values.index.get_indexer(pd.MultiIndex.from_arrays([spts["user_id"], spts["location_id"]]))
+    mapped = np.append(values.values, np.array([fill_value], dtype=values.dtype))[idx]
+    return pd.Series(mapped, index=spts.index, dtype=values.dtype)
+
+
+def _to_ns(duration):
+    """Convert a timedelta series to float nanoseconds, NaT is treated as zero."""
+    return duration.fillna(pd.Timedelta(0)).values.astype("int64").astype(float)
@@ -11,14 +11,14 @@ def calculate_modal_split(tpls_in, freq=None, metric="count", per_user=False, no
     ----------
     tpls_in : GeoDataFrame (as trackintel triplegs)
         triplegs require the column `mode`.
-    freq : str
+    freq : str or list of str
         frequency string passed on as `freq` keyword to the pandas.Grouper class. If `freq=None` the modal split is
         calculated on all data. A list of possible
         values can be found `here <https://pandas.pydata.org/pandas-docs/stable/user_guide/timeseries.html#offset
-        -aliases>`_.
-    metric : {'count', 'distance', 'duration'}
+        -aliases>`_. If a list is given, the modal split is calculated for every frequency.
+    metric : {'count', 'distance', 'duration'} or list of them
         Aggregation used to represent the modal split. 'distance' returns in the same unit as the crs. 'duration'
-        returns values in seconds.
+        returns values in seconds. If a list is given, the modal split is calculated for every metric.
     per_user : bool, default: False
         If True the modal split is calculated per user
     norm : bool, default: False
@@ -26,9 +26,10 @@ def calculate_modal_split(tpls_in, freq=None, metric="count", per_user=False, no
 
     Returns
     -------
-    modal_split : DataFrame
+    modal_split : DataFrame or dict of DataFrames
         The modal split represented as pandas Dataframe with (optionally) a multi-index. The index can have the
-        levels: `('user_id', 'timestamp')` and every mode as a column.
+        levels: `('user_id', 'timestamp')` and every mode as a column. If `freq` or `metric` is a list, a dictionary
+        with keys `(freq, metric)` and the modal splits as values.
 
     Notes
     ------
@@ -38,68 +39,100 @@ def calculate_modal_split(tpls_in, freq=None, metric="count", per_user=False, no
 
         The modal split can be visualized using :func:`trackintel.visualization.modal_split.plot_modal_split`
 
+        All combinations of frequencies and metrics share the encoding of the modes and users and the length
+        of the triplegs is calculated at most once. Requesting them together is thus cheaper than separate calls.
+
     Examples
     --------
     >>> triplegs.calculate_modal_split()
     >>> tripleg.calculate_modal_split(freq='W-MON', metric='distance')
+    >>> # all metrics for daily, weekly and monthly aggregation
+    >>> modal_splits = calculate_modal_split(tpls, freq=["D", "W-MON", "MS"], metric=["count", "distance", "duration"])
+    >>> modal_splits[("W-MON", "distance")]
 
     """
-    tpls = tpls_in.copy()
+    freqs = list(freq) if isinstance(freq, (list, tuple)) else [freq]
+    metrics = list(metric) if isinstance(metric, (list, tuple)) else [metric]
+    for m in metrics:
+        if m not in ["count", "distance", "duration"]:
+            raise AttributeError(f"Metric unknown. We only support ['count', 'distance', 'duration']. You passed {m}")
+
+    # integer-coded modes (columns sorted by name) and users
+    mode_codes, modes = pd.factorize(np.asarray(tpls_in["mode"], dtype=object), sort=True)
+    valid = mode_codes != -1
+    if per_user:
+        user_codes, users = pd.factorize(tpls_in["user_id"], sort=True)
+        valid &= user_codes != -1
+    else:
+        user_codes, users = np.zeros(len(tpls_in), dtype=np.int64), None
 
     # precalculate distance and duration if required
-    if metric == "distance":
-        if_planer_crs = check_gdf_crs(tpls)
+    values = {}
+    if "count" in metrics:
+        values["count"] = np.ones(len(tpls_in))
+    if "distance" in metrics:
+        if_planer_crs = check_gdf_crs(tpls_in)
         if not if_planer_crs:
-            tpls["distance"] = calculate_haversine_length(tpls)
+            values["distance"] = calculate_haversine_length(tpls_in)
         else:
-            tpls["distance"] = tpls.length
-    elif metric == "duration":
-        tpls["duration"] = tpls["finished_at"] - tpls["started_at"]
-
-    # create grouper
+            values["distance"] = tpls_in.length
+    if "duration" in metrics:
+        values["duration"] = (tpls_in["finished_at"] - tpls_in["started_at"]).dt.total_seconds()
+    # missing distances and durations are skipped in the sums
+    values = {m: pd.Series(v).fillna(0).values for m, v in values.items()}
+
+    # a single sort by time for the binning of all frequencies
+    started_at = tpls_in["started_at"]
+    order = np.argsort(started_at.values, kind="stable")
+    modal_splits = {}
+    for f in freqs:
+        bin_codes, bins = _get_time_bins(started_at.iloc[order], f)
+        bin_codes[order] = bin_codes.copy()
+        # rows of the modal split are the observed (user, time bin) combinations
+        row_key = user_codes[valid] * len(bins) + bin_codes[valid]
+        rows, row_codes = np.unique(row_key, return_inverse=True)
+        flat_codes = row_codes * len(modes) + mode_codes[valid]
+        index = _get_modal_split_index(rows // len(bins), rows % len(bins), users, bins, f)
+
+        for m in metrics:
+            aggregated = np.bincount(flat_codes, weights=values[m][valid], minlength=len(rows) * len(modes))
+            if m == "count":
+                aggregated = aggregated.astype(np.int64)
+            modal_split = pd.DataFrame(
+                aggregated.reshape(len(rows), len(modes)), index=index, columns=pd.Index(modes, name="mode")
+            )
+            if norm:
+                # norm rows to 1
+                modal_split = modal_split.div(modal_split.sum(axis=1), axis=0)
+            modal_splits[(f, m)] = modal_split
+
+    if isinstance(freq, (list, tuple)) or isinstance(metric, (list, tuple)):
+        return modal_splits
+    return modal_splits[(freq, metric)]
+
+
+def _get_time_bins(started_at, freq):
+    """Codes and labels of the time bins of freq (see pandas.Grouper), a single bin if freq is None.
+
+    started_at must be sorted.
+    """
     if freq is None:
-        if per_user:
-            tpls_grouper = tpls.groupby(["user_id", "mode"])
-        else:
-            tpls_grouper = tpls.groupby(["mode"])
-    else:
-        tpls.set_index("started_at", inplace=True)
-        tpls.index.name = "timestamp"
-        if per_user:
-            tpls_grouper = tpls.groupby(["user_id", "mode", pd.Grouper(freq=freq)])
-        else:
-            tpls_grouper = tpls.groupby(["mode", pd.Grouper(freq=freq)])
-
-    # aggregate
-    if metric == "count":
-        modal_split = tpls_grouper["mode"].count()
-
-    elif metric == "distance":
-        modal_split = tpls_grouper["distance"].sum()
-
-    elif metric == "duration":
-        modal_split = tpls_grouper["duration"].sum()
-        modal_split = modal_split.dt.total_seconds()
-
-    # move 'mode' to columns
-    modal_split.name = "modal_split"
-    modal_split = pd.DataFrame(modal_split)
-
-    # if mode is the only index, we replace it with zeros so that everything gets aggregated into a single row
-    modal_split["mode"] = modal_split.index.get_level_values("mode")
-    if modal_split.index.nlevels == 1:
-        modal_split.index = 0 * np.arange(0, modal_split.shape[0])
-    else:
-        modal_split = modal_split.droplevel("mode")
-
-    # transform Dataframe such that:
-    # - unique mode names are column names
-    # - time/user_id are the indices
-    modal_split = modal_split.pivot_table(index=modal_split.index, columns="mode", values="modal_split")
-    modal_split.fillna(0, inplace=True)
-
-    if norm:
-        # norm rows to 1
-        modal_split = modal_split.div(modal_split.sum(axis=1), axis=0)
-
-    return modal_split
+        return np.zeros(len(started_at), dtype=np.int64), [0]
+    grouper = pd.Series(0, index=pd.DatetimeIndex(started_at)).groupby(pd.Grouper(freq=freq))
+    # the size per bin contains all bins between the first and the last timestamp (also empty ones)
+    return grouper.ngroup().values, grouper.size().index
+
+
+def _get_modal_split_index(user_codes, bin_codes, users, bins, freq):
+    """Index of the modal split by user_id and/or timestamp, a single row [0] without both."""
+    levels = []
+    if users is not None:
+        levels.append(pd.Index(users.take(user_codes), name="user_id"))
+    if freq is not None:
+        levels.append(pd.DatetimeIndex(bins.take(bin_codes), freq=None, name="timestamp"))
+    if len(levels) == 0:
+        return pd.Index(np.zeros(len(user_codes), dtype=np.int64))
+    if len(levels) == 1:
+        return levels[0]
+    # (user_id, timestamp) tuples
+    return pd.Index(list(zip(*levels)), tupleize_cols=False)
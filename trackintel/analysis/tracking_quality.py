@@ -1,5 +1,3 @@
-import datetime
-
 import pandas as pd
 import numpy as np
 
@@ -13,16 +11,18 @@ def temporal_tracking_quality(source, granularity="all"):
     df : GeoDataFrame (as trackintel datamodels)
         The source dataframe to calculate temporal tracking quality.
 
-    granularity : {"all", "day", "week", "weekday", "hour"}
+    granularity : {"all", "day", "week", "weekday", "hour"} or list of them
         The level of which the tracking quality is calculated. The default "all" returns
         the overall tracking quality; "day" the tracking quality by days; "week" the quality
         by weeks; "weekday" the quality by day of the week (e.g, Mondays, Tuesdays, etc.) and
-        "hour" the quality by hours.
+        "hour" the quality by hours. If a list is given, the quality is calculated for all
+        of the granularities at once.
 
     Returns
     -------
-    quality: DataFrame
-        A per-user per-granularity temporal tracking quality dataframe.
+    quality: DataFrame or dict of DataFrames
+        A per-user per-granularity temporal tracking quality dataframe. If a list of granularities
+        is given, a dictionary with the granularities as keys and the quality dataframes as values.
 
     Notes
     -----
@@ -44,12 +44,22 @@ def temporal_tracking_quality(source, granularity="all"):
     For granularity = ``day`` or ``week``, the quality["day"] or quality["week"] column displays the
     time relative to the first record in the entire dataset.
 
+    Overlapping records of a user only count once: the tracked time is the union of all
+    records of the user. It is therefore safe to pass concatenated datamodels.
+
+    Records are split only once for all requested granularities and the bins are calculated
+    from the integer representation of the timestamps, which makes it cheap to request several
+    granularities in one call.
+
     Examples
     --------
     >>> # calculate overall tracking quality of stps
     >>> temporal_tracking_quality(stps, granularity="all")
     >>> # calculate per-day tracking quality of stps and tpls sequence
     >>> temporal_tracking_quality(stps_tpls, granularity="day")
+    >>> # calculate the tracking quality for several granularities at once
+    >>> quality = temporal_tracking_quality(stps_tpls, granularity=["day", "hour"])
+    >>> quality["hour"]
     """
     required_columns = ["user_id", "started_at", "finished_at"]
     if any([c not in source.columns for c in required_columns]):
@@ -59,148 +69,288 @@ def temporal_tracking_quality(source, granularity="all"):
             % (", ".join(required_columns), ", ".join(source.columns))
         )
 
-    df = source.copy()
-    df.reset_index(inplace=True)
-    if granularity == "all":
-        quality = df.groupby("user_id", as_index=False).apply(_get_tracking_quality_user, granularity)
-
-    elif granularity == "day":
-        # split records that span several days
-        df = _split_overlaps(df, granularity=granularity)
-        # get the tracked day relative to the first day
-        start_date = df["started_at"].min().date()
-        df["day"] = df["started_at"].apply(lambda x: (x.date() - start_date).days)
-
-        # calculate per-user per-day raw tracking quality
-        raw_quality = df.groupby(["user_id", "day"], as_index=False).apply(_get_tracking_quality_user, granularity)
-        # add quality = 0 records
-        quality = _get_all_quality(df, raw_quality, granularity)
+    granularities = _check_granularity(granularity)
 
-    elif granularity == "week":
-        # split records that span several days
-        df = _split_overlaps(df, granularity="day")
-        # get the tracked week relative to the first day
-        start_date = df["started_at"].min().date()
-        df["week"] = df["started_at"].apply(lambda x: (x.date() - start_date).days // 7)
+    # overlapping records (e.g., concatenated staypoints and triplegs) must not be counted twice
+    df = _get_covered_intervals(source[required_columns])
+    quality = {}
+    if "all" in granularities:
+        quality["all"] = _get_tracking_quality_all(df)
 
-        # calculate per-user per-week raw tracking quality
-        raw_quality = df.groupby(["user_id", "week"], as_index=False).apply(_get_tracking_quality_user, granularity)
-        # add quality = 0 records
-        quality = _get_all_quality(df, raw_quality, granularity)
+    binned_granularities = [g for g in granularities if g != "all"]
+    if binned_granularities:
+        # a single split for all granularities, an hour split is also a day split
+        split_granularity = "hour" if "hour" in binned_granularities else "day"
+        df = _split_overlaps(df, granularity=split_granularity)
 
-    elif granularity == "weekday":
-        # split records that span several days
-        df = _split_overlaps(df, granularity="day")
+        # elapsed time from UTC, the local time only determines the bins (differs at DST switches)
+        duration = (_to_utc_ns(df["finished_at"]) - _to_utc_ns(df["started_at"])) / 10**9
+        bins = _get_bins(_to_local_ns(df["started_at"]))
+        for g in binned_granularities:
+            quality[g] = _get_tracking_quality_binned(df["user_id"], duration, bins, g)
 
-        # get the tracked week relative to the first day
-        start_date = df["started_at"].min().date()
-        df["week"] = df["started_at"].apply(lambda x: (x.date() - start_date).days // 7)
-        # get the weekday
-        df["weekday"] = df["started_at"].dt.weekday
+    if isinstance(granularity, (list, tuple)):
+        return {g: quality[g] for g in granularities}
+    return quality[granularity]
 
-        # calculate per-user per-weekday raw tracking quality
-        raw_quality = df.groupby(["user_id", "weekday"], as_index=False).apply(_get_tracking_quality_user, granularity)
-        # add quality = 0 records
-        quality = _get_all_quality(df, raw_quality, granularity)
 
-    elif granularity == "hour":
-        # first do a day split to speed up the hour split
-        df = _split_overlaps(df, granularity="day")
-        df = _split_overlaps(df, granularity=granularity)
+class TrackingQualityAggregator(object):
+    """
+    Incrementally maintain the temporal tracking quality of a growing dataset.
 
-        # get the tracked day relative to the first day
-        start_date = df["started_at"].min().date()
-        df["day"] = df["started_at"].apply(lambda x: (x.date() - start_date).days)
-        # get the hour
-        df["hour"] = df["started_at"].dt.hour
+    The aggregator keeps the covered time per user and (local) hour. New records are merged with the
+    already covered time and only the bins touched by them are updated, the cost of an update is thus
+    proportional to the new records and not to the whole history.
 
-        # calculate per-user per-hour raw tracking quality
-        raw_quality = df.groupby(["user_id", "hour"], as_index=False).apply(_get_tracking_quality_user, granularity)
-        # add quality = 0 records
-        quality = _get_all_quality(df, raw_quality, granularity)
+    Parameters
+    ----------
+    tz : str or tzinfo, optional
+        Timezone in which the bins are calculated. If None, the timezone of the first update is used.
 
-    else:
-        raise AttributeError(
-            f"granularity unknown. We only support ['all', 'day', 'week', 'weekday', 'hour']. You passed {granularity}"
+    Notes
+    -----
+    ``aggregator.quality(granularity)`` returns the same result as calling
+    :func:`trackintel.analysis.tracking_quality.temporal_tracking_quality` with all records passed
+    to ``update`` so far (up to floating point precision).
+
+    Examples
+    --------
+    >>> aggregator = TrackingQualityAggregator()
+    >>> aggregator.update(stps)
+    >>> aggregator.update(tpls)
+    >>> aggregator.quality(granularity="day")
+    >>> # next hour
+    >>> aggregator.update(stps_new)
+    >>> aggregator.quality(granularity=["day", "hour"])
+    """
+
+    def __init__(self, tz=None):
+        self._tz = tz
+        self._tz_known = tz is not None
+        # per user: sorted and non-overlapping covered intervals in UTC ns
+        self._intervals = {}
+        # per user: total covered ns
+        self._covered = {}
+        # per (user, local hour since epoch): covered ns
+        self._covered_bins = {}
+
+    def update(self, source):
+        """
+        Add new records to the aggregator.
+
+        Parameters
+        ----------
+        source : GeoDataFrame (as trackintel datamodels)
+            New records with at least the columns ``['user_id', 'started_at', 'finished_at']``. The records may
+            overlap each other or records that were added before.
+
+        Returns
+        -------
+        TrackingQualityAggregator
+            The aggregator itself.
+
+        Examples
+        --------
+        >>> aggregator.update(stps)
+        """
+        required_columns = ["user_id", "started_at", "finished_at"]
+        if any([c not in source.columns for c in required_columns]):
+            raise KeyError(
+                "To successfully calculate the user-level tracking quality, "
+                + "the source dataframe must have the columns [%s], but it has [%s]."
+                % (", ".join(required_columns), ", ".join(source.columns))
+            )
+        if source.empty:
+            return self
+        if not self._tz_known:
+            self._tz = source["started_at"].dt.tz
+            self._tz_known = True
+
+        new = _get_covered_intervals(source[required_columns])
+        user_codes, users = pd.factorize(new["user_id"])
+        boundaries = np.flatnonzero(np.diff(user_codes)) + 1
+        new_started = np.split(_to_utc_ns(new["started_at"]), boundaries)
+        new_finished = np.split(_to_utc_ns(new["finished_at"]), boundaries)
+
+        # intervals that are replaced (sign -1) and their replacement (sign +1) per user
+        changed = []
+        for user, started, finished in zip(users, new_started, new_finished):
+            old_started, old_finished = self._intervals.get(user, (np.empty(0, dtype="int64"),) * 2)
+            # old intervals that can overlap the new ones
+            lo = np.searchsorted(old_finished, started[0], side="left")
+            hi = np.searchsorted(old_started, finished.max(), side="right")
+            merged_started, merged_finished = _merge_intervals(
+                np.concatenate([old_started[lo:hi], started]), np.concatenate([old_finished[lo:hi], finished])
+            )
+            self._intervals[user] = (
+                np.concatenate([old_started[:lo], merged_started, old_started[hi:]]),
+                np.concatenate([old_finished[:lo], merged_finished, old_finished[hi:]]),
+            )
+            self._covered[user] = (
+                self._covered.get(user, 0)
+                + (merged_finished - merged_started).sum()
+                - (old_finished[lo:hi] - old_started[lo:hi]).sum()
+            )
+            changed.append((user, old_started[lo:hi], old_finished[lo:hi], -1))
+            changed.append((user, merged_started, merged_finished, 1))
+
+        changed = pd.DataFrame(
+            {
+                "user_id": np.concatenate([np.repeat(np.array([c[0]], dtype=object), len(c[1])) for c in changed]),
+                "started_at": _from_utc_ns(np.concatenate([c[1] for c in changed]), self._tz),
+                "finished_at": _from_utc_ns(np.concatenate([c[2] for c in changed]), self._tz),
+                "sign": np.concatenate([np.full(len(c[1]), c[3]) for c in changed]),
+            }
         )
+        changed = _split_overlaps(changed, granularity="hour")
+        # elapsed time from UTC, the local time only determines the bins (differs at DST switches)
+        duration = _to_utc_ns(changed["finished_at"]) - _to_utc_ns(changed["started_at"])
+        changed["duration"] = duration * changed["sign"].values
+        changed["hour"] = _to_local_ns(changed["started_at"]) // (60 * 60 * 10**9)
+        for key, duration in changed.groupby(["user_id", "hour"], sort=False)["duration"].sum().items():
+            self._covered_bins[key] = self._covered_bins.get(key, 0) + duration
+        return self
+
+    def quality(self, granularity="all"):
+        """
+        Return the temporal tracking quality of all records added so far.
+
+        Parameters
+        ----------
+        granularity : {"all", "day", "week", "weekday", "hour"} or list of them
+            See :func:`trackintel.analysis.tracking_quality.temporal_tracking_quality`.
+
+        Returns
+        -------
+        quality: DataFrame or dict of DataFrames
+            See :func:`trackintel.analysis.tracking_quality.temporal_tracking_quality`.
+
+        Examples
+        --------
+        >>> aggregator.quality(granularity="week")
+        """
+        granularities = _check_granularity(granularity)
+        users = pd.Index(list(self._intervals.keys()))
+        quality = {}
+        if "all" in granularities:
+            extent = np.array([v[1][-1] - v[0][0] for v in self._intervals.values()])
+            covered = np.array([self._covered[user] for user in users])
+            quality["all"] = (
+                pd.DataFrame({"user_id": users, "quality": covered / extent})
+                .sort_values("user_id")
+                .reset_index(drop=True)
+            )
 
-    return quality
+        binned_granularities = [g for g in granularities if g != "all"]
+        if binned_granularities:
+            df = pd.DataFrame(list(self._covered_bins.keys()), columns=["user_id", "hour"])
+            df["duration"] = np.array(list(self._covered_bins.values()), dtype="int64") / 10**9
+            # users in the order of their first appearance
+            df = df.iloc[np.argsort(users.get_indexer(df["user_id"]), kind="stable")]
+            bins = _get_bins(df["hour"].values * (60 * 60 * 10**9))
+            for g in binned_granularities:
+                quality[g] = _get_tracking_quality_binned(df["user_id"], df["duration"].values, bins, g)
+
+        if isinstance(granularity, (list, tuple)):
+            return {g: quality[g] for g in granularities}
+        return quality[granularity]
+
+
+def _check_granularity(granularity):
+    """Return the granularity as list and raise an AttributeError for unknown granularities."""
+    granularities = list(granularity) if isinstance(granularity, (list, tuple)) else [granularity]
+    for g in granularities:
+        if g not in ["all", "day", "week", "weekday", "hour"]:
+            raise AttributeError(
+                f"granularity unknown. We only support ['all', 'day', 'week', 'weekday', 'hour']. You passed {g}"
+            )
+    return granularities
 
 
-def _get_all_quality(df, raw_quality, granularity):
-    """
-    Add tracking quality values for empty bins.
+def _get_bins(started_at):
+    """Return the day, week, weekday and hour bins of local timestamps given as int64 ns."""
+    # days since epoch in local time, and relative to the first day in the dataset
+    epoch_day = started_at // (60 * 60 * 24 * 10**9)
+    day = epoch_day - epoch_day.min()
+    return {
+        "day": day,
+        "week": day // 7,
+        # 1970-01-01 was a thursday
+        "weekday": (epoch_day + 3) % 7,
+        "hour": (started_at // (60 * 60 * 10**9)) % 24,
+    }
 
-    raw_quality is calculated using `groupby` and does not report bins (=granularties) with
-    quality = 0. This function adds these values.
+
+def _get_tracking_quality_all(df):
+    """
+    Overall tracking quality per-user.
 
     Parameters
     ----------
-    df : GeoDataFrame (as trackintel datamodels)
-
-    raw_quality: DataFrame
-        The calculated raw tracking quality directly from the groupby operations.
-
-    granularity : {"all", "day", "weekday", "week", "hour"}
-        Used for accessing the column in raw_quality.
+    df : DataFrame
+        With columns ``['user_id', 'started_at', 'finished_at']``.
 
     Returns
     -------
-    quality: pandas.Series
-        A pandas.Series object containing the tracking quality
+    quality: DataFrame
+        With columns ``['user_id', 'quality']``.
     """
-    all_users = df["user_id"].unique()
-    all_granularity = np.arange(df[granularity].max() + 1)
-    # construct array containing all user and granularity combinations
-    all_combi = np.array(np.meshgrid(all_users, all_granularity)).T.reshape(-1, 2)
-    # the records with no corresponding raw_quality is nan, and transformed into 0
-    all_combi = pd.DataFrame(all_combi, columns=["user_id", granularity])
-    quality = all_combi.merge(raw_quality, how="left", on=["user_id", granularity], validate="one_to_one")
-    quality.fillna(0, inplace=True)
-    return quality
-
-
-def _get_tracking_quality_user(df, granularity="all"):
+    df = df.assign(duration=(df["finished_at"] - df["started_at"]).dt.total_seconds())
+    user = df.groupby("user_id").agg({"duration": "sum", "started_at": "min", "finished_at": "max"})
+    extent = (user["finished_at"] - user["started_at"]).dt.total_seconds()
+    quality = (user["duration"] / extent).rename("quality")
+    return quality.reset_index()
+
+
+def _get_tracking_quality_binned(user_id, duration, bins, granularity):
     """
-    Tracking quality per-user per-granularity.
+    Tracking quality per-user per-granularity calculated with grouped sums.
 
     Parameters
     ----------
-    df : GeoDataFrame (as trackintel datamodels)
-        The source dataframe
+    user_id : pd.Series
+        The user of each (split) record.
+
+    duration : np.array
+        The duration of each (split) record in seconds.
 
-    granularity : {"all", "day", "weekday", "week", "hour"}, default "all"
-        Determines the extent of the tracking. "all" the entire tracking period,
-        "day" and "weekday" a whole day, "week" a whole week, and "hour" a whole hour.
+    bins : dict
+        The bin of each record as np.array for the granularities "day", "week", "weekday" and "hour".
+
+    granularity : {"day", "week", "weekday", "hour"}
 
     Returns
     -------
-    pandas.Series
-        A pandas.Series object containing the tracking quality
+    quality: DataFrame
+        With columns ``['user_id', granularity, 'quality']``, containing all combinations of users and bins
+        (bins that are not tracked have quality = 0).
     """
-    tracked_duration = (df["finished_at"] - df["started_at"]).dt.total_seconds().sum()
-    if granularity == "all":
-        # the whole tracking period
-        extent = (df["finished_at"].max() - df["started_at"].min()).total_seconds()
-    elif granularity == "day":
-        # total seconds in a day
+    df = pd.DataFrame({"user_id": user_id.values, granularity: bins[granularity], "duration": duration})
+    if granularity == "weekday":
+        # entries from multiple weeks may be grouped together
+        df["extent_bin"] = bins["week"]
+    elif granularity == "hour":
+        # entries from multiple days may be grouped together
+        df["extent_bin"] = bins["day"]
+
+    grouped = df.groupby(["user_id", granularity])
+    tracked = grouped["duration"].sum()
+    if granularity == "day":
         extent = 60 * 60 * 24
-    elif granularity == "weekday":
-        # total seconds in an day * number of tracked weeks
-        # (entries from multiple weeks may be grouped together)
-        extent = 60 * 60 * 24 * (df["week"].max() - df["week"].min() + 1)
     elif granularity == "week":
-        # total seconds in a week
         extent = 60 * 60 * 24 * 7
-    elif granularity == "hour":
-        # total seconds in an hour * number of tracked days
-        # (entries from multiple days may be grouped together)
-        extent = (60 * 60) * (df["day"].max() - df["day"].min() + 1)
+    elif granularity == "weekday":
+        extent = 60 * 60 * 24 * (grouped["extent_bin"].max() - grouped["extent_bin"].min() + 1)
     else:
-        raise AttributeError(
-            f"granularity unknown. We only support ['all', 'day', 'week', 'weekday', 'hour']. You passed {granularity}"
-        )
-    return pd.Series([tracked_duration / extent], index=["quality"])
+        extent = 60 * 60 * (grouped["extent_bin"].max() - grouped["extent_bin"].min() + 1)
+    quality = (tracked / extent).rename("quality")
+
+    # add quality = 0 records for all user and granularity combinations
+    all_combi = pd.MultiIndex.from_product(
+        [user_id.unique(), np.arange(df[granularity].max() + 1)], names=["user_id", granularity]
+    )
+    quality = quality.reindex(all_combi, fill_value=0)
+    return quality.reset_index()
 
 
 def _split_overlaps(source, granularity="day"):
@@ -220,32 +370,45 @@ def _split_overlaps(source, granularity="day"):
     -------
     GeoDataFrame (as trackintel datamodels)
         The GeoDataFrame object after the splitting
-    """
-    df = source.copy()
-    change_flag = __get_split_index(df, granularity=granularity)
-
-    # Iteratively split one day/hour from multi day/hour entries until no entry spans over multiple days/hours
-    while change_flag.sum() > 0:
 
-        # calculate new finished_at timestamp (00:00 midnight)
-        finished_at_temp = df.loc[change_flag, "finished_at"].copy()
-        if granularity == "day":
-            df.loc[change_flag, "finished_at"] = df.loc[change_flag, "started_at"].apply(
-                lambda x: x.replace(hour=23, minute=59, second=59) + datetime.timedelta(seconds=1)
-            )
-        elif granularity == "hour":
-            df.loc[change_flag, "finished_at"] = df.loc[change_flag, "started_at"].apply(
-                lambda x: x.replace(minute=59, second=59) + datetime.timedelta(seconds=1)
-            )
-
-        # create new entries with remaining timestamp
-        new_df = df.loc[change_flag].copy()
-        new_df.loc[change_flag, "started_at"] = df.loc[change_flag, "finished_at"]
-        new_df.loc[change_flag, "finished_at"] = finished_at_temp
-
-        df = df.append(new_df, ignore_index=True, sort=True)
+    Notes
+    -----
+    The split is done in a single pass: every record is repeated once per day (hour) it covers
+    and the boundaries of the parts are calculated on the int64 representation of the timestamps.
+    Days and hours are defined in the local time of the timestamps.
+    """
+    if granularity == "day":
+        freq = 60 * 60 * 24 * 10**9
+    elif granularity == "hour":
+        freq = 60 * 60 * 10**9
+    else:
+        raise AttributeError(f"granularity unknown. We only support ['day', 'hour']. You passed {granularity}")
 
-        change_flag = __get_split_index(df, granularity=granularity)
+    df = source.copy()
+    tz = df["started_at"].dt.tz
+
+    # local time in ns, days and hours are counted in local time
+    started_at = _to_local_ns(df["started_at"])
+    finished_at = _to_local_ns(df["finished_at"])
+    start_bin = started_at // freq
+    # a record that finishes exactly at midnight (full hour) does not cover the next day (hour)
+    end_bin = (finished_at - 10**9) // freq
+    nb_parts = np.maximum(end_bin - start_bin + 1, 1)
+
+    if (nb_parts == 1).all():
+        return df
+
+    # repeat every record once per day (hour) it covers
+    record = np.repeat(np.arange(len(df)), nb_parts)
+    part = np.arange(len(record)) - np.repeat(np.cumsum(nb_parts) - nb_parts, nb_parts)
+    bin_start = (start_bin[record] + part) * freq
+    is_first = part == 0
+    is_last = part == nb_parts[record] - 1
+
+    df = df.iloc[record].reset_index(drop=True)
+    # the first part keeps the original start, the last part the original end
+    df.loc[~is_first, "started_at"] = _from_local_ns(bin_start[~is_first], tz)
+    df.loc[~is_last, "finished_at"] = _from_local_ns(bin_start[~is_last] + freq, tz)
 
     if "duration" in df.columns:
         df["duration"] = df["finished_at"] - df["started_at"]
@@ -253,28 +416,81 @@ def _split_overlaps(source, granularity="day"):
     return df
 
 
-def __get_split_index(df, granularity="day"):
+def _get_covered_intervals(df):
     """
-    Get the index that needs to be splitted.
+    Merge the overlapping records of each user into non-overlapping intervals.
+
+    Sweeps once over the records sorted by user and start time (O(n log n)): a record starts a new
+    interval if it starts after the latest end of all previous records of the same user.
 
     Parameters
     ----------
-    df : GeoDataFrame (as trackintel datamodels)
-        The source to perform the split.
-
-    granularity : {'day', 'hour'}, default 'day'
-        The criteria of spliting. "day" splits records that have duration of several
-        days and "hour" splits records that have duration of several hours.
+    df : DataFrame
+        With columns ``['user_id', 'started_at', 'finished_at']``.
 
     Returns
     -------
-    change_flag: pd.Series
-        Boolean index indicating which records needs to be splitted
+    DataFrame
+        With columns ``['user_id', 'started_at', 'finished_at']`` and a fresh index, the intervals are
+        ordered by the first appearance of the users in df and by their start time.
     """
-    change_flag = df["started_at"].dt.date != (df["finished_at"] - pd.to_timedelta("1s")).dt.date
-    if granularity == "hour":
-        hour_flag = df["started_at"].dt.hour != (df["finished_at"] - pd.to_timedelta("1s")).dt.hour
-        # union of day and hour change flag
-        change_flag = change_flag | hour_flag
-
-    return change_flag
+    if df.empty:
+        return df.reset_index(drop=True)
+    user_codes, users = pd.factorize(df["user_id"])
+    # UTC nanoseconds, independent of the timezone of the records
+    started_at = _to_utc_ns(df["started_at"])
+    finished_at = _to_utc_ns(df["finished_at"])
+
+    order = np.lexsort((started_at, user_codes))
+    user_codes, started_at, finished_at = user_codes[order], started_at[order], finished_at[order]
+
+    # latest end of all previous records of the same user
+    prev_finished_at = pd.Series(finished_at).groupby(user_codes).cummax().groupby(user_codes).shift(1)
+    new_interval = (started_at > prev_finished_at.values) | prev_finished_at.isna().values
+    interval_start = np.flatnonzero(new_interval)
+
+    covered = pd.DataFrame(
+        {
+            "user_id": users.take(user_codes[interval_start]),
+            "started_at": _from_utc_ns(started_at[interval_start], df["started_at"].dt.tz),
+            "finished_at": _from_utc_ns(np.maximum.reduceat(finished_at, interval_start), df["finished_at"].dt.tz),
+        }
+    )
+    return covered
+
+
+def _merge_intervals(started_at, finished_at):
+    """Merge the intervals of a single user given as int64 arrays, returns sorted non-overlapping intervals."""
+    order = np.argsort(started_at, kind="stable")
+    started_at, finished_at = started_at[order], finished_at[order]
+    prev_finished_at = np.maximum.accumulate(finished_at)[:-1]
+    interval_start = np.flatnonzero(np.concatenate([[True], started_at[1:] > prev_finished_at]))
+    return started_at[interval_start], np.maximum.reduceat(finished_at, interval_start)
+
+
+def _to_utc_ns(dt_series):
+    """Return a datetime series as int64 nanoseconds (UTC for timezone aware series)."""
+    return dt_series.values.astype("datetime64[ns]").astype("int64")
+
+
+def _from_utc_ns(values, tz):
+    """Inverse of _to_utc_ns()."""
+    dt = pd.DatetimeIndex(values.astype("datetime64[ns]"))
+    if tz is not None:
+        dt = dt.tz_localize("UTC").tz_convert(tz)
+    return dt
+
+
+def _to_local_ns(dt_series):
+    """Return the local time of a datetime series as int64 nanoseconds."""
+    if dt_series.dt.tz is not None:
+        dt_series = dt_series.dt.tz_localize(None)
+    return dt_series.values.astype("int64")
+
+
+def _from_local_ns(values, tz):
+    """Inverse of _to_local_ns(), ambiguous and nonexistent local times (DST) are resolved to standard time."""
+    dt = pd.DatetimeIndex(values.astype("datetime64[ns]"))
+    if tz is not None:
+        dt = dt.tz_localize(tz, ambiguous=np.zeros(len(dt), dtype=bool), nonexistent="shift_forward")
+    return dt
@@ -1,16 +1,27 @@
 import multiprocessing
+import sys
 import warnings
-from functools import partial
+import weakref
+from collections import OrderedDict
+from functools import lru_cache, partial
 from math import cos, pi
 
+import geopandas as gpd
 import numpy as np
 import pandas as pd
+from pyproj import CRS
 from scipy.spatial.distance import cdist
+import shapely
+from shapely.geometry import Point, Polygon, box
 from sklearn.metrics import pairwise_distances
 import similaritymeasures
 
 from trackintel.geogr.point_distances import haversine_dist
 
+# reprojections done by check_gdf_crs(transform=True), see set_reprojection_cache()
+_reprojection_cache = OrderedDict()
+_reprojection_cache_settings = {"max_entries": 16, "max_memory": 256 * 2**20}
+
 
 def calculate_distance_matrix(X, Y=None, dist_metric="haversine", n_jobs=0, **kwds):
     """
@@ -210,6 +221,12 @@ def check_gdf_crs(gdf, transform=False):
     --------
     >>> from trackintel.geogr.distances import check_gdf_crs
     >>> check_gdf_crs(triplegs, transform=False)
+
+    Notes
+    -----
+    Reprojections are cached, such that transforming the same (unchanged) GeoDataFrame repeatedly, e.g., when
+    plotting it several times, only reprojects it once. See
+    :func:`trackintel.geogr.distances.set_reprojection_cache` to configure the cache.
     """
     if_planer = False
     if gdf.crs is None:
@@ -229,7 +246,7 @@ def check_gdf_crs(gdf, transform=False):
         if_planer = True
         if transform:
             if_planer = False
-            gdf = gdf.to_crs("EPSG:4326")
+            gdf = _to_crs_cached(gdf, "EPSG:4326")
 
     if transform:
         return if_planer, gdf
@@ -258,8 +275,199 @@ def calculate_haversine_length(gdf):
     """
     assert all(gdf.geom_type == "LineString")
 
-    length = gdf.geometry.apply(_calculate_haversine_length_single)
-    return length
+    # all segments of all linestrings in one call to haversine_dist
+    coords = [np.asarray(geom.coords)[:, :2] for geom in gdf.geometry]
+    geom_idx = np.repeat(np.arange(len(coords)), [len(c) for c in coords])
+    if len(geom_idx) > 0:
+        coords = np.concatenate(coords)
+        dist = haversine_dist(coords[:-1, 0], coords[:-1, 1], coords[1:, 0], coords[1:, 1])
+        # only consecutive points of the same linestring form a segment
+        same_geom = geom_idx[:-1] == geom_idx[1:]
+        length = np.bincount(geom_idx[:-1][same_geom], weights=dist[same_geom], minlength=len(gdf))
+    else:
+        length = np.zeros(len(gdf))
+    return pd.Series(length, index=gdf.index, name=gdf.geometry.name)
+
+
+def get_metric_crs(gdf, method="utm"):
+    """
+    Get a local metric coordinate reference system that suits the extent of a GeoDataFrame.
+
+    Parameters
+    ----------
+    gdf : GeoDataFrame
+        The data for which the crs is chosen. GeoDataFrames without crs are assumed to be in WGS84.
+
+    method : {'utm', 'laea'}, default 'utm'
+        - 'utm' : the UTM zone that contains the center of the data.
+        - 'laea' : a Lambert azimuthal equal-area projection centered on the data (rounded to 0.1 degree).
+
+    Returns
+    -------
+    crs : pyproj.CRS
+        The metric crs. The same object is returned for all data that falls into the same zone.
+
+    Notes
+    -----
+    Planar calculations in the returned crs are much faster than their haversine counterparts but are only
+    accurate close to the center of the projection. Within a UTM zone, the scale error is below 0.1%. It grows
+    to ~0.5% at 6 degrees longitude from the central meridian of the zone, beyond which a warning is raised.
+    For data covering a larger extent, use :func:`trackintel.geogr.distances.split_to_metric_crs` to project each
+    user separately.
+
+    Examples
+    --------
+    >>> from trackintel.geogr.distances import get_metric_crs
+    >>> get_metric_crs(staypoints)
+    <Projected CRS: EPSG:32632>
+    """
+    minx, miny, maxx, maxy = _get_wgs84_bounds(gdf)
+    lon = np.array([(minx + maxx) / 2])
+    lat = np.array([(miny + maxy) / 2])
+    key = _get_metric_crs_keys(lon, lat, method)[0]
+
+    if method == "utm":
+        central_meridian = (key[1] - 1) * 6 - 177
+        if max(abs(minx - central_meridian), abs(maxx - central_meridian)) > 6:
+            warnings.warn(
+                "The data extends more than 6 degrees longitude from the central meridian of the chosen UTM zone. "
+                "Planar distances can be distorted by more than 0.5%."
+            )
+    return _create_metric_crs(*key)
+
+
+def to_metric_crs(gdf, method="utm"):
+    """
+    Project a GeoDataFrame into a local metric coordinate reference system.
+
+    The projected data can be passed to all trackintel functions that support planar coordinates (e.g.,
+    ``predict_transport_mode``, ``calculate_modal_split`` or ``generate_locations`` with
+    ``distance_metric="euclidean"``), which then use fast euclidean array operations instead of the haversine
+    distance.
+
+    Parameters
+    ----------
+    gdf : GeoDataFrame
+        The data to project. GeoDataFrames without crs are assumed to be in WGS84.
+
+    method : {'utm', 'laea'}, default 'utm'
+        How to choose the metric crs, see :func:`trackintel.geogr.distances.get_metric_crs`.
+
+    Returns
+    -------
+    GeoDataFrame
+        A copy of gdf in the chosen metric crs.
+
+    Notes
+    -----
+    The reprojected geometries share the cache of ``check_gdf_crs(gdf, transform=True)``, repeated calls with
+    the same (unchanged) GeoDataFrame only reproject it once. See
+    :func:`trackintel.geogr.distances.set_reprojection_cache` to configure the cache.
+
+    Examples
+    --------
+    >>> from trackintel.geogr.distances import to_metric_crs
+    >>> tpls_metric = to_metric_crs(tpls)
+    >>> tpls_metric.as_triplegs.predict_transport_mode()
+    """
+    gdf = _set_default_crs(gdf)
+    crs = get_metric_crs(gdf, method=method)
+    if gdf.crs == crs:
+        return gdf.copy()
+    return _to_crs_cached(gdf, crs)
+
+
+def split_to_metric_crs(gdf, by="user_id", method="utm"):
+    """
+    Project each partition of a GeoDataFrame into a metric crs that suits its own extent.
+
+    Partitions that fall into the same zone share a crs and are projected together with a single call.
+
+    Parameters
+    ----------
+    gdf : GeoDataFrame
+        The data to project. GeoDataFrames without crs are assumed to be in WGS84.
+
+    by : str, default 'user_id'
+        The column defining the partitions, e.g., the users.
+
+    method : {'utm', 'laea'}, default 'utm'
+        How to choose the metric crs, see :func:`trackintel.geogr.distances.get_metric_crs`.
+
+    Returns
+    -------
+    dict
+        A dictionary with the chosen pyproj.CRS as keys and the projected GeoDataFrames as values. The rows keep
+        their index, i.e., ``pd.concat`` on results calculated from the values restores the original order
+        with ``.loc[gdf.index]``.
+
+    Examples
+    --------
+    >>> from trackintel.geogr.distances import split_to_metric_crs
+    >>> parts = split_to_metric_crs(tpls, by="user_id")
+    >>> tpls = pd.concat([part.as_triplegs.predict_transport_mode() for part in parts.values()])
+    """
+    gdf = _set_default_crs(gdf)
+    wgs84 = gdf if gdf.crs == "EPSG:4326" else gdf.to_crs("EPSG:4326")
+
+    # extent of each partition
+    bounds = wgs84.bounds
+    bounds[by] = gdf[by].values
+    bounds = bounds.groupby(by).agg({"minx": "min", "miny": "min", "maxx": "max", "maxy": "max"})
+    lon = ((bounds["minx"] + bounds["maxx"]) / 2).values
+    lat = ((bounds["miny"] + bounds["maxy"]) / 2).values
+    keys = pd.Series(_get_metric_crs_keys(lon, lat, method), index=bounds.index)
+
+    # project all partitions that share a crs at once
+    row_keys = gdf[by].map(keys)
+    return {_create_metric_crs(*key): gdf[row_keys == key].to_crs(_create_metric_crs(*key)) for key in keys.unique()}
+
+
+def set_reprojection_cache(max_entries=16, max_memory=256 * 2**20):
+    """
+    Configure the cache of reprojected GeoDataFrames used by ``check_gdf_crs(gdf, transform=True)`` and
+    ``to_metric_crs``.
+
+    Parameters
+    ----------
+    max_entries : int, default 16
+        Maximal number of cached reprojections. The least recently used ones are evicted first.
+        Set to 0 to disable caching.
+
+    max_memory : int, default 256 * 2**20 (256 MiB)
+        Maximal (approximate) memory of all cached reprojections in bytes.
+
+    Notes
+    -----
+    An entry is identified by the input GeoDataFrame object, a fingerprint of its geometries (their number and
+    total bounds), its crs and the target crs. Only the reprojected geometries are cached, they are attached to a
+    copy of the current attribute columns of the input. Entries are dropped as soon as the input GeoDataFrame is
+    garbage collected. Changes of the geometries that keep their number and total bounds are not detected, call
+    :func:`trackintel.geogr.distances.clear_reprojection_cache` after modifying geometries in place.
+
+    The memory of the reprojected geometries is estimated with 16 bytes per coordinate plus the overhead of the
+    geometry objects.
+
+    Examples
+    --------
+    >>> from trackintel.geogr.distances import set_reprojection_cache
+    >>> set_reprojection_cache(max_entries=4, max_memory=2**30)
+    """
+    _reprojection_cache_settings["max_entries"] = max_entries
+    _reprojection_cache_settings["max_memory"] = max_memory
+    _evict_reprojection_cache()
+
+
+def clear_reprojection_cache():
+    """
+    Remove all entries from the cache of reprojected GeoDataFrames.
+
+    Examples
+    --------
+    >>> from trackintel.geogr.distances import clear_reprojection_cache
+    >>> clear_reprojection_cache()
+    """
+    _reprojection_cache.clear()
 
 
 def _calculate_haversine_length_single(linestring):
@@ -290,3 +498,134 @@ def _calculate_haversine_length_single(linestring):
 
     distances = haversine_dist(coords_df.x_0, coords_df.y_0, coords_df.x_1, coords_df.y_1)
     return np.sum(distances)
+
+
+def _set_default_crs(gdf):
+    """Return gdf, with WGS84 as crs if it has none."""
+    if gdf.crs is None:
+        warnings.warn("Your data is not projected. WGS84 is assumed.")
+        return gdf.set_crs("EPSG:4326")
+    return gdf
+
+
+def _get_wgs84_bounds(gdf):
+    """Return the total bounds of a GeoDataFrame in WGS84."""
+    gdf = _set_default_crs(gdf)
+    bounds = gdf.total_bounds
+    if gdf.crs == "EPSG:4326":
+        return bounds
+    # only the bounding box has to be transformed
+    return gpd.GeoSeries([box(*bounds)], crs=gdf.crs).to_crs("EPSG:4326").total_bounds
+
+
+def _get_metric_crs_keys(lon, lat, method):
+    """
+    Get hashable keys identifying the metric crs for arrays of center coordinates.
+
+    Parameters
+    ----------
+    lon, lat : numpy.array
+        Center coordinates in WGS84.
+
+    method : {'utm', 'laea'}
+
+    Returns
+    -------
+    list of tuples
+        The arguments for _create_metric_crs().
+    """
+    if method == "utm":
+        zones = (np.floor((lon + 180) / 6).astype(int) % 60) + 1
+        return [("utm", int(zone), bool(south)) for zone, south in zip(zones, lat < 0)]
+    elif method == "laea":
+        # round the center, such that nearby partitions share a crs
+        return [("laea", float(x), float(y)) for x, y in zip(np.round(lon, 1), np.round(lat, 1))]
+    else:
+        raise AttributeError(f"Method unknown. We only support ['utm', 'laea']. You passed {method}")
+
+
+@lru_cache(maxsize=None)
+def _create_metric_crs(method, x, y):
+    """Create (and cache) the metric crs, see _get_metric_crs_keys() for the arguments."""
+    if method == "utm":
+        return CRS.from_epsg((32700 if y else 32600) + x)
+    return CRS.from_proj4(f"+proj=laea +lat_0={y} +lon_0={x} +x_0=0 +y_0=0 +datum=WGS84 +units=m +no_defs")
+
+
+def _to_crs_cached(gdf, crs):
+    """
+    Reproject gdf to crs, serving identical reprojections of the geometries from the cache.
+
+    Only the reprojected geometries are cached, they are attached to a copy of the current attribute columns.
+
+    Parameters
+    ----------
+    gdf : GeoDataFrame
+        The data to reproject.
+
+    crs : str or pyproj.CRS
+        The target crs.
+
+    Returns
+    -------
+    GeoDataFrame
+        A copy of gdf reprojected to crs.
+    """
+    if _reprojection_cache_settings["max_entries"] <= 0:
+        return gdf.to_crs(crs)
+
+    # the geometries are identified by a cheap fingerprint instead of comparing them
+    key = (id(gdf), len(gdf), tuple(gdf.total_bounds), gdf.crs.to_wkt(), str(crs))
+
+    entry = _reprojection_cache.get(key)
+    # ids can be reused by new objects, the weak reference ensures that it is the same frame
+    if entry is not None and entry[0]() is gdf:
+        _reprojection_cache.move_to_end(key)
+        projected = entry[1]
+    else:
+        projected = gdf.geometry.to_crs(crs).values
+        memory = _geometry_memory(projected)
+        if memory <= _reprojection_cache_settings["max_memory"]:
+            # drop the entry as soon as the input frame is garbage collected
+            ref = weakref.ref(gdf, lambda _: _reprojection_cache.pop(key, None))
+            _reprojection_cache[key] = (ref, projected, memory)
+            _evict_reprojection_cache()
+
+    result = gdf.copy()
+    result[gdf.geometry.name] = gpd.GeoSeries(projected.copy(), index=gdf.index, crs=crs)
+    return result
+
+
+def _evict_reprojection_cache():
+    """Remove the least recently used reprojections until the cache fits the limits."""
+    settings = _reprojection_cache_settings
+    while len(_reprojection_cache) > max(settings["max_entries"], 0) or (
+        sum(entry[-1] for entry in _reprojection_cache.values()) > settings["max_memory"]
+    ):
+        _reprojection_cache.popitem(last=False)
+
+
+def _geometry_memory(geometries):
+    """Approximate memory of a GeometryArray in bytes, 16 bytes per coordinate plus the geometry objects."""
+    if hasattr(shapely, "get_num_coordinates"):
+        n_coordinates = shapely.get_num_coordinates(np.asarray(geometries)).sum()
+    elif gpd.options.use_pygeos:
+        import pygeos
+
+        n_coordinates = pygeos.get_num_coordinates(geometries.data).sum()
+    else:
+        n_coordinates = sum(_count_coordinates(geom) for geom in geometries)
+    return int(n_coordinates) * 16 + len(geometries) * (sys.getsizeof(object()) + np.dtype(object).itemsize)
+
+
+def _count_coordinates(geom):
+    """Number of coordinates of a single geometry (shapely<2 has no vectorized version)."""
+    if isinstance(geom, Point):
+        return 1
+    if geom is None or geom.is_empty:
+        return 0
+    if hasattr(geom, "geoms"):
+        return sum(_count_coordinates(part) for part in geom.geoms)
+    if isinstance(geom, Polygon):
+        return len(geom.exterior.coords) + sum(len(ring.coords) for ring in geom.interiors)
+    return len(geom.coords)
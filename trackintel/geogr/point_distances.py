@@ -1,7 +1,7 @@
 import numpy as np
 
 
-def haversine_dist(lon_1, lat_1, lon_2, lat_2, r=6371000):
+def haversine_dist(lon_1, lat_1, lon_2, lat_2, r=6371000, dtype=np.float64, out=None):
     """
     Compute the great circle or haversine distance between two coordinates in WGS84.
 
@@ -25,29 +25,145 @@ def haversine_dist(lon_1, lat_1, lon_2, lat_2, r=6371000):
         Radius of the reference sphere for the calculation.
         The average Earth radius is 6'371'000 m.
 
+    dtype : numpy.dtype, default numpy.float64
+        Floating point type used for the calculation. ``numpy.float32`` halves the memory footprint for large
+        batches at the cost of precision (roughly 1 m for coordinates in degrees).
+
+    out : numpy.array, optional
+        Preallocated array of the broadcast shape of the inputs and of type ``dtype`` to write the result to.
+
     Returns
     -------
-    float
+    numpy.array
         An approximation of the distance between two points in WGS84 given in meters.
 
+    Notes
+    -----
+    The distance is calculated with the ``arcsin`` formulation of the haversine formula, which is numerically
+    stable for short distances (in contrast to the spherical law of cosines). Apart from ``out`` and the
+    conversion of the inputs to ``dtype``, only three temporary arrays are allocated.
+
+    If you query many points against the same coordinates, see
+    :func:`trackintel.geogr.point_distances.prepare_haversine_coords`.
+
     Examples
     --------
     >>> haversine_dist(8.5, 47.3, 8.7, 47.2)
-    18749.056277719905
+    array([18749.05627772])
 
     References
     ----------
     https://en.wikipedia.org/wiki/Haversine_formula
     https://stackoverflow.com/questions/19413259/efficient-way-to-calculate-distance-matrix-given-latitude-and-longitude-data-in
     """
-    lon_1 = np.asarray(lon_1).ravel() * np.pi / 180
-    lat_1 = np.asarray(lat_1).ravel() * np.pi / 180
-    lon_2 = np.asarray(lon_2).ravel() * np.pi / 180
-    lat_2 = np.asarray(lat_2).ravel() * np.pi / 180
+    lon_1 = np.asarray(lon_1, dtype=dtype).ravel()
+    lat_1 = np.asarray(lat_1, dtype=dtype).ravel()
+    lon_2 = np.asarray(lon_2, dtype=dtype).ravel()
+    lat_2 = np.asarray(lat_2, dtype=dtype).ravel()
+
+    cos_lat_1 = np.radians(lat_1)
+    np.cos(cos_lat_1, out=cos_lat_1)
+    cos_lat_2 = np.radians(lat_2)
+    np.cos(cos_lat_2, out=cos_lat_2)
+
+    # the coordinate differences are directly calculated in degrees and scaled afterwards
+    return _haversine_kernel(lon_1, lat_1, cos_lat_1, lon_2, lat_2, cos_lat_2, r, np.pi / 180, dtype, out)
+
+
+def prepare_haversine_coords(lon, lat, dtype=np.float64):
+    """
+    Precompute the radians and the cosine of the latitude for repeated haversine distance queries.
+
+    Parameters
+    ----------
+    lon : float or numpy.array of shape (-1,)
+        The longitude of the points.
+
+    lat : float or numpy.array of shape (-1,)
+        The latitude of the points.
+
+    dtype : numpy.dtype, default numpy.float64
+        Floating point type of the returned arrays.
+
+    Returns
+    -------
+    tuple of numpy.array
+        ``(lon_rad, lat_rad, cos_lat)`` the longitude and latitude in radians and the cosine of the latitude.
+
+    Examples
+    --------
+    >>> anchor = prepare_haversine_coords(8.5, 47.3)
+    >>> others = prepare_haversine_coords(pfs.geometry.x, pfs.geometry.y)
+    >>> haversine_dist_prepared(anchor, others)
+    """
+    lon_rad = np.radians(np.asarray(lon, dtype=dtype).ravel())
+    lat_rad = np.radians(np.asarray(lat, dtype=dtype).ravel())
+    return lon_rad, lat_rad, np.cos(lat_rad)
+
+
+def haversine_dist_prepared(coords_1, coords_2, r=6371000, out=None):
+    """
+    Compute the haversine distance between coordinates prepared with `prepare_haversine_coords`.
+
+    Parameters
+    ----------
+    coords_1 : tuple of numpy.array
+        The first points as returned by :func:`trackintel.geogr.point_distances.prepare_haversine_coords`.
+
+    coords_2 : tuple of numpy.array
+        The second points as returned by :func:`trackintel.geogr.point_distances.prepare_haversine_coords`.
+
+    r : float
+        Radius of the reference sphere for the calculation.
+        The average Earth radius is 6'371'000 m.
+
+    out : numpy.array, optional
+        Preallocated array of the broadcast shape of the inputs to write the result to.
+
+    Returns
+    -------
+    numpy.array
+        An approximation of the distance between two points in WGS84 given in meters.
+
+    Examples
+    --------
+    >>> anchor = prepare_haversine_coords(8.5, 47.3)
+    >>> haversine_dist_prepared(anchor, prepare_haversine_coords(8.7, 47.2))
+    array([18749.05627772])
+    """
+    lon_1, lat_1, cos_lat_1 = coords_1
+    lon_2, lat_2, cos_lat_2 = coords_2
+    dtype = np.result_type(lon_1, lon_2)
+    return _haversine_kernel(lon_1, lat_1, cos_lat_1, lon_2, lat_2, cos_lat_2, r, 1, dtype, out)
+
+
+def _haversine_kernel(lon_1, lat_1, cos_lat_1, lon_2, lat_2, cos_lat_2, r, scale, dtype, out):
+    """Haversine distance (arcsin formula) with in-place operations, see haversine_dist() for parameter meaning.
+
+    The coordinate differences are multiplied with 'scale' to convert them to radians.
+    """
+    shape = np.broadcast(lon_1, lat_1, lon_2, lat_2).shape
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+
+    # a = sin²(Δlat / 2) + cos(lat_1) * cos(lat_2) * sin²(Δlon / 2)
+    np.subtract(lat_2, lat_1, out=out, dtype=dtype)
+    out *= scale / 2
+    np.sin(out, out=out)
+    np.square(out, out=out)
 
-    cos_lat1 = np.cos(lat_1)
-    cos_lat2 = np.cos(lat_2)
-    cos_lat_d = np.cos(lat_1 - lat_2)
-    cos_lon_d = np.cos(lon_1 - lon_2)
+    temp = np.empty(shape, dtype=dtype)
+    np.subtract(lon_2, lon_1, out=temp, dtype=dtype)
+    temp *= scale / 2
+    np.sin(temp, out=temp)
+    np.square(temp, out=temp)
+    temp *= cos_lat_1
+    temp *= cos_lat_2
+    out += temp
 
-    return r * np.arccos(cos_lat_d - cos_lat1 * cos_lat2 * (1 - cos_lon_d))
+    # d = 2 * r * arcsin(sqrt(a)), rounding errors can make a slightly larger than 1
+    np.minimum(out, 1, out=out)
+    np.sqrt(out, out=out)
+    np.arcsin(out, out=out)
+    out *= 2 * r
+    return out
@@ -1,32 +1,57 @@
 from .file import read_positionfixes_csv
 from .file import write_positionfixes_csv
+from .file import iter_positionfixes_csv
 from .postgis import read_positionfixes_postgis
+from .postgis import iter_positionfixes_postgis
 from .postgis import write_positionfixes_postgis
 from .from_geopandas import read_positionfixes_gpd
+from .parquet import read_positionfixes_parquet
+from .parquet import write_positionfixes_parquet
 
 from .file import read_triplegs_csv
 from .file import write_triplegs_csv
 from .postgis import read_triplegs_postgis
 from .postgis import write_triplegs_postgis
 from .from_geopandas import read_triplegs_gpd
+from .parquet import read_triplegs_parquet
+from .parquet import write_triplegs_parquet
 
 from .file import read_staypoints_csv
 from .file import write_staypoints_csv
 from .postgis import read_staypoints_postgis
 from .postgis import write_staypoints_postgis
 from .from_geopandas import read_staypoints_gpd
+from .parquet import read_staypoints_parquet
+from .parquet import write_staypoints_parquet
 
 from .file import read_locations_csv
 from .file import write_locations_csv
 from .postgis import read_locations_postgis
 from .postgis import write_locations_postgis
 from .from_geopandas import read_locations_gpd
+from .parquet import read_locations_parquet
+from .parquet import write_locations_parquet
 
 from .file import read_trips_csv
 from .file import write_trips_csv
 from .postgis import read_trips_postgis
 from .postgis import write_trips_postgis
 from .from_geopandas import read_trips_gpd
+from .parquet import read_trips_parquet
+from .parquet import write_trips_parquet
+
+from .parquet import read_tours_parquet
+from .parquet import write_tours_parquet
+
+from .parquet import write_parquet_dataset
+from .parquet import read_parquet_dataset
+from .parquet import iter_parquet_dataset
+
+from .memmap import write_positionfixes_store
+from .memmap import PositionfixesStore
+
+from .postgis import set_engine_pool
+from .postgis import dispose_engines
 
 from .dataset_reader import read_geolife
 from .dataset_reader import geolife_add_modes_to_triplegs
@@ -7,7 +7,6 @@ import os
 import geopandas as gpd
 import numpy as np
 import pandas as pd
-from shapely.geometry import Point
 from sklearn.neighbors import NearestNeighbors
 from tqdm import tqdm
 
@@ -149,9 +148,6 @@ def read_geolife(geolife_path, print_progress=False):
             data_this["user_id"] = user_id
             data_this["elevation"] = data_this["elevation"] * FEET2METER
 
-            data_this["geom"] = list(zip(data_this["longitude"], data_this["latitude"]))
-            data_this["geom"] = data_this["geom"].apply(Point)
-
             df_list_days.append(data_this)
 
         # concat all days of a user into a single dataframe
@@ -161,6 +157,8 @@ def read_geolife(geolife_path, print_progress=False):
         df_list_users.append(df_user_this)
 
     df = pd.concat(df_list_users, axis=0, ignore_index=True)
+    # construct the points of all users at once
+    df["geom"] = gpd.points_from_xy(df["longitude"], df["latitude"])
     gdf = gpd.GeoDataFrame(df, geometry="geom", crs=CRS_WGS84)
     gdf["accuracy"] = np.nan
 
@@ -8,12 +8,23 @@ import geopandas as gpd
 import pandas as pd
 import pytz
 import warnings
-from shapely import wkt
-from shapely import geometry
-from shapely.geometry import Point
-
-
-def read_positionfixes_csv(*args, columns=None, tz=None, index_col=object(), crs=None, **kwargs):
+import shapely
+from shapely import geometry, wkt
+
+from trackintel.io.util import _complete_user_chunks
+
+
+def read_positionfixes_csv(
+    *args,
+    columns=None,
+    tz=None,
+    index_col=object(),
+    crs=None,
+    format=None,
+    ambiguous=True,
+    nonexistent=pd.Timedelta(hours=1),
+    **kwargs,
+):
     """
     Read positionfixes from csv file.
 
@@ -32,6 +43,14 @@ def read_positionfixes_csv(*args, columns=None, tz=None, index_col=object(), crs
     tz : str, optional
         pytz compatible timezone string. If None UTC is assumed.
 
+    ambiguous : bool, 'NaT' or 'raise', default True
+        How to localize wall times that occur twice at the end of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are interpreted as daylight saving time.
+
+    nonexistent : pandas.Timedelta, 'shift_forward', 'shift_backward', 'NaT' or 'raise', default 1 hour
+        How to localize wall times that do not exist at the start of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are shifted forward by one hour.
+
     index_col : str, optional
         column name to be used as index. If None the default index is assumed
         as unique identifier.
@@ -41,6 +60,10 @@ def read_positionfixes_csv(*args, columns=None, tz=None, index_col=object(), crs
         by pyproj.CRS.from_user_input(), such as an authority string
         (eg 'EPSG:4326') or a WKT string.
 
+    format : str, optional
+        strftime format of the "tracked_at" column, e.g. "%Y-%m-%d %H:%M:%S". If None the format is inferred,
+        passing it explicitly speeds up parsing of large files considerably.
+
     Returns
     -------
     pfs : GeoDataFrame (as trackintel positionfixes)
@@ -56,6 +79,7 @@ def read_positionfixes_csv(*args, columns=None, tz=None, index_col=object(), crs
     Examples
     --------
     >>> trackintel.read_positionfixes_csv('data.csv')
+    >>> trackintel.read_positionfixes_csv('data.csv', format='%Y-%m-%dT%H:%M:%S%z')
     >>> trackintel.read_positionfixes_csv('data.csv', columns={'time':'tracked_at', 'User':'user_id'})
                          tracked_at  user_id                        geom
     id
@@ -78,27 +102,76 @@ def read_positionfixes_csv(*args, columns=None, tz=None, index_col=object(), crs
 
     df = pd.read_csv(*args, **kwargs)
     df = df.rename(columns=columns)
+    return _positionfixes_from_df(df, tz=tz, crs=crs, format=format, ambiguous=ambiguous, nonexistent=nonexistent)
+
+
+def iter_positionfixes_csv(
+    *args,
+    chunksize=100000,
+    complete_users=False,
+    columns=None,
+    tz=None,
+    index_col=object(),
+    crs=None,
+    format=None,
+    ambiguous=True,
+    nonexistent=pd.Timedelta(hours=1),
+    **kwargs,
+):
+    """
+    Read positionfixes from csv file chunk by chunk.
 
-    # construct geom column from lon and lat
-    df["geom"] = list(zip(df["longitude"], df["latitude"]))
-    df["geom"] = df["geom"].apply(Point)
+    Generator version of :func:`trackintel.io.file.read_positionfixes_csv` for files that do not fit into
+    memory. Every chunk is converted and validated as trackintel positionfixes.
 
-    # transform to datatime
-    df["tracked_at"] = pd.to_datetime(df["tracked_at"])
+    Parameters
+    ----------
+    chunksize : int, default 100000
+        Number of rows read from the file at once.
 
-    # set timezone if none is recognized
-    for col in ["tracked_at"]:
-        if not pd.api.types.is_datetime64tz_dtype(df[col]):
-            df[col] = _localize_timestamp(dt_series=df[col], pytz_tzinfo=tz, col_name=col)
+    complete_users : bool, default False
+        If True, rows are regrouped such that every yielded chunk contains all positionfixes of its users.
+        This requires that the rows of each user are stored contiguously in the file (e.g. the file is sorted
+        by user), a ValueError is raised otherwise. The last user of a chunk is carried over to the next chunk,
+        a chunk can therefore contain more than `chunksize` rows.
 
-    df = df.drop(["longitude", "latitude"], axis=1)
-    pfs = gpd.GeoDataFrame(df, geometry="geom")
-    if crs:
-        pfs.set_crs(crs, inplace=True)
+    columns, tz, index_col, crs, format, ambiguous, nonexistent
+        See :func:`trackintel.io.file.read_positionfixes_csv`.
 
-    # assert validity of positionfixes
-    pfs.as_positionfixes
-    return pfs
+    Yields
+    ------
+    pfs : GeoDataFrame (as trackintel positionfixes)
+        A GeoDataFrame containing the positionfixes of the chunk.
+
+    Notes
+    -----
+    The memory usage is bounded by `chunksize` (plus the positionfixes of a single user if
+    `complete_users` is True).
+
+    Examples
+    --------
+    >>> for pfs in trackintel.io.file.iter_positionfixes_csv('data.csv', complete_users=True, index_col="id"):
+    ...     pfs, sp = pfs.as_positionfixes.generate_staypoints()
+    """
+    columns = {} if columns is None else columns
+
+    # Warning if no 'index_col' parameter is provided
+    if type(index_col) == object:
+        warnings.warn(
+            "Assuming default index as unique identifier. Pass 'index_col=None' as explicit"
+            + "argument to avoid a warning when reading csv files."
+        )
+    elif index_col is not None:
+        kwargs["index_col"] = index_col
+
+    with pd.read_csv(*args, chunksize=chunksize, **kwargs) as reader:
+        chunks = (df.rename(columns=columns) for df in reader)
+        if complete_users:
+            chunks = _complete_user_chunks(chunks)
+        for df in chunks:
+            yield _positionfixes_from_df(
+                df, tz=tz, crs=crs, format=format, ambiguous=ambiguous, nonexistent=nonexistent
+            )
 
 
 def write_positionfixes_csv(positionfixes, filename, *args, **kwargs):
@@ -122,14 +195,24 @@ def write_positionfixes_csv(positionfixes, filename, *args, **kwargs):
     geometry column is dropped.
     """
     gdf = positionfixes.copy()
-    gdf["longitude"] = positionfixes.geometry.apply(lambda p: p.coords[0][0])
-    gdf["latitude"] = positionfixes.geometry.apply(lambda p: p.coords[0][1])
+    gdf["longitude"] = positionfixes.geometry.x
+    gdf["latitude"] = positionfixes.geometry.y
     df = gdf.drop(gdf.geometry.name, axis=1)
 
     df.to_csv(filename, index=True, *args, **kwargs)
 
 
-def read_triplegs_csv(*args, columns=None, tz=None, index_col=object(), crs=None, **kwargs):
+def read_triplegs_csv(
+    *args,
+    columns=None,
+    tz=None,
+    index_col=object(),
+    crs=None,
+    geom_format="wkt",
+    ambiguous=True,
+    nonexistent=pd.Timedelta(hours=1),
+    **kwargs,
+):
     """
     Read triplegs from csv file.
 
@@ -147,6 +230,14 @@ def read_triplegs_csv(*args, columns=None, tz=None, index_col=object(), crs=None
     tz : str, optional
         pytz compatible timezone string. If None UTC is assumed.
 
+    ambiguous : bool, 'NaT' or 'raise', default True
+        How to localize wall times that occur twice at the end of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are interpreted as daylight saving time.
+
+    nonexistent : pandas.Timedelta, 'shift_forward', 'shift_backward', 'NaT' or 'raise', default 1 hour
+        How to localize wall times that do not exist at the start of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are shifted forward by one hour.
+
     index_col : str, optional
         column name to be used as index. If None the default index is assumed
         as unique identifier.
@@ -156,6 +247,9 @@ def read_triplegs_csv(*args, columns=None, tz=None, index_col=object(), crs=None
         by pyproj.CRS.from_user_input(), such as an authority string
         (eg “EPSG:4326”) or a WKT string.
 
+    geom_format : {'wkt', 'wkb'}, default 'wkt'
+        Encoding of the geometry column, either WKT or hex encoded WKB.
+
     Returns
     -------
     tpls : GeoDataFrame (as trackintel triplegs)
@@ -185,7 +279,7 @@ def read_triplegs_csv(*args, columns=None, tz=None, index_col=object(), crs=None
     df = df.rename(columns=columns)
 
     # construct geom column
-    df["geom"] = df["geom"].apply(wkt.loads)
+    df["geom"] = _read_geometry(df["geom"], geom_format)
 
     # transform to datatime
     df["started_at"] = pd.to_datetime(df["started_at"])
@@ -194,7 +288,9 @@ def read_triplegs_csv(*args, columns=None, tz=None, index_col=object(), crs=None
     # set timezone if none is recognized
     for col in ["started_at", "finished_at"]:
         if not pd.api.types.is_datetime64tz_dtype(df[col]):
-            df[col] = _localize_timestamp(dt_series=df[col], pytz_tzinfo=tz, col_name=col)
+            df[col] = _localize_timestamp(
+                dt_series=df[col], pytz_tzinfo=tz, col_name=col, ambiguous=ambiguous, nonexistent=nonexistent
+            )
 
     tpls = gpd.GeoDataFrame(df, geometry="geom")
     if crs:
@@ -205,7 +301,7 @@ def read_triplegs_csv(*args, columns=None, tz=None, index_col=object(), crs=None
     return tpls
 
 
-def write_triplegs_csv(triplegs, filename, *args, **kwargs):
+def write_triplegs_csv(triplegs, filename, *args, geom_format="wkt", **kwargs):
     """
     Write triplegs to csv file.
 
@@ -219,14 +315,28 @@ def write_triplegs_csv(triplegs, filename, *args, **kwargs):
 
     filename : str
         The file to write to.
+
+    geom_format : {'wkt', 'wkb'}, default 'wkt'
+        Encoding of the geometry column, either WKT or hex encoded WKB. WKB is faster to write and read and
+        stores the coordinates without loss of precision.
     """
     geo_col_name = triplegs.geometry.name
     df = pd.DataFrame(triplegs, copy=True)
-    df[geo_col_name] = triplegs.geometry.apply(wkt.dumps)
+    df[geo_col_name] = _write_geometry(triplegs.geometry, geom_format)
     df.to_csv(filename, index=True, *args, **kwargs)
 
 
-def read_staypoints_csv(*args, columns=None, tz=None, index_col=object(), crs=None, **kwargs):
+def read_staypoints_csv(
+    *args,
+    columns=None,
+    tz=None,
+    index_col=object(),
+    crs=None,
+    geom_format="wkt",
+    ambiguous=True,
+    nonexistent=pd.Timedelta(hours=1),
+    **kwargs,
+):
     """
     Read staypoints from csv file.
 
@@ -245,6 +355,14 @@ def read_staypoints_csv(*args, columns=None, tz=None, index_col=object(), crs=No
     tz : str, optional
         pytz compatible timezone string. If None UTC is assumed.
 
+    ambiguous : bool, 'NaT' or 'raise', default True
+        How to localize wall times that occur twice at the end of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are interpreted as daylight saving time.
+
+    nonexistent : pandas.Timedelta, 'shift_forward', 'shift_backward', 'NaT' or 'raise', default 1 hour
+        How to localize wall times that do not exist at the start of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are shifted forward by one hour.
+
     index_col : str, optional
         column name to be used as index. If None the default index is assumed
         as unique identifier.
@@ -254,6 +372,9 @@ def read_staypoints_csv(*args, columns=None, tz=None, index_col=object(), crs=No
         by pyproj.CRS.from_user_input(), such as an authority string
         (eg “EPSG:4326”) or a WKT string.
 
+    geom_format : {'wkt', 'wkb'}, default 'wkt'
+        Encoding of the geometry column, either WKT or hex encoded WKB.
+
     Returns
     -------
     stps : GeoDataFrame (as trackintel staypoints)
@@ -283,7 +404,7 @@ def read_staypoints_csv(*args, columns=None, tz=None, index_col=object(), crs=No
     df = df.rename(columns=columns)
 
     # construct geom column
-    df["geom"] = df["geom"].apply(wkt.loads)
+    df["geom"] = _read_geometry(df["geom"], geom_format)
 
     # transform to datatime
     df["started_at"] = pd.to_datetime(df["started_at"])
@@ -292,7 +413,9 @@ def read_staypoints_csv(*args, columns=None, tz=None, index_col=object(), crs=No
     # set timezone if none is recognized
     for col in ["started_at", "finished_at"]:
         if not pd.api.types.is_datetime64tz_dtype(df[col]):
-            df[col] = _localize_timestamp(dt_series=df[col], pytz_tzinfo=tz, col_name=col)
+            df[col] = _localize_timestamp(
+                dt_series=df[col], pytz_tzinfo=tz, col_name=col, ambiguous=ambiguous, nonexistent=nonexistent
+            )
 
     stps = gpd.GeoDataFrame(df, geometry="geom")
     if crs:
@@ -303,7 +426,7 @@ def read_staypoints_csv(*args, columns=None, tz=None, index_col=object(), crs=No
     return stps
 
 
-def write_staypoints_csv(staypoints, filename, *args, **kwargs):
+def write_staypoints_csv(staypoints, filename, *args, geom_format="wkt", **kwargs):
     """
     Write staypoints to csv file.
 
@@ -317,14 +440,17 @@ def write_staypoints_csv(staypoints, filename, *args, **kwargs):
 
     filename : str
         The file to write to.
+
+    geom_format : {'wkt', 'wkb'}, default 'wkt'
+        Encoding of the geometry column, either WKT or hex encoded WKB.
     """
     geo_col_name = staypoints.geometry.name
     df = pd.DataFrame(staypoints, copy=True)
-    df[geo_col_name] = staypoints.geometry.apply(wkt.dumps)
+    df[geo_col_name] = _write_geometry(staypoints.geometry, geom_format)
     df.to_csv(filename, index=True, *args, **kwargs)
 
 
-def read_locations_csv(*args, columns=None, index_col=object(), crs=None, **kwargs):
+def read_locations_csv(*args, columns=None, index_col=object(), crs=None, geom_format="wkt", **kwargs):
     """
     Read locations from csv file.
 
@@ -348,6 +474,9 @@ def read_locations_csv(*args, columns=None, index_col=object(), crs=None, **kwar
         by pyproj.CRS.from_user_input(), such as an authority string
         (eg “EPSG:4326”) or a WKT string.
 
+    geom_format : {'wkt', 'wkb'}, default 'wkt'
+        Encoding of the geometry columns, either WKT or hex encoded WKB.
+
     Returns
     -------
     locs : GeoDataFrame (as trackintel locations)
@@ -377,9 +506,9 @@ def read_locations_csv(*args, columns=None, index_col=object(), crs=None, **kwar
     df = df.rename(columns=columns)
 
     # construct center and extent columns
-    df["center"] = df["center"].apply(wkt.loads)
+    df["center"] = _read_geometry(df["center"], geom_format)
     if "extent" in df.columns:
-        df["extent"] = df["extent"].apply(wkt.loads)
+        df["extent"] = _read_geometry(df["extent"], geom_format)
 
     locs = gpd.GeoDataFrame(df, geometry="center")
     if crs:
@@ -390,7 +519,7 @@ def read_locations_csv(*args, columns=None, index_col=object(), crs=None, **kwar
     return locs
 
 
-def write_locations_csv(locations, filename, *args, **kwargs):
+def write_locations_csv(locations, filename, *args, geom_format="wkt", **kwargs):
     """
     Write locations to csv file.
 
@@ -404,15 +533,27 @@ def write_locations_csv(locations, filename, *args, **kwargs):
 
     filename : str
         The file to write to.
+
+    geom_format : {'wkt', 'wkb'}, default 'wkt'
+        Encoding of the geometry columns, either WKT or hex encoded WKB.
     """
     df = pd.DataFrame(locations, copy=True)
-    df["center"] = locations["center"].apply(wkt.dumps)
+    df["center"] = _write_geometry(gpd.GeoSeries(locations["center"]), geom_format)
     if "extent" in df.columns:
-        df["extent"] = locations["extent"].apply(wkt.dumps)
+        df["extent"] = _write_geometry(gpd.GeoSeries(locations["extent"]), geom_format)
     df.to_csv(filename, index=True, *args, **kwargs)
 
 
-def read_trips_csv(*args, columns=None, tz=None, index_col=object(), **kwargs):
+def read_trips_csv(
+    *args,
+    columns=None,
+    tz=None,
+    index_col=object(),
+    geom_format="wkt",
+    ambiguous=True,
+    nonexistent=pd.Timedelta(hours=1),
+    **kwargs,
+):
     """
     Read trips from csv file.
 
@@ -431,10 +572,21 @@ def read_trips_csv(*args, columns=None, tz=None, index_col=object(), **kwargs):
     tz : str, optional
         pytz compatible timezone string. If None UTC is assumed.
 
+    ambiguous : bool, 'NaT' or 'raise', default True
+        How to localize wall times that occur twice at the end of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are interpreted as daylight saving time.
+
+    nonexistent : pandas.Timedelta, 'shift_forward', 'shift_backward', 'NaT' or 'raise', default 1 hour
+        How to localize wall times that do not exist at the start of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are shifted forward by one hour.
+
     index_col : str, optional
         column name to be used as index. If None the default index is assumed
         as unique identifier.
 
+    geom_format : {'wkt', 'wkb'}, default 'wkt'
+        Encoding of the optional geometry column, either WKT or hex encoded WKB.
+
     Returns
     -------
     trips : (Geo)DataFrame (as trackintel trips)
@@ -477,11 +629,13 @@ def read_trips_csv(*args, columns=None, tz=None, index_col=object(), **kwargs):
     # check and/or set timezone
     for col in ["started_at", "finished_at"]:
         if not pd.api.types.is_datetime64tz_dtype(trips[col]):
-            trips[col] = _localize_timestamp(dt_series=trips[col], pytz_tzinfo=tz, col_name=col)
+            trips[col] = _localize_timestamp(
+                dt_series=trips[col], pytz_tzinfo=tz, col_name=col, ambiguous=ambiguous, nonexistent=nonexistent
+            )
 
     # convert to geodataframe
     if "geom" in trips.columns:
-        trips["geom"] = trips["geom"].apply(wkt.loads)
+        trips["geom"] = _read_geometry(trips["geom"], geom_format)
         trips = gpd.GeoDataFrame(trips, geometry="geom")
 
     # assert validity of trips
@@ -489,7 +643,7 @@ def read_trips_csv(*args, columns=None, tz=None, index_col=object(), **kwargs):
     return trips
 
 
-def write_trips_csv(trips, filename, *args, **kwargs):
+def write_trips_csv(trips, filename, *args, geom_format="wkt", **kwargs):
     """
     Write trips to csv file.
 
@@ -502,11 +656,15 @@ def write_trips_csv(trips, filename, *args, **kwargs):
 
     filename : str
         The file to write to.
+
+    geom_format : {'wkt', 'wkb'}, default 'wkt'
+        Encoding of the optional geometry column, either WKT or hex encoded WKB.
     """
     df = trips.copy()
     if isinstance(df, GeoDataFrame):
         geom_col_name = df.geometry.name
-        df[geom_col_name] = df[geom_col_name].apply(wkt.dumps)
+        df = pd.DataFrame(df)
+        df[geom_col_name] = _write_geometry(trips.geometry, geom_format)
     df.to_csv(filename, index=True, *args, **kwargs)
 
 
@@ -562,7 +720,7 @@ def write_tours_csv(tours, filename, *args, **kwargs):
     pass
 
 
-def _localize_timestamp(dt_series, pytz_tzinfo, col_name):
+def _localize_timestamp(dt_series, pytz_tzinfo, col_name, ambiguous=True, nonexistent=pd.Timedelta(hours=1)):
     """
     Add timezone info to timestamp.
 
@@ -577,6 +735,14 @@ def _localize_timestamp(dt_series, pytz_tzinfo, col_name):
     col_name : str
         Column name for informative warning message
 
+    ambiguous : bool, numpy.array of bool, 'infer', 'NaT' or 'raise', default True
+        How to handle wall times that occur twice at the end of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are interpreted as daylight saving time.
+
+    nonexistent : pandas.Timedelta, 'shift_forward', 'shift_backward', 'NaT' or 'raise', default 1 hour
+        How to handle wall times that do not exist at the start of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are shifted forward by one hour.
+
     Returns
     -------
     pd.Series
@@ -587,4 +753,63 @@ def _localize_timestamp(dt_series, pytz_tzinfo, col_name):
         pytz_tzinfo = "utc"
 
     timezone = pytz.timezone(pytz_tzinfo)
-    return dt_series.apply(pd.Timestamp, tz=timezone)
+    dt_series = pd.to_datetime(dt_series)
+    if pd.api.types.is_object_dtype(dt_series):
+        # strings with different utc offsets
+        dt_series = pd.to_datetime(dt_series, utc=True)
+    if pd.api.types.is_datetime64tz_dtype(dt_series):
+        # strings with utc offset are converted and not localized
+        return dt_series.dt.tz_convert(timezone)
+    return dt_series.dt.tz_localize(timezone, ambiguous=ambiguous, nonexistent=nonexistent)
+
+
+def _read_geometry(geom_series, geom_format):
+    """Parse a column of WKT strings or hex encoded WKB into a GeoSeries (vectorized with shapely>=2 or pygeos)."""
+    if geom_format == "wkt":
+        return gpd.GeoSeries.from_wkt(geom_series)
+    if geom_format == "wkb":
+        return gpd.GeoSeries.from_wkb(geom_series)
+    raise AttributeError(f"Geometry format unknown. We only support ['wkt', 'wkb']. You passed {geom_format}")
+
+
+def _write_geometry(geom_series, geom_format):
+    """Serialize a GeoSeries to WKT strings (full precision as in shapely.wkt.dumps) or hex encoded WKB."""
+    if geom_format == "wkb":
+        return geom_series.to_wkb(hex=True)
+    if geom_format != "wkt":
+        raise AttributeError(f"Geometry format unknown. We only support ['wkt', 'wkb']. You passed {geom_format}")
+
+    if hasattr(shapely, "to_wkt") or gpd.options.use_pygeos:
+        # vectorized in geopandas with shapely>=2.0 or pygeos
+        return geom_series.to_wkt(rounding_precision=-1, trim=False)
+    # without these backends geopandas trims trailing zeros (which would change the output)
+    return pd.Series(
+        [None if geom is None else wkt.dumps(geom, trim=False) for geom in geom_series.values],
+        index=geom_series.index,
+        dtype=object,
+    )
+
+
+def _positionfixes_from_df(df, tz, crs, format, ambiguous, nonexistent):
+    """Build positionfixes from a DataFrame with "longitude", "latitude" and "tracked_at" columns."""
+    # construct geom column from lon and lat
+    df["geom"] = gpd.points_from_xy(df["longitude"], df["latitude"])
+
+    # transform to datatime
+    df["tracked_at"] = pd.to_datetime(df["tracked_at"], format=format)
+
+    # set timezone if none is recognized
+    for col in ["tracked_at"]:
+        if not pd.api.types.is_datetime64tz_dtype(df[col]):
+            df[col] = _localize_timestamp(
+                dt_series=df[col], pytz_tzinfo=tz, col_name=col, ambiguous=ambiguous, nonexistent=nonexistent
+            )
+
+    df = df.drop(["longitude", "latitude"], axis=1)
+    pfs = gpd.GeoDataFrame(df, geometry="geom")
+    if crs:
+        pfs.set_crs(crs, inplace=True)
+
+    # assert validity of positionfixes
+    pfs.as_positionfixes
+    return pfs
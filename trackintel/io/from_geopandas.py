@@ -3,7 +3,16 @@ import pandas as pd
 from trackintel.io.file import _localize_timestamp
 
 
-def read_positionfixes_gpd(gdf, tracked_at="tracked_at", user_id="user_id", geom_col="geom", tz=None, mapper={}):
+def read_positionfixes_gpd(
+    gdf,
+    tracked_at="tracked_at",
+    user_id="user_id",
+    geom_col="geom",
+    tz=None,
+    mapper={},
+    ambiguous=True,
+    nonexistent=pd.Timedelta(hours=1),
+):
     """
     Read positionfixes from GeoDataFrames.
 
@@ -29,6 +38,14 @@ def read_positionfixes_gpd(gdf, tracked_at="tracked_at", user_id="user_id", geom
     mapper : dict, optional
         further columns that should be renamed.
 
+    ambiguous : bool, 'NaT' or 'raise', default True
+        How to localize wall times that occur twice at the end of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are interpreted as daylight saving time.
+
+    nonexistent : pandas.Timedelta, 'shift_forward', 'shift_backward', 'NaT' or 'raise', default 1 hour
+        How to localize wall times that do not exist at the start of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are shifted forward by one hour.
+
     Returns
     -------
     pfs : GeoDataFrame (as trackintel positionfixes)
@@ -47,7 +64,9 @@ def read_positionfixes_gpd(gdf, tracked_at="tracked_at", user_id="user_id", geom
     # check and/or set timezone
     for col in ["tracked_at"]:
         if not pd.api.types.is_datetime64tz_dtype(pfs[col]):
-            pfs[col] = _localize_timestamp(dt_series=pfs[col], pytz_tzinfo=tz, col_name=col)
+            pfs[col] = _localize_timestamp(
+                dt_series=pfs[col], pytz_tzinfo=tz, col_name=col, ambiguous=ambiguous, nonexistent=nonexistent
+            )
 
     # assert validity of positionfixes
     pfs.as_positionfixes
@@ -55,7 +74,15 @@ def read_positionfixes_gpd(gdf, tracked_at="tracked_at", user_id="user_id", geom
 
 
 def read_staypoints_gpd(
-    gdf, started_at="started_at", finished_at="finished_at", user_id="user_id", geom_col="geom", tz=None, mapper={}
+    gdf,
+    started_at="started_at",
+    finished_at="finished_at",
+    user_id="user_id",
+    geom_col="geom",
+    tz=None,
+    mapper={},
+    ambiguous=True,
+    nonexistent=pd.Timedelta(hours=1),
 ):
     """
     Read staypoints from GeoDataFrames.
@@ -85,6 +112,14 @@ def read_staypoints_gpd(
     mapper : dict, optional
         further columns that should be renamed.
 
+    ambiguous : bool, 'NaT' or 'raise', default True
+        How to localize wall times that occur twice at the end of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are interpreted as daylight saving time.
+
+    nonexistent : pandas.Timedelta, 'shift_forward', 'shift_backward', 'NaT' or 'raise', default 1 hour
+        How to localize wall times that do not exist at the start of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are shifted forward by one hour.
+
     Returns
     -------
     stps : GeoDataFrame (as trackintel staypoints)
@@ -103,7 +138,9 @@ def read_staypoints_gpd(
     # check and/or set timezone
     for col in ["started_at", "finished_at"]:
         if not pd.api.types.is_datetime64tz_dtype(stps[col]):
-            stps[col] = _localize_timestamp(dt_series=stps[col], pytz_tzinfo=tz, col_name=col)
+            stps[col] = _localize_timestamp(
+                dt_series=stps[col], pytz_tzinfo=tz, col_name=col, ambiguous=ambiguous, nonexistent=nonexistent
+            )
 
     # assert validity of staypoints
     stps.as_staypoints
@@ -111,7 +148,15 @@ def read_staypoints_gpd(
 
 
 def read_triplegs_gpd(
-    gdf, started_at="started_at", finished_at="finished_at", user_id="user_id", geom_col="geom", tz=None, mapper={}
+    gdf,
+    started_at="started_at",
+    finished_at="finished_at",
+    user_id="user_id",
+    geom_col="geom",
+    tz=None,
+    mapper={},
+    ambiguous=True,
+    nonexistent=pd.Timedelta(hours=1),
 ):
     """
     Read triplegs from GeoDataFrames.
@@ -141,6 +186,14 @@ def read_triplegs_gpd(
     mapper : dict, optional
         further columns that should be renamed.
 
+    ambiguous : bool, 'NaT' or 'raise', default True
+        How to localize wall times that occur twice at the end of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are interpreted as daylight saving time.
+
+    nonexistent : pandas.Timedelta, 'shift_forward', 'shift_backward', 'NaT' or 'raise', default 1 hour
+        How to localize wall times that do not exist at the start of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are shifted forward by one hour.
+
     Returns
     -------
     tpls : GeoDataFrame (as trackintel triplegs)
@@ -159,7 +212,9 @@ def read_triplegs_gpd(
     # check and/or set timezone
     for col in ["started_at", "finished_at"]:
         if not pd.api.types.is_datetime64tz_dtype(tpls[col]):
-            tpls[col] = _localize_timestamp(dt_series=tpls[col], pytz_tzinfo=tz, col_name=col)
+            tpls[col] = _localize_timestamp(
+                dt_series=tpls[col], pytz_tzinfo=tz, col_name=col, ambiguous=ambiguous, nonexistent=nonexistent
+            )
 
     # assert validity of triplegs
     tpls.as_triplegs
@@ -175,6 +230,8 @@ def read_trips_gpd(
     destination_staypoint_id="destination_staypoint_id",
     tz=None,
     mapper={},
+    ambiguous=True,
+    nonexistent=pd.Timedelta(hours=1),
 ):
     """
     Read trips from GeoDataFrames/DataFrames.
@@ -207,6 +264,14 @@ def read_trips_gpd(
     mapper : dict, optional
         further columns that should be renamed.
 
+    ambiguous : bool, 'NaT' or 'raise', default True
+        How to localize wall times that occur twice at the end of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are interpreted as daylight saving time.
+
+    nonexistent : pandas.Timedelta, 'shift_forward', 'shift_backward', 'NaT' or 'raise', default 1 hour
+        How to localize wall times that do not exist at the start of daylight saving time (see
+        pandas.Series.dt.tz_localize). By default they are shifted forward by one hour.
+
     Returns
     -------
     trips : GeoDataFrame/DataFrame (as trackintel trips)
@@ -230,7 +295,9 @@ def read_trips_gpd(
     # check and/or set timezone
     for col in ["started_at", "finished_at"]:
         if not pd.api.types.is_datetime64tz_dtype(trips[col]):
-            trips[col] = _localize_timestamp(dt_series=trips[col], pytz_tzinfo=tz, col_name=col)
+            trips[col] = _localize_timestamp(
+                dt_series=trips[col], pytz_tzinfo=tz, col_name=col, ambiguous=ambiguous, nonexistent=nonexistent
+            )
 
     # assert validity of trips
     trips.as_trips
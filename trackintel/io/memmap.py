@@ -0,0 +1,208 @@
+import json
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytz
+
+
+def write_positionfixes_store(positionfixes, path):
+    """
+    Write positionfixes to a memory mappable binary store.
+
+    The positionfixes are sorted by user and time and the coordinates, the timestamps (in UTC) and the ids are
+    stored as contiguous numpy arrays together with the offset of every user. Opening the store with
+    :class:`trackintel.io.memmap.PositionfixesStore` does not read or parse any data.
+
+    Parameters
+    ----------
+    positionfixes : GeoDataFrame (as trackintel positionfixes)
+        The positionfixes to store, only the point geometry, "user_id", "tracked_at" and the index are kept.
+
+    path : str
+        Directory of the store. It must not contain a store yet.
+
+    Notes
+    -----
+    "tracked_at" must be timezone aware. Named timezones are stored by name and fixed offsets (e.g., "+01:00") as
+    offset from UTC.
+
+    Examples
+    --------
+    >>> write_positionfixes_store(pfs, 'data/pfs_store')
+    >>> store = PositionfixesStore('data/pfs_store')
+    """
+    metadata_file = os.path.join(path, _STORE_METADATA)
+    if os.path.exists(metadata_file):
+        raise FileExistsError(f"There is already a positionfixes store at '{path}'.")
+
+    tracked_at = positionfixes["tracked_at"]
+    if tracked_at.dt.tz is None:
+        raise ValueError("The positionfixes store requires timezone aware timestamps, but 'tracked_at' is naive.")
+    time_ns = tracked_at.dt.tz_convert("utc").dt.tz_localize(None).values.view("i8")
+    user_codes, users = pd.factorize(positionfixes["user_id"], sort=True)
+    order = np.lexsort((time_ns, user_codes))
+    offsets = np.searchsorted(user_codes[order], np.arange(len(users) + 1))
+
+    os.makedirs(path, exist_ok=True)
+    arrays = {
+        "x": positionfixes.geometry.x.values,
+        "y": positionfixes.geometry.y.values,
+        "tracked_at": time_ns,
+        "index": _to_numpy(positionfixes.index),
+    }
+    for name, values in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(values[order]))
+
+    metadata = {
+        "n_rows": len(positionfixes),
+        "users": _to_numpy(users).tolist(),
+        "offsets": offsets.tolist(),
+        "tz": _tz_to_metadata(tracked_at.dt.tz),
+        "crs": None if positionfixes.crs is None else positionfixes.crs.to_wkt(),
+        "index_name": positionfixes.index.name,
+        "geometry_name": positionfixes.geometry.name,
+    }
+    with open(metadata_file, "w") as f:
+        json.dump(metadata, f)
+
+
+class PositionfixesStore:
+    """
+    Read-only access to positionfixes written with :func:`trackintel.io.memmap.write_positionfixes_store`.
+
+    The arrays are memory mapped, opening a store takes milliseconds independent of its size and the
+    positionfixes of a user are returned as views into the mapped files without copying.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the store.
+
+    Attributes
+    ----------
+    users : numpy.array
+        The sorted user ids.
+
+    x, y : numpy.memmap
+        The coordinates of all positionfixes sorted by user and time.
+
+    tracked_at : numpy.memmap
+        The timestamps of all positionfixes in UTC as datetime64[ns].
+
+    index : numpy.memmap
+        The ids of all positionfixes.
+
+    Examples
+    --------
+    >>> store = PositionfixesStore('data/pfs_store')
+    >>> tracked_at, x, y = store.get_user(1)
+    >>> pfs = store.to_positionfixes(user_ids=[1, 2])
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, _STORE_METADATA)) as f:
+            self._metadata = json.load(f)
+        self.users = np.asarray(self._metadata["users"])
+        self._offsets = np.asarray(self._metadata["offsets"], dtype=np.int64)
+        self._user_position = {user: i for i, user in enumerate(self._metadata["users"])}
+
+        self.x = np.load(os.path.join(path, "x.npy"), mmap_mode="r")
+        self.y = np.load(os.path.join(path, "y.npy"), mmap_mode="r")
+        self.tracked_at = np.load(os.path.join(path, "tracked_at.npy"), mmap_mode="r").view("M8[ns]")
+        self.index = np.load(os.path.join(path, "index.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return self._metadata["n_rows"]
+
+    def user_slice(self, user_id):
+        """Position of the positionfixes of the user in the arrays of the store."""
+        if user_id not in self._user_position:
+            raise KeyError(f"User {user_id} is not in the store.")
+        i = self._user_position[user_id]
+        return slice(self._offsets[i], self._offsets[i + 1])
+
+    def get_user(self, user_id):
+        """
+        Positionfixes of a user as views into the store.
+
+        Parameters
+        ----------
+        user_id : int or str
+            The user.
+
+        Returns
+        -------
+        tracked_at, x, y : numpy.memmap
+            The timestamps (UTC) and coordinates of the positionfixes of the user sorted by time.
+        """
+        s = self.user_slice(user_id)
+        return self.tracked_at[s], self.x[s], self.y[s]
+
+    def to_positionfixes(self, user_ids=None):
+        """
+        Materialize the positionfixes as GeoDataFrame.
+
+        Parameters
+        ----------
+        user_ids : list, optional
+            Only load the positionfixes of these users. If None all positionfixes are loaded.
+
+        Returns
+        -------
+        pfs : GeoDataFrame (as trackintel positionfixes)
+            The positionfixes sorted by user and time with the timezone, CRS and ids they were stored with.
+        """
+        if user_ids is None:
+            positions = np.arange(len(self))
+            user_id = np.repeat(self.users, np.diff(self._offsets))
+        else:
+            slices = [self.user_slice(u) for u in user_ids]
+            positions = np.concatenate([np.arange(s.start, s.stop) for s in slices] + [np.array([], dtype=np.int64)])
+            user_id = np.repeat(np.asarray(user_ids), [s.stop - s.start for s in slices])
+
+        tracked_at = (
+            pd.DatetimeIndex(self.tracked_at[positions])
+            .tz_localize("utc")
+            .tz_convert(_tz_from_metadata(self._metadata["tz"]))
+        )
+        index = pd.Index(self.index[positions], name=self._metadata["index_name"])
+        pfs = gpd.GeoDataFrame(
+            {"user_id": user_id, "tracked_at": tracked_at},
+            index=index,
+            geometry=gpd.points_from_xy(self.x[positions], self.y[positions]),
+            crs=self._metadata["crs"],
+        )
+        pfs = pfs.rename_geometry(self._metadata["geometry_name"])
+
+        # assert validity of positionfixes
+        pfs.as_positionfixes
+        return pfs
+
+
+_STORE_METADATA = "_trackintel_store.json"
+
+
+def _to_numpy(values):
+    """Numpy array that can be saved without pickling (strings are stored as unicode)."""
+    values = np.asarray(values)
+    return values.astype(str) if values.dtype == object else values
+
+
+def _tz_to_metadata(tz):
+    """JSON serializable timezone: the name of named timezones, the offset in seconds of fixed offsets."""
+    name = getattr(tz, "zone", None) or getattr(tz, "key", None)
+    if name is not None:
+        return name
+    offset = tz.utcoffset(None)
+    if offset is None:
+        raise ValueError(f"The timezone {tz} has neither a name nor a fixed offset and cannot be stored.")
+    return int(offset.total_seconds())
+
+
+def _tz_from_metadata(tz):
+    """Timezone from the metadata of the store (see _tz_to_metadata)."""
+    if isinstance(tz, int):
+        return pytz.FixedOffset(tz // 60)
+    return tz
@@ -0,0 +1,642 @@
+import json
+import numbers
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import box
+
+import trackintel as ti
+from trackintel.io.util import _to_utc, _to_utc_timestamp
+
+
+def read_positionfixes_parquet(filename, columns=None, **kwargs):
+    """
+    Read positionfixes from a (Geo)Parquet file.
+
+    Wraps the geopandas read_parquet function. Parquet preserves the CRS, the index (and its name),
+    timezone aware timestamps and all other dtypes (e.g. nullable integers or categoricals). This also
+    validates that the ingested data conforms to the trackintel understanding of positionfixes (see
+    :doc:`/modules/model`).
+
+    Parameters
+    ----------
+    filename : str
+        The file to read from.
+
+    columns : list of str, optional
+        Only read these columns (and the index). The required columns and the geometry are always read.
+
+    Returns
+    -------
+    pfs : GeoDataFrame (as trackintel positionfixes)
+        A GeoDataFrame containing the positionfixes.
+
+    Notes
+    -----
+    Requires the optional dependency pyarrow.
+
+    Examples
+    --------
+    >>> trackintel.read_positionfixes_parquet('positionfixes.parquet')
+    >>> trackintel.read_positionfixes_parquet('positionfixes.parquet', columns=['accuracy'])
+    """
+    required_columns = ti.model.positionfixes.PositionfixesAccessor.required_columns
+    pfs = _read_parquet(filename, required_columns, columns, **kwargs)
+
+    # assert validity of positionfixes
+    pfs.as_positionfixes
+    return pfs
+
+
+def write_positionfixes_parquet(positionfixes, filename, **kwargs):
+    """
+    Write positionfixes to a (Geo)Parquet file.
+
+    Wraps the geopandas to_parquet function. In contrast to CSV files the geometry, the CRS and all
+    dtypes are stored without conversion.
+
+    Parameters
+    ----------
+    positionfixes : GeoDataFrame (as trackintel positionfixes)
+        The positionfixes to store to the Parquet file.
+
+    filename : str
+        The file to write to.
+
+    Examples
+    --------
+    >>> trackintel.io.parquet.write_positionfixes_parquet(pfs, 'positionfixes.parquet')
+    >>> pfs.as_positionfixes.to_parquet('positionfixes.parquet')
+    """
+    positionfixes.to_parquet(filename, **kwargs)
+
+
+def read_triplegs_parquet(filename, columns=None, **kwargs):
+    """
+    Read triplegs from a (Geo)Parquet file.
+
+    Wraps the geopandas read_parquet function. Parquet preserves the CRS, the index (and its name),
+    timezone aware timestamps and all other dtypes (e.g. nullable integers or categoricals). This also
+    validates that the ingested data conforms to the trackintel understanding of triplegs (see
+    :doc:`/modules/model`).
+
+    Parameters
+    ----------
+    filename : str
+        The file to read from.
+
+    columns : list of str, optional
+        Only read these columns (and the index). The required columns and the geometry are always read.
+
+    Returns
+    -------
+    tpls : GeoDataFrame (as trackintel triplegs)
+        A GeoDataFrame containing the triplegs.
+
+    Notes
+    -----
+    Requires the optional dependency pyarrow.
+
+    Examples
+    --------
+    >>> trackintel.read_triplegs_parquet('triplegs.parquet')
+    >>> trackintel.read_triplegs_parquet('triplegs.parquet', columns=['mode'])
+    """
+    required_columns = ti.model.triplegs.TriplegsAccessor.required_columns
+    tpls = _read_parquet(filename, required_columns, columns, **kwargs)
+
+    # assert validity of triplegs
+    tpls.as_triplegs
+    return tpls
+
+
+def write_triplegs_parquet(triplegs, filename, **kwargs):
+    """
+    Write triplegs to a (Geo)Parquet file.
+
+    Wraps the geopandas to_parquet function. In contrast to CSV files the geometry, the CRS and all
+    dtypes are stored without conversion.
+
+    Parameters
+    ----------
+    triplegs : GeoDataFrame (as trackintel triplegs)
+        The triplegs to store to the Parquet file.
+
+    filename : str
+        The file to write to.
+
+    Examples
+    --------
+    >>> tpls.as_triplegs.to_parquet('triplegs.parquet')
+    """
+    triplegs.to_parquet(filename, **kwargs)
+
+
+def read_staypoints_parquet(filename, columns=None, **kwargs):
+    """
+    Read staypoints from a (Geo)Parquet file.
+
+    Wraps the geopandas read_parquet function. Parquet preserves the CRS, the index (and its name),
+    timezone aware timestamps and all other dtypes (e.g. nullable integers or categoricals). This also
+    validates that the ingested data conforms to the trackintel understanding of staypoints (see
+    :doc:`/modules/model`).
+
+    Parameters
+    ----------
+    filename : str
+        The file to read from.
+
+    columns : list of str, optional
+        Only read these columns (and the index). The required columns and the geometry are always read.
+
+    Returns
+    -------
+    stps : GeoDataFrame (as trackintel staypoints)
+        A GeoDataFrame containing the staypoints.
+
+    Notes
+    -----
+    Requires the optional dependency pyarrow.
+
+    Examples
+    --------
+    >>> trackintel.read_staypoints_parquet('staypoints.parquet')
+    >>> trackintel.read_staypoints_parquet('staypoints.parquet', columns=['location_id'])
+    """
+    required_columns = ti.model.staypoints.StaypointsAccessor.required_columns
+    stps = _read_parquet(filename, required_columns, columns, **kwargs)
+
+    # assert validity of staypoints
+    stps.as_staypoints
+    return stps
+
+
+def write_staypoints_parquet(staypoints, filename, **kwargs):
+    """
+    Write staypoints to a (Geo)Parquet file.
+
+    Wraps the geopandas to_parquet function. In contrast to CSV files the geometry, the CRS and all
+    dtypes are stored without conversion.
+
+    Parameters
+    ----------
+    staypoints : GeoDataFrame (as trackintel staypoints)
+        The staypoints to store to the Parquet file.
+
+    filename : str
+        The file to write to.
+
+    Examples
+    --------
+    >>> stps.as_staypoints.to_parquet('staypoints.parquet')
+    """
+    staypoints.to_parquet(filename, **kwargs)
+
+
+def read_locations_parquet(filename, columns=None, **kwargs):
+    """
+    Read locations from a (Geo)Parquet file.
+
+    Wraps the geopandas read_parquet function. Parquet preserves the CRS, the index (and its name),
+    the extent and all other dtypes. This also validates that the ingested data conforms to the
+    trackintel understanding of locations (see :doc:`/modules/model`).
+
+    Parameters
+    ----------
+    filename : str
+        The file to read from.
+
+    columns : list of str, optional
+        Only read these columns (and the index). The required columns and the geometry are always read.
+
+    Returns
+    -------
+    locs : GeoDataFrame (as trackintel locations)
+        A GeoDataFrame containing the locations.
+
+    Notes
+    -----
+    Requires the optional dependency pyarrow.
+
+    Examples
+    --------
+    >>> trackintel.read_locations_parquet('locations.parquet')
+    >>> trackintel.read_locations_parquet('locations.parquet', columns=['extent'])
+    """
+    required_columns = ti.model.locations.LocationsAccessor.required_columns
+    locs = _read_parquet(filename, required_columns, columns, **kwargs)
+
+    # assert validity of locations
+    locs.as_locations
+    return locs
+
+
+def write_locations_parquet(locations, filename, **kwargs):
+    """
+    Write locations to a (Geo)Parquet file.
+
+    Wraps the geopandas to_parquet function. In contrast to CSV files the geometries (center and
+    extent), the CRS and all dtypes are stored without conversion.
+
+    Parameters
+    ----------
+    locations : GeoDataFrame (as trackintel locations)
+        The locations to store to the Parquet file.
+
+    filename : str
+        The file to write to.
+
+    Examples
+    --------
+    >>> locs.as_locations.to_parquet('locations.parquet')
+    """
+    locations.to_parquet(filename, **kwargs)
+
+
+def read_trips_parquet(filename, columns=None, **kwargs):
+    """
+    Read trips from a (Geo)Parquet file.
+
+    Wraps the (geo)pandas read_parquet function. Parquet preserves the CRS, the index (and its name),
+    timezone aware timestamps and all other dtypes. This also validates that the ingested data conforms
+    to the trackintel understanding of trips (see :doc:`/modules/model`).
+
+    Parameters
+    ----------
+    filename : str
+        The file to read from.
+
+    columns : list of str, optional
+        Only read these columns (and the index). The required columns and the geometry are always read.
+
+    Returns
+    -------
+    trips : (Geo)DataFrame (as trackintel trips)
+        A DataFrame containing the trips. GeoDataFrame if the file contains a geometry column.
+
+    Notes
+    -----
+    Requires the optional dependency pyarrow.
+
+    Examples
+    --------
+    >>> trackintel.read_trips_parquet('trips.parquet')
+    """
+    required_columns = ti.model.trips.TripsAccessor.required_columns
+    trips = _read_parquet(filename, required_columns, columns, **kwargs)
+
+    # assert validity of trips
+    trips.as_trips
+    return trips
+
+
+def write_trips_parquet(trips, filename, **kwargs):
+    """
+    Write trips to a (Geo)Parquet file.
+
+    Wraps the (geo)pandas to_parquet function.
+
+    Parameters
+    ----------
+    trips : (Geo)DataFrame (as trackintel trips)
+        The trips to store to the Parquet file.
+
+    filename : str
+        The file to write to.
+
+    Examples
+    --------
+    >>> trips.as_trips.to_parquet('trips.parquet')
+    """
+    trips.to_parquet(filename, **kwargs)
+
+
+def read_tours_parquet(filename, columns=None, **kwargs):
+    """
+    Read tours from a Parquet file.
+
+    Wraps the pandas read_parquet function. Parquet preserves the index (and its name), timezone aware
+    timestamps and all other dtypes. This also validates that the ingested data conforms to the
+    trackintel understanding of tours (see :doc:`/modules/model`).
+
+    Parameters
+    ----------
+    filename : str
+        The file to read from.
+
+    columns : list of str, optional
+        Only read these columns (and the index). The required columns are always read.
+
+    Returns
+    -------
+    tours : DataFrame (as trackintel tours)
+        A DataFrame containing the tours.
+
+    Notes
+    -----
+    Requires the optional dependency pyarrow.
+
+    Examples
+    --------
+    >>> trackintel.read_tours_parquet('tours.parquet')
+    """
+    required_columns = ti.model.tours.ToursAccessor.required_columns
+    tours = _read_parquet(filename, required_columns, columns, **kwargs)
+
+    # assert validity of tours
+    tours.as_tours
+    return tours
+
+
+def write_tours_parquet(tours, filename, **kwargs):
+    """
+    Write tours to a Parquet file.
+
+    Wraps the pandas to_parquet function.
+
+    Parameters
+    ----------
+    tours : DataFrame (as trackintel tours)
+        The tours to store to the Parquet file.
+
+    filename : str
+        The file to write to.
+
+    Examples
+    --------
+    >>> tours.as_tours.to_parquet('tours.parquet')
+    """
+    tours.to_parquet(filename, **kwargs)
+
+
+def write_parquet_dataset(data, path, model, n_buckets=16, **kwargs):
+    """
+    Write a trackintel model to a directory of Parquet files partitioned by user and date.
+
+    The records are split into `n_buckets` buckets of users (by a hash of the user id) and, for models with
+    timestamps, by the UTC date of the first timestamp. Minimum and maximum timestamp as well as the bounding
+    box of every partition are stored in a manifest such that
+    :func:`trackintel.io.parquet.read_parquet_dataset` only loads the partitions that can match a query.
+
+    Parameters
+    ----------
+    data : (Geo)DataFrame (as trackintel model)
+        The data to store.
+
+    path : str
+        Directory of the dataset. It must not contain a dataset yet.
+
+    model : {'positionfixes', 'staypoints', 'triplegs', 'locations', 'trips', 'tours'}
+        The trackintel model of `data`.
+
+    n_buckets : int, default 16
+        Number of user buckets. All records of a user are stored in the same bucket.
+
+    **kwargs
+        Passed to the ``write_*_parquet`` function of the model.
+
+    Notes
+    -----
+    The directory layout is ``path/bucket=<bucket>/date=<YYYY-MM-DD>/part.parquet`` (locations are only
+    partitioned by bucket) and the manifest is stored as ``path/_trackintel_dataset.json``. Records with a
+    duration are stored in the partition of the date they started, the time statistics cover the whole
+    duration. A ValueError is raised if the first timestamp of a record is missing.
+
+    Examples
+    --------
+    >>> write_parquet_dataset(pfs, 'data/positionfixes', 'positionfixes')
+    >>> pfs = read_parquet_dataset('data/positionfixes', user_ids=[1, 2], start='2021-01-01', end='2021-02-01')
+    """
+    start_col, end_col = _get_dataset_time_columns(model)
+    manifest_file = os.path.join(path, _DATASET_MANIFEST)
+    if os.path.exists(manifest_file):
+        raise FileExistsError(f"There is already a dataset stored at '{path}'.")
+
+    keys = [_user_bucket(data["user_id"], n_buckets)]
+    if start_col is not None:
+        start = _to_utc(data[start_col])
+        if start.isna().any():
+            raise ValueError(
+                f"Records without '{start_col}' cannot be assigned to a date partition, but {start.isna().sum()} "
+                + f"records have a missing '{start_col}'."
+            )
+        keys.append(start.dt.floor("D").values)
+    write_parquet = getattr(ti.io.parquet, f"write_{model}_parquet")
+
+    partitions = []
+    for key, idx in sorted(data.groupby(keys).indices.items()):
+        key = key if isinstance(key, tuple) else (key,)
+        part = data.iloc[idx]
+
+        directories = [f"bucket={key[0]:03d}"]
+        if start_col is not None:
+            directories.append(f"date={pd.Timestamp(key[1]):%Y-%m-%d}")
+        os.makedirs(os.path.join(path, *directories), exist_ok=True)
+        write_parquet(part, os.path.join(path, *directories, "part.parquet"), **kwargs)
+
+        stats = {"path": "/".join(directories + ["part.parquet"]), "bucket": int(key[0]), "n_rows": len(idx)}
+        if start_col is not None:
+            stats["time_min"] = _to_utc(part[start_col]).min().isoformat()
+            stats["time_max"] = _to_utc(part[end_col]).max().isoformat()
+        if isinstance(part, gpd.GeoDataFrame):
+            stats["bbox"] = part.total_bounds.tolist()
+        partitions.append(stats)
+
+    os.makedirs(path, exist_ok=True)
+    with open(manifest_file, "w") as f:
+        json.dump({"model": model, "n_buckets": n_buckets, "partitions": partitions}, f, indent=1)
+
+
+def read_parquet_dataset(path, user_ids=None, start=None, end=None, bbox=None, columns=None):
+    """
+    Read the records of a partitioned dataset that match a set of users, a time window and a bounding box.
+
+    Only partitions whose user bucket, time statistics and bounding box can match the query are loaded. The
+    loaded records are then filtered exactly.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the dataset written with :func:`trackintel.io.parquet.write_parquet_dataset`.
+
+    user_ids : list, optional
+        Only return records of these users.
+
+    start, end : str or pandas.Timestamp, optional
+        Only return records overlapping the (closed) time window. Naive timestamps are interpreted as UTC.
+
+    bbox : tuple of float, optional
+        Only return records whose geometry intersects the box (minx, miny, maxx, maxy) given in the CRS of
+        the dataset.
+
+    columns : list of str, optional
+        Only read these columns (and the index). The required columns and the geometry are always read.
+
+    Returns
+    -------
+    (Geo)DataFrame (as trackintel model)
+        The matching records sorted by their index.
+
+    Examples
+    --------
+    >>> read_parquet_dataset('data/positionfixes', user_ids=[1, 2], start='2021-01-01', end='2021-02-01')
+    >>> read_parquet_dataset('data/staypoints', bbox=(8.4, 47.3, 8.6, 47.4))
+    """
+    manifest = _read_dataset_manifest(path)
+    partitions = _select_partitions(manifest, user_ids, start, end, bbox)
+    return _read_partitions(path, manifest, partitions, user_ids, start, end, bbox, columns)
+
+
+def iter_parquet_dataset(path, user_ids=None, start=None, end=None, bbox=None, columns=None):
+    """
+    Iterate over the user buckets of a partitioned dataset.
+
+    Yields the matching records bucket by bucket, such that large datasets can be processed without loading
+    them at once. As every user is stored in a single bucket, each chunk contains the complete (filtered)
+    records of its users and can directly be passed to the preprocessing functions.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the dataset written with :func:`trackintel.io.parquet.write_parquet_dataset`.
+
+    user_ids, start, end, bbox, columns
+        See :func:`trackintel.io.parquet.read_parquet_dataset`.
+
+    Yields
+    ------
+    (Geo)DataFrame (as trackintel model)
+        The matching records of one user bucket, sorted by their index.
+
+    Examples
+    --------
+    >>> for pfs in iter_parquet_dataset('data/positionfixes', start='2021-01-01'):
+    ...     pfs, sp = pfs.as_positionfixes.generate_staypoints()
+    """
+    manifest = _read_dataset_manifest(path)
+    partitions = _select_partitions(manifest, user_ids, start, end, bbox)
+    for bucket in sorted({p["bucket"] for p in partitions}):
+        bucket_partitions = [p for p in partitions if p["bucket"] == bucket]
+        data = _read_partitions(path, manifest, bucket_partitions, user_ids, start, end, bbox, columns)
+        if not data.empty:
+            yield data
+
+
+def _read_parquet(filename, required_columns, columns=None, **kwargs):
+    """Read a GeoDataFrame if the file contains GeoParquet metadata, else a DataFrame.
+
+    The required columns and the primary geometry column are added to the selected `columns`.
+    """
+    try:
+        from pyarrow import parquet
+    except ImportError as err:
+        raise ImportError(
+            "pyarrow is required for Parquet support, install it with 'pip install trackintel[parquet]'."
+        ) from err
+
+    metadata = parquet.read_schema(filename).metadata or {}
+    geo_metadata = metadata.get(b"geo")
+
+    if columns is not None:
+        columns = list(columns) + [col for col in required_columns if col not in columns]
+        if geo_metadata is not None:
+            geom_col = json.loads(geo_metadata)["primary_column"]
+            columns += [geom_col] if geom_col not in columns else []
+
+    if geo_metadata is None:
+        return pd.read_parquet(filename, columns=columns, **kwargs)
+    return gpd.read_parquet(filename, columns=columns, **kwargs)
+
+
+_DATASET_MANIFEST = "_trackintel_dataset.json"
+
+
+def _get_dataset_time_columns(model):
+    """Columns of the first and the last timestamp of a record of the model (None for models without time)."""
+    time_columns = {
+        "positionfixes": ("tracked_at", "tracked_at"),
+        "staypoints": ("started_at", "finished_at"),
+        "triplegs": ("started_at", "finished_at"),
+        "locations": (None, None),
+        "trips": ("started_at", "finished_at"),
+        "tours": ("started_at", "finished_at"),
+    }
+    if model not in time_columns:
+        raise AttributeError(f"Model unknown. We only support {list(time_columns)}. You passed {model}")
+    return time_columns[model]
+
+
+def _user_bucket(user_id, n_buckets):
+    """
+    Bucket of every user id, stable over sessions and machines.
+
+    The ids are hashed as strings, integral numbers as integers, such that e.g. 1 and 1.0 share a bucket
+    independent of the dtype they are stored or queried with.
+    """
+    codes, uniques = pd.factorize(np.asarray(user_id))
+    keys = [str(int(u)) if isinstance(u, numbers.Real) and float(u).is_integer() else str(u) for u in uniques]
+    # missing ids have code -1 and get the last key
+    keys = np.array(keys + ["nan"], dtype=object)
+    return (pd.util.hash_array(keys) % n_buckets)[codes]
+
+
+def _read_dataset_manifest(path):
+    """Load the manifest of a dataset written with write_parquet_dataset."""
+    with open(os.path.join(path, _DATASET_MANIFEST)) as f:
+        return json.load(f)
+
+
+def _select_partitions(manifest, user_ids, start, end, bbox):
+    """Partitions whose statistics can match the query."""
+    partitions = manifest["partitions"]
+    if user_ids is not None:
+        buckets = set(_user_bucket(list(user_ids), manifest["n_buckets"]).tolist())
+        partitions = [p for p in partitions if p["bucket"] in buckets]
+    if start is not None:
+        start = _to_utc_timestamp(start)
+        partitions = [p for p in partitions if "time_max" not in p or pd.Timestamp(p["time_max"]) >= start]
+    if end is not None:
+        end = _to_utc_timestamp(end)
+        partitions = [p for p in partitions if "time_min" not in p or pd.Timestamp(p["time_min"]) <= end]
+    if bbox is not None:
+        minx, miny, maxx, maxy = bbox
+        partitions = [
+            p
+            for p in partitions
+            if "bbox" not in p
+            or not (p["bbox"][0] > maxx or p["bbox"][2] < minx or p["bbox"][1] > maxy or p["bbox"][3] < miny)
+        ]
+    return partitions
+
+
+def _read_partitions(path, manifest, partitions, user_ids, start, end, bbox, columns):
+    """Read the partitions and filter the records by user, time window and bbox."""
+    model = manifest["model"]
+    read_parquet = getattr(ti.io.parquet, f"read_{model}_parquet")
+    if len(manifest["partitions"]) == 0:
+        # empty dataset, there is no file to take the schema from
+        required_columns = getattr(getattr(ti.model, model), f"{model.capitalize()}Accessor").required_columns
+        columns = [] if columns is None else list(columns)
+        return pd.DataFrame(columns=columns + [col for col in required_columns if col not in columns])
+    if len(partitions) == 0:
+        # keep the schema of the dataset for an empty result
+        partitions = manifest["partitions"][:1]
+        user_ids = []
+    data = [read_parquet(os.path.join(path, *p["path"].split("/")), columns=columns) for p in partitions]
+    data = pd.concat(data) if len(data) > 1 else data[0]
+
+    keep = np.ones(len(data), dtype=bool)
+    start_col, end_col = _get_dataset_time_columns(model)
+    if user_ids is not None:
+        keep &= data["user_id"].isin(user_ids).values
+    if start is not None and start_col is not None:
+        keep &= (_to_utc(data[end_col]) >= _to_utc_timestamp(start)).values
+    if end is not None and start_col is not None:
+        keep &= (_to_utc(data[start_col]) <= _to_utc_timestamp(end)).values
+    if bbox is not None:
+        if not isinstance(data, gpd.GeoDataFrame):
+            raise ValueError("Filtering by a bounding box requires a geometry column.")
+        keep &= data.intersects(box(*bbox)).values
+    return data[keep].sort_index()
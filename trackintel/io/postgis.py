@@ -1,12 +1,22 @@
+import io
+import uuid
+import warnings
+from contextlib import contextmanager
 from functools import wraps
 from inspect import signature
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import shapely
 from geoalchemy2 import Geometry, WKTElement
-from sqlalchemy import create_engine
+from pyproj import CRS
+from sqlalchemy import bindparam, create_engine, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool
 
 import trackintel as ti
+from trackintel.io.util import _complete_user_chunks, _to_utc_timestamp
 
 
 def _handle_con_string(func):
@@ -21,8 +31,7 @@ def _handle_con_string(func):
         if not isinstance(con, str):
             return func(*args, **kwargs)
 
-        engine = create_engine(con)
-        con = engine.connect()
+        con = _get_engine(con).connect()
 
         # overwrite con argument with open connection
         bound_values.arguments["con"] = con
@@ -38,7 +47,9 @@ def _handle_con_string(func):
 
 
 @_handle_con_string
-def read_positionfixes_postgis(sql, con, geom_col="geom", **kwargs):
+def read_positionfixes_postgis(
+    sql, con, geom_col="geom", user_ids=None, start=None, end=None, bbox=None, columns=None, **kwargs
+):
     """Reads positionfixes from a PostGIS database.
 
     Parameters
@@ -52,6 +63,20 @@ def read_positionfixes_postgis(sql, con, geom_col="geom", **kwargs):
     geom_col : str, default 'geom'
         The geometry column of the table.
 
+    user_ids : list, optional
+        Only read the positionfixes of these users.
+
+    start, end : str or Timestamp, optional
+        Only read the positionfixes tracked in this time window, naive timestamps are interpreted as UTC.
+
+    bbox : tuple of float, optional
+        Only read the positionfixes whose geometry intersects the bounding box (minx, miny, maxx, maxy), given in the
+        coordinate reference system of the geometry column which has to be passed as `crs` (with EPSG code). The GiST
+        index on the geometry column is used.
+
+    columns : list of str, optional
+        Only read these columns. The required columns, the geometry and the index are always read.
+
     **kwargs
         Further keyword arguments as available in GeoPanda's GeoDataFrame.from_postgis().
 
@@ -63,15 +88,108 @@ def read_positionfixes_postgis(sql, con, geom_col="geom", **kwargs):
     Examples
     --------
     >>> pfs = ti.io.read_postifionfixes_postgis("SELECT * FROM postionfixes", con, geom_col="geom")
+    >>> pfs = ti.io.read_positionfixes_postgis("SELECT * FROM positionfixes", con, user_ids=[1, 2], start="2021-01-01")
     """
+    sql = _filter_query(
+        sql,
+        con,
+        kwargs,
+        ["user_id", "tracked_at", geom_col],
+        time_columns=("tracked_at", "tracked_at"),
+        geom_col=geom_col,
+        index_col=kwargs.get("index_col"),
+        user_ids=user_ids,
+        start=start,
+        end=end,
+        bbox=bbox,
+        columns=columns,
+    )
     pfs = gpd.GeoDataFrame.from_postgis(sql, con, geom_col, **kwargs)
     return ti.io.read_positionfixes_gpd(pfs, geom_col=geom_col)
 
 
+def iter_positionfixes_postgis(sql, con, geom_col="geom", chunksize=100000, complete_users=False, **kwargs):
+    """Reads positionfixes from a PostGIS database chunk by chunk.
+
+    The positionfixes are ordered by user and time and fetched through a server-side cursor, such that only
+    a single chunk is held in memory. Every chunk is validated as trackintel positionfixes.
+
+    Parameters
+    ----------
+    sql : str
+        SQL query e.g. "SELECT * FROM positionfixes". The result must contain the columns "user_id" and
+        "tracked_at".
+
+    con : str, sqlalchemy.engine.Connection or sqlalchemy.engine.Engine
+        Connection string or active connection to PostGIS database.
+
+    geom_col : str, default 'geom'
+        The geometry column of the table.
+
+    chunksize : int, default 100000
+        Number of rows fetched from the database at once.
+
+    complete_users : bool, default False
+        If True, rows are regrouped such that every yielded chunk contains all positionfixes of its users.
+        The last user of a chunk is carried over to the next chunk, a chunk can therefore contain more than
+        `chunksize` rows.
+
+    **kwargs
+        Further keyword arguments as available in GeoPanda's GeoDataFrame.from_postgis().
+
+    Yields
+    ------
+    GeoDataFrame
+        A GeoDataFrame containing the positionfixes of the chunk ordered by user_id and tracked_at.
+
+    Examples
+    --------
+    >>> for pfs in ti.io.iter_positionfixes_postgis("SELECT * FROM positionfixes", con, complete_users=True):
+    ...     pfs, sp = pfs.as_positionfixes.generate_staypoints()
+    """
+    sql = "SELECT * FROM ({}) AS pfs ORDER BY user_id, tracked_at".format(sql.strip().rstrip(";"))
+    with _connect(con) as connection:
+        # stream_results makes psycopg2 use a named (server-side) cursor
+        connection = connection.execution_options(stream_results=True)
+        chunks = gpd.read_postgis(sql, connection, geom_col=geom_col, chunksize=chunksize, **kwargs)
+        if complete_users:
+            chunks = _complete_user_chunks(chunks)
+        for pfs in chunks:
+            yield ti.io.read_positionfixes_gpd(pfs, geom_col=geom_col)
+
+
 @_handle_con_string
 def write_positionfixes_postgis(
-    positionfixes, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
+    positionfixes,
+    name,
+    con,
+    schema=None,
+    if_exists="fail",
+    index=True,
+    index_label=None,
+    chunksize=None,
+    dtype=None,
+    method=None,
+    deferred_index=False,
+    update_columns=None,
 ):
+    if method is not None or if_exists == "upsert":
+        _write_postgis_copy(
+            positionfixes,
+            name,
+            con,
+            schema,
+            if_exists,
+            index,
+            index_label,
+            chunksize,
+            dtype,
+            method,
+            deferred_index,
+            update_columns,
+        )
+        return
+
     positionfixes.to_postgis(
         name,
         con,
@@ -85,7 +203,9 @@ def write_positionfixes_postgis(
 
 
 @_handle_con_string
-def read_triplegs_postgis(sql, con, geom_col="geom", **kwargs):
+def read_triplegs_postgis(
+    sql, con, geom_col="geom", user_ids=None, start=None, end=None, bbox=None, columns=None, **kwargs
+):
     """Reads triplegs from a PostGIS database.
 
     Parameters
@@ -99,6 +219,20 @@ def read_triplegs_postgis(sql, con, geom_col="geom", **kwargs):
     geom_col : str, default 'geom'
         The geometry column of the table.
 
+    user_ids : list, optional
+        Only read the triplegs of these users.
+
+    start, end : str or Timestamp, optional
+        Only read the triplegs that overlap with this time window, naive timestamps are interpreted as UTC.
+
+    bbox : tuple of float, optional
+        Only read the triplegs whose geometry intersects the bounding box (minx, miny, maxx, maxy), given in the
+        coordinate reference system of the geometry column which has to be passed as `crs` (with EPSG code). The GiST
+        index on the geometry column is used.
+
+    columns : list of str, optional
+        Only read these columns. The required columns, the geometry and the index are always read.
+
     **kwargs
         Further keyword arguments as available in GeoPanda's GeoDataFrame.from_postgis().
 
@@ -111,14 +245,56 @@ def read_triplegs_postgis(sql, con, geom_col="geom", **kwargs):
     --------
     >>> tpls = ti.io.read_triplegs_postgis("SELECT * FROM triplegs", con, geom_col="geom")
     """
+    sql = _filter_query(
+        sql,
+        con,
+        kwargs,
+        ["user_id", "started_at", "finished_at", geom_col],
+        time_columns=("started_at", "finished_at"),
+        geom_col=geom_col,
+        index_col="id",
+        user_ids=user_ids,
+        start=start,
+        end=end,
+        bbox=bbox,
+        columns=columns,
+    )
     tpls = gpd.GeoDataFrame.from_postgis(sql, con, geom_col=geom_col, index_col="id", **kwargs)
     return ti.io.read_triplegs_gpd(tpls, geom_col=geom_col)
 
 
 @_handle_con_string
 def write_triplegs_postgis(
-    triplegs, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
+    triplegs,
+    name,
+    con,
+    schema=None,
+    if_exists="fail",
+    index=True,
+    index_label=None,
+    chunksize=None,
+    dtype=None,
+    method=None,
+    deferred_index=False,
+    update_columns=None,
 ):
+    if method is not None or if_exists == "upsert":
+        _write_postgis_copy(
+            triplegs,
+            name,
+            con,
+            schema,
+            if_exists,
+            index,
+            index_label,
+            chunksize,
+            dtype,
+            method,
+            deferred_index,
+            update_columns,
+        )
+        return
+
     triplegs.to_postgis(
         name,
         con,
@@ -132,7 +308,9 @@ def write_triplegs_postgis(
 
 
 @_handle_con_string
-def read_staypoints_postgis(sql, con, geom_col="geom", **kwargs):
+def read_staypoints_postgis(
+    sql, con, geom_col="geom", user_ids=None, start=None, end=None, bbox=None, columns=None, **kwargs
+):
     """Read staypoints from a PostGIS database.
 
     Parameters
@@ -146,6 +324,20 @@ def read_staypoints_postgis(sql, con, geom_col="geom", **kwargs):
     geom_col : str, default 'geom'
         The geometry column of the table.
 
+    user_ids : list, optional
+        Only read the staypoints of these users.
+
+    start, end : str or Timestamp, optional
+        Only read the staypoints that overlap with this time window, naive timestamps are interpreted as UTC.
+
+    bbox : tuple of float, optional
+        Only read the staypoints whose geometry intersects the bounding box (minx, miny, maxx, maxy), given in the
+        coordinate reference system of the geometry column which has to be passed as `crs` (with EPSG code). The GiST
+        index on the geometry column is used.
+
+    columns : list of str, optional
+        Only read these columns. The required columns, the geometry and the index are always read.
+
     **kwargs
         Further keyword arguments as available in GeoPanda's GeoDataFrame.from_postgis().
 
@@ -160,6 +352,20 @@ def read_staypoints_postgis(sql, con, geom_col="geom", **kwargs):
     >>> spts = ti.io.read_staypoints_postgis("SELECT * FROM staypoints", con, geom_col="geom")
 
     """
+    sql = _filter_query(
+        sql,
+        con,
+        kwargs,
+        ["user_id", "started_at", "finished_at", geom_col],
+        time_columns=("started_at", "finished_at"),
+        geom_col=geom_col,
+        index_col="id",
+        user_ids=user_ids,
+        start=start,
+        end=end,
+        bbox=bbox,
+        columns=columns,
+    )
     spts = gpd.GeoDataFrame.from_postgis(sql, con, geom_col=geom_col, index_col="id", **kwargs)
 
     return ti.io.read_staypoints_gpd(spts, geom_col=geom_col)
@@ -167,8 +373,36 @@ def read_staypoints_postgis(sql, con, geom_col="geom", **kwargs):
 
 @_handle_con_string
 def write_staypoints_postgis(
-    staypoints, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
+    staypoints,
+    name,
+    con,
+    schema=None,
+    if_exists="fail",
+    index=True,
+    index_label=None,
+    chunksize=None,
+    dtype=None,
+    method=None,
+    deferred_index=False,
+    update_columns=None,
 ):
+    if method is not None or if_exists == "upsert":
+        _write_postgis_copy(
+            staypoints,
+            name,
+            con,
+            schema,
+            if_exists,
+            index,
+            index_label,
+            chunksize,
+            dtype,
+            method,
+            deferred_index,
+            update_columns,
+        )
+        return
+
     staypoints.to_postgis(
         name,
         con,
@@ -182,7 +416,7 @@ def write_staypoints_postgis(
 
 
 @_handle_con_string
-def read_locations_postgis(sql, con, geom_col="geom", **kwargs):
+def read_locations_postgis(sql, con, geom_col="geom", user_ids=None, bbox=None, columns=None, **kwargs):
     """Reads locations from a PostGIS database.
 
     Parameters
@@ -196,6 +430,17 @@ def read_locations_postgis(sql, con, geom_col="geom", **kwargs):
     geom_col : str, default 'geom'
         The geometry column of the table. For the center of the location.
 
+    user_ids : list, optional
+        Only read the locations of these users.
+
+    bbox : tuple of float, optional
+        Only read the locations whose geometry intersects the bounding box (minx, miny, maxx, maxy), given in the
+        coordinate reference system of the geometry column which has to be passed as `crs` (with EPSG code). The GiST
+        index on the geometry column is used.
+
+    columns : list of str, optional
+        Only read these columns. The required columns, the geometry and the index are always read.
+
     *args
         Further arguments as available in GeoPanda's GeoDataFrame.from_postgis().
 
@@ -211,6 +456,17 @@ def read_locations_postgis(sql, con, geom_col="geom", **kwargs):
     --------
     >>> locs = ti.io.read_locations_postgis("SELECT * FROM locations", con, geom_col="geom")
     """
+    sql = _filter_query(
+        sql,
+        con,
+        kwargs,
+        ["user_id", geom_col],
+        geom_col=geom_col,
+        index_col="id",
+        user_ids=user_ids,
+        bbox=bbox,
+        columns=columns,
+    )
     locs = gpd.GeoDataFrame.from_postgis(sql, con, geom_col=geom_col, index_col="id", **kwargs)
 
     return ti.io.read_locations_gpd(locs, center=geom_col)
@@ -218,8 +474,36 @@ def read_locations_postgis(sql, con, geom_col="geom", **kwargs):
 
 @_handle_con_string
 def write_locations_postgis(
-    locations, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
+    locations,
+    name,
+    con,
+    schema=None,
+    if_exists="fail",
+    index=True,
+    index_label=None,
+    chunksize=None,
+    dtype=None,
+    method=None,
+    deferred_index=False,
+    update_columns=None,
 ):
+    if method is not None or if_exists == "upsert":
+        _write_postgis_copy(
+            locations,
+            name,
+            con,
+            schema,
+            if_exists,
+            index,
+            index_label,
+            chunksize,
+            dtype,
+            method,
+            deferred_index,
+            update_columns,
+        )
+        return
+
     # Assums that "extent" is not geometry column but center is.
     # May build additional check for that.
     if "extent" in locations.columns:
@@ -250,7 +534,7 @@ def write_locations_postgis(
 
 
 @_handle_con_string
-def read_trips_postgis(sql, con, **kwargs):
+def read_trips_postgis(sql, con, user_ids=None, start=None, end=None, columns=None, **kwargs):
     """Read trips from a PostGIS database.
 
     Parameters
@@ -261,6 +545,15 @@ def read_trips_postgis(sql, con, **kwargs):
     con : str, sqlalchemy.engine.Connection or sqlalchemy.engine.Engine
         Connection string or active connection to PostGIS database.
 
+    user_ids : list, optional
+        Only read the trips of these users.
+
+    start, end : str or Timestamp, optional
+        Only read the trips that overlap with this time window, naive timestamps are interpreted as UTC.
+
+    columns : list of str, optional
+        Only read these columns. The required columns, the geometry and the index are always read.
+
     **kwargs
         Further keyword arguments as available in GeoPanda's GeoDataFrame.from_postgis().
 
@@ -275,6 +568,19 @@ def read_trips_postgis(sql, con, **kwargs):
     >>> trips = ti.io.read_trips_postgis("SELECT * FROM trips", con, geom_col="geom")
 
     """
+    required_columns = ["user_id", "started_at", "finished_at", "origin_staypoint_id", "destination_staypoint_id"]
+    sql = _filter_query(
+        sql,
+        con,
+        kwargs,
+        required_columns,
+        time_columns=("started_at", "finished_at"),
+        index_col="id",
+        user_ids=user_ids,
+        start=start,
+        end=end,
+        columns=columns,
+    )
     trips = pd.read_sql(sql, con, index_col="id", **kwargs)
 
     return ti.io.read_trips_gpd(trips)
@@ -282,8 +588,36 @@ def read_trips_postgis(sql, con, **kwargs):
 
 @_handle_con_string
 def write_trips_postgis(
-    trips, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
+    trips,
+    name,
+    con,
+    schema=None,
+    if_exists="fail",
+    index=True,
+    index_label=None,
+    chunksize=None,
+    dtype=None,
+    method=None,
+    deferred_index=False,
+    update_columns=None,
 ):
+    if method is not None or if_exists == "upsert":
+        _write_postgis_copy(
+            trips,
+            name,
+            con,
+            schema,
+            if_exists,
+            index,
+            index_label,
+            chunksize,
+            dtype,
+            method,
+            deferred_index,
+            update_columns,
+        )
+        return
+
     trips.to_sql(
         name,
         con,
@@ -314,12 +648,16 @@ __doc = """Stores {long} to PostGIS. Usually, this is directly called on a {long
     schema : str, optional
         The schema (if the database supports this) where the table resides.
 
-    if_exists : str, {{'fail', 'replace', 'append'}}, default 'fail'
+    if_exists : str, {{'fail', 'replace', 'append', 'upsert'}}, default 'fail'
         How to behave if the table already exists.
 
         - fail: Raise a ValueError.
         - replace: Drop the table before inserting new values.
         - append: Insert new values to the existing table.
+        - upsert: Insert new rows and update the `update_columns` of the rows whose index already exists. The rows
+          are loaded with COPY into a temporary table and merged with INSERT ... ON CONFLICT, which requires
+          psycopg2 and a unique index (or primary key) on the index column(s). The index is created if the table
+          does not exist yet.
 
     index : bool, default True
         Write DataFrame index as a column. Uses index_label as the column name in the table.
@@ -328,16 +666,31 @@ __doc = """Stores {long} to PostGIS. Usually, this is directly called on a {long
         Column label for index column(s). If None is given (default) and index is True, then the index names are used.
 
     chunksize : int, optional
-        How many entries should be written at the same time.
+        How many entries should be written at the same time. For method 'copy' the default is 100000.
 
     dtype: dict of column name to SQL type, default None
         Specifying the datatype for columns.
         The keys should be the column names and the values should be the SQLAlchemy types.
 
+    method : {{None, 'copy'}}, default None
+        - None: Insert the rows with (Geo)Pandas to_postgis/to_sql.
+        - copy: Bulk load the rows with PostgreSQL COPY in batches of `chunksize` rows within a single
+          transaction. The geometries are transferred as EWKB. Requires psycopg2.
+
+    deferred_index : bool, default False
+        Only for method 'copy'. If True, the index on the index column(s) and the spatial index on the
+        geometry columns are created after all rows are loaded, which is considerably faster for large
+        tables. Indices are only created if the table is created by this function.
+
+    update_columns : list of str, optional
+        Only for if_exists 'upsert'. The columns that are updated for existing rows, by default all written
+        columns except the index. An empty list only inserts the new rows.
+
     Examples
     --------
     >>> {short}.as_{long}.to_postgis(conn_string, table_name)
     >>> ti.io.postgis.write_{long}_postgis(pfs, conn_string, table_name)
+    >>> {short}.as_{long}.to_postgis(table_name, conn_string, if_exists="upsert")
 """
 
 write_positionfixes_postgis.__doc__ = __doc.format(long="positionfixes", short="pfs")
@@ -345,3 +698,280 @@ write_triplegs_postgis.__doc__ = __doc.format(long="triplegs", short="tpls")
 write_staypoints_postgis.__doc__ = __doc.format(long="staypoints", short="spts")
 write_locations_postgis.__doc__ = __doc.format(long="locations", short="locs")
 write_trips_postgis.__doc__ = __doc.format(long="trips", short="trips")
+
+
+def set_engine_pool(pool_size=5, max_overflow=10):
+    """
+    Configure the connection pool of the engines created for connection strings.
+
+    All read and write functions reuse one engine per connection string, such that repeated calls (e.g., a
+    query per user) borrow an open connection from the pool instead of connecting to the database each time.
+    Engines that are already cached are disposed and recreated with the new pool settings on their next use.
+
+    Parameters
+    ----------
+    pool_size : int, default 5
+        Number of connections kept open per connection string.
+
+    max_overflow : int, default 10
+        Number of connections that can be opened in addition to `pool_size` when all pooled
+        connections are in use. Those are closed when they are returned.
+
+    Examples
+    --------
+    >>> ti.io.set_engine_pool(pool_size=1, max_overflow=0)
+    """
+    dispose_engines()
+    _ENGINE_POOL.update(pool_size=pool_size, max_overflow=max_overflow)
+
+
+def dispose_engines():
+    """
+    Close all pooled connections of the engines created for connection strings.
+
+    Call this when the database is no longer needed, e.g., at the end of a script or before forking processes.
+    New engines are created on the next call with a connection string.
+
+    Examples
+    --------
+    >>> for user_id in user_ids:
+    ...     pfs = ti.io.read_positionfixes_postgis(f"SELECT * FROM pfs WHERE user_id = {user_id}", conn_string)
+    >>> ti.io.dispose_engines()
+    """
+    while _ENGINES:
+        _, engine = _ENGINES.popitem()
+        engine.dispose()
+
+
+def _filter_query(
+    sql,
+    con,
+    kwargs,
+    required_columns,
+    time_columns=None,
+    geom_col=None,
+    index_col=None,
+    user_ids=None,
+    start=None,
+    end=None,
+    bbox=None,
+    columns=None,
+):
+    """
+    Wrap the query in a select that filters by user, time and bounding box with bound parameters.
+
+    The parameters are added to kwargs["params"]. PostgreSQL inlines the wrapped query, such that the
+    predicates can use the indices of the underlying table. Without filters the query is returned unchanged.
+    """
+    if user_ids is None and start is None and end is None and bbox is None and columns is None:
+        return sql
+
+    quote = con.dialect.identifier_preparer.quote
+    sql = sql.strip().rstrip(";")
+    if columns is None:
+        select = "*"
+    else:
+        index_cols = [] if index_col is None else [index_col] if isinstance(index_col, str) else list(index_col)
+        columns = list(columns)
+        columns += [col for col in index_cols + required_columns if col not in columns]
+        select = ", ".join(quote(col) for col in columns)
+
+    conditions, params, bindparams = [], {}, []
+    if user_ids is not None:
+        conditions.append(f"{quote('user_id')} IN :user_ids")
+        params["user_ids"] = list(user_ids)
+        bindparams.append(bindparam("user_ids", expanding=True))
+    # records with a duration are selected if they overlap with the time window
+    if start is not None:
+        conditions.append(f"{quote(time_columns[1])} >= :start")
+        params["start"] = _to_utc_timestamp(start).to_pydatetime()
+    if end is not None:
+        conditions.append(f"{quote(time_columns[0])} <= :end")
+        params["end"] = _to_utc_timestamp(end).to_pydatetime()
+    if bbox is not None:
+        # the envelope needs the SRID of the geometries, the query itself cannot tell it without running it
+        if kwargs.get("crs") is None:
+            raise ValueError("Filtering by bbox requires the crs of the geometries, pass it with the 'crs' argument.")
+        params["srid"] = CRS.from_user_input(kwargs["crs"]).to_epsg()
+        if params["srid"] is None:
+            raise ValueError(f"Filtering by bbox requires a crs with EPSG code, but {kwargs['crs']} has none.")
+        conditions.append(f"ST_Intersects({quote(geom_col)}, ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, :srid))")
+        params.update(zip(["minx", "miny", "maxx", "maxy"], map(float, bbox)))
+
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    kwargs["params"] = {**(kwargs.get("params") or {}), **params}
+    return text(f"SELECT {select} FROM ({sql}) AS query{where}").bindparams(*bindparams)
+
+
+_ENGINES = {}
+_ENGINE_POOL = {"pool_size": 5, "max_overflow": 10}
+
+
+def _get_engine(con_string):
+    """Return the cached engine of the connection string, create it if needed."""
+    engine = _ENGINES.get(con_string)
+    if engine is None:
+        url = make_url(con_string)
+        # pool settings are only accepted by engines with a QueuePool (e.g., not by SQLite)
+        pool_kwargs = _ENGINE_POOL if issubclass(url.get_dialect().get_pool_class(url), QueuePool) else {}
+        engine = _ENGINES[con_string] = create_engine(url, **pool_kwargs)
+    return engine
+
+
+@contextmanager
+def _connect(con):
+    """Yield a connection for a connection string, engine or connection. Connections opened here are closed."""
+    if isinstance(con, str):
+        con = _get_engine(con)
+    if isinstance(con, Engine):
+        with con.connect() as connection:
+            yield connection
+    else:
+        yield con
+
+
+@contextmanager
+def _begin(con):
+    """Open a transaction on an engine or connection and yield the connection."""
+    if isinstance(con, Engine):
+        with con.connect() as connection, connection.begin():
+            yield connection
+    else:
+        with con.begin():
+            yield con
+
+
+def _write_postgis_copy(
+    data, name, con, schema, if_exists, index, index_label, chunksize, dtype, method, deferred_index, update_columns
+):
+    """Create the table with pandas and load the rows with COPY, see the write_*_postgis functions."""
+    if method not in [None, "copy"]:
+        raise AttributeError(f"Method unknown. We only support ['copy']. You passed {method}")
+    upsert = if_exists == "upsert"
+    if upsert and not index:
+        raise ValueError("Upserting requires writing the index (index=True) to identify existing rows.")
+    chunksize = 100000 if chunksize is None else chunksize
+    schema_name = "public" if schema is None else schema
+    dtype = {} if dtype is None else dict(dtype)
+
+    # shallow copy, columns are replaced and not modified inplace
+    df = pd.DataFrame(data).copy(deep=False)
+    geom_cols = [col for col in df.columns if isinstance(df[col].dtype, gpd.array.GeometryDtype)]
+    for col in geom_cols:
+        geoms = gpd.GeoSeries(df[col])
+        crs = geoms.crs if geoms.crs is not None else getattr(data, "crs", None)
+        srid = _get_crs_srid(crs)
+        geom_types = geoms.geom_type.dropna().unique()
+        geom_type = geom_types[0].upper() if len(geom_types) == 1 else "GEOMETRY"
+        dtype[col] = Geometry(geom_type, srid, spatial_index=not deferred_index)
+        df[col] = _to_ewkb(geoms, srid)
+    for col in df.columns[[pd.api.types.is_timedelta64_dtype(d) for d in df.dtypes]]:
+        # stored as nanoseconds like in pandas.to_sql, NaT is written as NULL
+        df[col] = pd.arrays.IntegerArray(df[col].values.view("i8"), df[col].isna().values)
+
+    index_cols = []
+    if index:
+        index_cols = [index_label] if isinstance(index_label, str) else index_label
+        if index_cols is None:
+            index_cols = [
+                n if n is not None else ("index" if df.index.nlevels == 1 else f"level_{i}")
+                for i, n in enumerate(df.index.names)
+            ]
+        df.index.names = index_cols
+        df = df.reset_index()
+
+    if upsert:
+        if update_columns is None:
+            update_columns = [col for col in df.columns if col not in index_cols]
+        missing = [col for col in update_columns if col not in df.columns or col in index_cols]
+        if missing:
+            raise KeyError(f"The update_columns {missing} are not among the written (non-index) columns.")
+
+    with _begin(con) as connection:
+        create = if_exists == "replace" or not inspect(connection).has_table(name, schema=schema)
+        to_sql_if_exists = "append" if upsert else if_exists
+        df.iloc[:0].to_sql(name, connection, schema=schema, if_exists=to_sql_if_exists, index=False, dtype=dtype)
+        if create and upsert:
+            # ON CONFLICT needs a unique index on the index columns
+            _create_indices(connection, schema_name, name, index_cols, [], unique=True)
+        elif create and not deferred_index:
+            _create_indices(connection, schema_name, name, index_cols, [])
+
+        table = f'"{schema_name}"."{name}"'
+        if upsert:
+            _upsert_rows(connection, table, df, index_cols, update_columns, chunksize)
+        else:
+            _copy_rows(connection, table, df, chunksize)
+
+        if create and deferred_index:
+            _create_indices(connection, schema_name, name, [] if upsert else index_cols, geom_cols)
+
+
+def _copy_rows(connection, table, df, chunksize):
+    """Load the rows of the DataFrame into the (quoted) table with COPY in batches of chunksize rows."""
+    columns = ", ".join(f'"{col}"' for col in df.columns)
+    # missing values are written as \N, such that empty strings are not read as NULL
+    sql = f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    with connection.connection.cursor() as cursor:
+        for start in range(0, len(df), chunksize):
+            buffer = io.StringIO()
+            df.iloc[start : start + chunksize].to_csv(buffer, header=False, index=False, na_rep="\\N")
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+
+
+def _upsert_rows(connection, table, df, index_cols, update_columns, chunksize):
+    """Load the rows into a temporary table and merge them into the table, updating the update_columns on conflict."""
+    # a unique name, such that concurrent upserts on the same connection do not collide
+    temp_table = f'"_trackintel_upsert_{uuid.uuid4().hex}"'
+    connection.exec_driver_sql(f"CREATE TEMPORARY TABLE {temp_table} (LIKE {table}) ON COMMIT DROP")
+    _copy_rows(connection, temp_table, df, chunksize)
+
+    columns = ", ".join(f'"{col}"' for col in df.columns)
+    conflict = ", ".join(f'"{col}"' for col in index_cols)
+    if update_columns:
+        update = "UPDATE SET " + ", ".join(f'"{col}" = EXCLUDED."{col}"' for col in update_columns)
+    else:
+        update = "NOTHING"
+    connection.exec_driver_sql(
+        f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {temp_table} ON CONFLICT ({conflict}) DO {update}"
+    )
+    connection.exec_driver_sql(f"DROP TABLE {temp_table}")
+
+
+def _create_indices(connection, schema_name, name, index_cols, geom_cols, unique=False):
+    """Create btree indices on the index columns (a single one if unique) and spatial indices on the geometries."""
+    if unique:
+        columns = ", ".join(f'"{col}"' for col in index_cols)
+        connection.exec_driver_sql(f'CREATE UNIQUE INDEX "ux_{name}" ON "{schema_name}"."{name}" ({columns})')
+        index_cols = []
+    for col in index_cols:
+        connection.exec_driver_sql(f'CREATE INDEX "ix_{name}_{col}" ON "{schema_name}"."{name}" ("{col}")')
+    for col in geom_cols:
+        connection.exec_driver_sql(f'CREATE INDEX "idx_{name}_{col}" ON "{schema_name}"."{name}" USING GIST ("{col}")')
+
+
+def _get_crs_srid(crs):
+    """SRID of a crs, -1 (unknown) if the crs is not set or has no EPSG code."""
+    if crs is None:
+        return -1
+    srid = crs.to_epsg()
+    if srid is None:
+        warnings.warn(f"The crs '{crs.name}' has no EPSG code, the geometries are written without SRID.")
+        return -1
+    return srid
+
+
+def _to_ewkb(geoms, srid):
+    """Hex encoded EWKB of a GeoSeries (with the srid if it is known)."""
+    if hasattr(shapely, "to_wkb"):
+        # shapely>=2.0 offers vectorized serialization
+        values = np.asarray(geoms.values)
+        if srid > 0:
+            values = shapely.set_srid(values, srid)
+        return shapely.to_wkb(values, hex=True, include_srid=srid > 0)
+
+    from shapely import wkb
+
+    srid = srid if srid > 0 else None
+    return [None if geom is None else wkb.dumps(geom, hex=True, srid=srid) for geom in geoms]
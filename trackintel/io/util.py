@@ -0,0 +1,47 @@
+import pandas as pd
+
+
+def _to_utc(dt_series):
+    """Datetime series in UTC, naive timestamps are interpreted as UTC."""
+    return dt_series.dt.tz_localize("utc") if dt_series.dt.tz is None else dt_series.dt.tz_convert("utc")
+
+
+def _to_utc_timestamp(t):
+    """Timestamp in UTC, naive timestamps are interpreted as UTC."""
+    t = pd.Timestamp(t)
+    return t.tz_localize("utc") if t.tz is None else t.tz_convert("utc")
+
+
+def _complete_user_chunks(chunks):
+    """Regroup chunks of (Geo)DataFrames with contiguously stored users such that every user is in one chunk."""
+    yielded_users = set()
+    # parts of the last user, that can continue in the next chunk, are concatenated once the user is complete
+    rest = []
+    for df in chunks:
+        if df.empty:
+            continue
+        last_user = df["user_id"].iloc[-1]
+        is_last_user = (df["user_id"] == last_user).values
+        if is_last_user.all() and (not rest or rest[0]["user_id"].iloc[0] == last_user):
+            rest.append(df)
+            continue
+        complete = pd.concat(rest + [df[~is_last_user]])
+        rest = [df[is_last_user]]
+        _check_new_users(complete["user_id"], yielded_users)
+        yield complete
+
+    if rest:
+        complete = pd.concat(rest)
+        _check_new_users(complete["user_id"], yielded_users)
+        yield complete
+
+
+def _check_new_users(user_id, yielded_users):
+    """Raise an error if a user was already yielded in a previous chunk, else remember the users."""
+    users = set(user_id.unique())
+    if not yielded_users.isdisjoint(users):
+        raise ValueError(
+            "The positionfixes of a user are not stored contiguously, 'complete_users' requires the data to be "
+            + "sorted by user."
+        )
+    yielded_users.update(users)
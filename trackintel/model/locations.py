@@ -2,6 +2,7 @@ import pandas as pd
 import trackintel as ti
 import trackintel.io
 from trackintel.io.file import write_locations_csv
+from trackintel.io.parquet import write_locations_parquet
 from trackintel.io.postgis import write_locations_postgis
 from trackintel.model.util import copy_docstring
 from trackintel.preprocessing.filter import spatial_filter
@@ -68,9 +69,29 @@ class LocationsAccessor(object):
         """
         ti.io.file.write_locations_csv(self._obj, filename, *args, **kwargs)
 
+    @copy_docstring(write_locations_parquet)
+    def to_parquet(self, filename, **kwargs):
+        """
+        Store this collection of locations as a Parquet file.
+
+        See :func:`trackintel.io.parquet.write_locations_parquet`.
+        """
+        ti.io.parquet.write_locations_parquet(self._obj, filename, **kwargs)
+
     @copy_docstring(write_locations_postgis)
     def to_postgis(
-        self, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
+        self,
+        name,
+        con,
+        schema=None,
+        if_exists="fail",
+        index=True,
+        index_label=None,
+        chunksize=None,
+        dtype=None,
+        method=None,
+        deferred_index=False,
+        update_columns=None,
     ):
         """
         Store this collection of locations to PostGIS.
@@ -78,7 +99,18 @@ class LocationsAccessor(object):
         See :func:`trackintel.io.postgis.write_locations_postgis`.
         """
         ti.io.postgis.write_locations_postgis(
-            self._obj, name, con, schema, if_exists, index, index_label, chunksize, dtype
+            self._obj,
+            name,
+            con,
+            schema,
+            if_exists,
+            index,
+            index_label,
+            chunksize,
+            dtype,
+            method,
+            deferred_index,
+            update_columns,
         )
 
     @copy_docstring(spatial_filter)
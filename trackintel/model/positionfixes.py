@@ -2,6 +2,7 @@ import pandas as pd
 import trackintel as ti
 from trackintel.geogr.distances import calculate_distance_matrix
 from trackintel.io.file import write_positionfixes_csv
+from trackintel.io.parquet import write_positionfixes_parquet
 from trackintel.io.postgis import write_positionfixes_postgis
 from trackintel.model.util import copy_docstring
 from trackintel.preprocessing.positionfixes import generate_staypoints, generate_triplegs
@@ -109,9 +110,29 @@ class PositionfixesAccessor(object):
         """
         ti.io.file.write_positionfixes_csv(self._obj, filename, *args, **kwargs)
 
+    @copy_docstring(write_positionfixes_parquet)
+    def to_parquet(self, filename, **kwargs):
+        """
+        Store this collection of trackpoints as a Parquet file.
+
+        See :func:`trackintel.io.parquet.write_positionfixes_parquet`.
+        """
+        ti.io.parquet.write_positionfixes_parquet(self._obj, filename, **kwargs)
+
     @copy_docstring(write_positionfixes_postgis)
     def to_postgis(
-        self, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
+        self,
+        name,
+        con,
+        schema=None,
+        if_exists="fail",
+        index=True,
+        index_label=None,
+        chunksize=None,
+        dtype=None,
+        method=None,
+        deferred_index=False,
+        update_columns=None,
     ):
         """
         Store this collection of positionfixes to PostGIS.
@@ -119,7 +140,18 @@ class PositionfixesAccessor(object):
         See :func:`trackintel.io.postgis.write_positionfixes_postgis`.
         """
         ti.io.postgis.write_positionfixes_postgis(
-            self._obj, name, con, schema, if_exists, index, index_label, chunksize, dtype
+            self._obj,
+            name,
+            con,
+            schema,
+            if_exists,
+            index,
+            index_label,
+            chunksize,
+            dtype,
+            method,
+            deferred_index,
+            update_columns,
         )
 
     @copy_docstring(calculate_distance_matrix)
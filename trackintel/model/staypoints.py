@@ -3,6 +3,7 @@ import trackintel as ti
 from trackintel.analysis.labelling import create_activity_flag
 from trackintel.analysis.tracking_quality import temporal_tracking_quality
 from trackintel.io.file import write_staypoints_csv
+from trackintel.io.parquet import write_staypoints_parquet
 from trackintel.io.postgis import write_staypoints_postgis
 from trackintel.model.util import copy_docstring
 from trackintel.preprocessing.filter import spatial_filter
@@ -123,9 +124,29 @@ class StaypointsAccessor(object):
         """
         ti.io.file.write_staypoints_csv(self._obj, filename, *args, **kwargs)
 
+    @copy_docstring(write_staypoints_parquet)
+    def to_parquet(self, filename, **kwargs):
+        """
+        Store this collection of staypoints as a Parquet file.
+
+        See :func:`trackintel.io.parquet.write_staypoints_parquet`.
+        """
+        ti.io.parquet.write_staypoints_parquet(self._obj, filename, **kwargs)
+
     @copy_docstring(write_staypoints_postgis)
     def to_postgis(
-        self, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
+        self,
+        name,
+        con,
+        schema=None,
+        if_exists="fail",
+        index=True,
+        index_label=None,
+        chunksize=None,
+        dtype=None,
+        method=None,
+        deferred_index=False,
+        update_columns=None,
     ):
         """
         Store this collection of staypoints to PostGIS.
@@ -133,7 +154,18 @@ class StaypointsAccessor(object):
         See :func:`trackintel.io.postgis.write_staypoints_postgis`.
         """
         ti.io.postgis.write_staypoints_postgis(
-            self._obj, name, con, schema, if_exists, index, index_label, chunksize, dtype
+            self._obj,
+            name,
+            con,
+            schema,
+            if_exists,
+            index,
+            index_label,
+            chunksize,
+            dtype,
+            method,
+            deferred_index,
+            update_columns,
         )
 
     @copy_docstring(temporal_tracking_quality)
@@ -1,5 +1,9 @@
 import pandas as pd
 
+import trackintel as ti
+from trackintel.io.parquet import write_tours_parquet
+from trackintel.model.util import copy_docstring
+
 
 @pd.api.extensions.register_dataframe_accessor("as_tours")
 class ToursAccessor(object):
@@ -56,6 +60,15 @@ class ToursAccessor(object):
         """
         raise NotImplementedError
 
+    @copy_docstring(write_tours_parquet)
+    def to_parquet(self, filename, **kwargs):
+        """
+        Store this collection of tours as a Parquet file.
+
+        See :func:`trackintel.io.parquet.write_tours_parquet`.
+        """
+        ti.io.parquet.write_tours_parquet(self._obj, filename, **kwargs)
+
     def plot(self, *args, **kwargs):
         """
         Plot this collection of tours.
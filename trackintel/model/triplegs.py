@@ -6,6 +6,7 @@ from trackintel.analysis.modal_split import calculate_modal_split
 from trackintel.analysis.tracking_quality import temporal_tracking_quality
 from trackintel.geogr.distances import calculate_distance_matrix
 from trackintel.io.file import write_triplegs_csv
+from trackintel.io.parquet import write_triplegs_parquet
 from trackintel.io.postgis import write_triplegs_postgis
 from trackintel.model.util import copy_docstring
 from trackintel.preprocessing.filter import spatial_filter
@@ -89,9 +90,29 @@ class TriplegsAccessor(object):
         """
         ti.io.file.write_triplegs_csv(self._obj, filename, *args, **kwargs)
 
+    @copy_docstring(write_triplegs_parquet)
+    def to_parquet(self, filename, **kwargs):
+        """
+        Store this collection of triplegs as a Parquet file.
+
+        See :func:`trackintel.io.parquet.write_triplegs_parquet`.
+        """
+        ti.io.parquet.write_triplegs_parquet(self._obj, filename, **kwargs)
+
     @copy_docstring(write_triplegs_postgis)
     def to_postgis(
-        self, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
+        self,
+        name,
+        con,
+        schema=None,
+        if_exists="fail",
+        index=True,
+        index_label=None,
+        chunksize=None,
+        dtype=None,
+        method=None,
+        deferred_index=False,
+        update_columns=None,
     ):
         """
         Store this collection of triplegs to PostGIS.
@@ -99,7 +120,18 @@ class TriplegsAccessor(object):
         See :func:`trackintel.io.postgis.store_positionfixes_postgis`.
         """
         ti.io.postgis.write_triplegs_postgis(
-            self._obj, name, con, schema, if_exists, index, index_label, chunksize, dtype
+            self._obj,
+            name,
+            con,
+            schema,
+            if_exists,
+            index,
+            index_label,
+            chunksize,
+            dtype,
+            method,
+            deferred_index,
+            update_columns,
         )
 
     @copy_docstring(calculate_distance_matrix)
@@ -1,6 +1,7 @@
 from trackintel.analysis.tracking_quality import temporal_tracking_quality
 from trackintel.io.postgis import write_trips_postgis
 from trackintel.io.file import write_trips_csv
+from trackintel.io.parquet import write_trips_parquet
 from trackintel.model.util import copy_docstring
 import pandas as pd
 import geopandas as gpd
@@ -92,16 +93,49 @@ class TripsAccessor(object):
         """
         ti.io.file.write_trips_csv(self._obj, filename, *args, **kwargs)
 
+    @copy_docstring(write_trips_parquet)
+    def to_parquet(self, filename, **kwargs):
+        """
+        Store this collection of trips as a Parquet file.
+
+        See :func:`trackintel.io.parquet.write_trips_parquet`.
+        """
+        ti.io.parquet.write_trips_parquet(self._obj, filename, **kwargs)
+
     @copy_docstring(write_trips_postgis)
     def to_postgis(
-        self, name, con, schema=None, if_exists="fail", index=True, index_label=None, chunksize=None, dtype=None
+        self,
+        name,
+        con,
+        schema=None,
+        if_exists="fail",
+        index=True,
+        index_label=None,
+        chunksize=None,
+        dtype=None,
+        method=None,
+        deferred_index=False,
+        update_columns=None,
     ):
         """
         Store this collection of trips to PostGIS.
 
         See :func:`trackintel.io.postgis.write_trips_postgis`.
         """
-        ti.io.postgis.write_trips_postgis(self._obj, name, con, schema, if_exists, index, index_label, chunksize, dtype)
+        ti.io.postgis.write_trips_postgis(
+            self._obj,
+            name,
+            con,
+            schema,
+            if_exists,
+            index,
+            index_label,
+            chunksize,
+            dtype,
+            method,
+            deferred_index,
+            update_columns,
+        )
 
     @copy_docstring(temporal_tracking_quality)
     def temporal_tracking_quality(self, *args, **kwargs):